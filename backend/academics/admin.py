@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Class, Subject, Timetable, Attendance, GradeConfig, Assessment, Grade, ParentStudentRelationship
+from .models import Class, Subject, Timetable, Attendance, AttendanceRollup, StudentAverage, GradeConfig, Assessment, Grade, ParentStudentRelationship, ReportJob
 
 @admin.register(Class)
 class ClassAdmin(admin.ModelAdmin):
@@ -30,6 +30,19 @@ class AttendanceAdmin(admin.ModelAdmin):
     ordering = ("-date",)
     date_hierarchy = "date"
 
+@admin.register(AttendanceRollup)
+class AttendanceRollupAdmin(admin.ModelAdmin):
+    list_display = ("student", "class_assigned", "period", "period_start", "present", "late", "absent", "total")
+    list_filter = ("period", "class_assigned")
+    search_fields = ("student__username", "class_assigned__name")
+    ordering = ("-period_start",)
+
+@admin.register(StudentAverage)
+class StudentAverageAdmin(admin.ModelAdmin):
+    list_display = ("student", "average_percentage", "graded_count", "updated_at")
+    search_fields = ("student__username",)
+    ordering = ("-average_percentage",)
+
 @admin.register(GradeConfig)
 class GradeConfigAdmin(admin.ModelAdmin):
     list_display = ("grade_letter", "min_percentage", "max_percentage", "gpa_value")
@@ -96,4 +109,13 @@ class ParentStudentRelationshipAdmin(admin.ModelAdmin):
         queryset, use_distinct = super().get_search_results(
             request, queryset, search_term
         )
-        return queryset, use_distinct
\ No newline at end of file
+        return queryset, use_distinct
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "requested_by", "completed", "total", "attempts", "created_at", "finished_at")
+    list_filter = ("kind", "status")
+    search_fields = ("requested_by__username",)
+    readonly_fields = ("started_at", "heartbeat_at", "finished_at")
+    ordering = ("-created_at",)
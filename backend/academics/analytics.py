@@ -1,32 +1,148 @@
 # backend/academics/analytics.py
-from django.db.models import Avg, Count, Q, Max, Min, StdDev
+import zlib
+from array import array
+from collections import deque
 from django.core.cache import cache
-from datetime import datetime, timedelta
-from decimal import Decimal
-from .models import Grade, Attendance, Assessment, GradeConfig, User
-import json
+from .models import Grade, AttendanceRollup, StudentAverage, User
+from .grading import get_grading_scale
+from .caching import MISS, cache_entry, get_or_compute, get_student_versions, is_fresh
+
+
+def _month_label(month_index):
+    """'YYYY-MM' for a month stored as year * 12 + (month - 1)."""
+    year, month = divmod(month_index, 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
+class _SubjectSummary:
+    """Running per-subject statistics, updated one grade at a time."""
+    __slots__ = (
+        'name', 'code', 'count', 'mean', 'm2', 'highest', 'lowest',
+        'weighted_sum', 'weight_total', 'recent',
+    )
+
+    def __init__(self, name, code):
+        self.name = name
+        self.code = code
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Welford sum of squared deviations
+        self.highest = float('-inf')
+        self.lowest = float('inf')
+        self.weighted_sum = 0.0
+        self.weight_total = 0.0
+        self.recent = deque(maxlen=3)
+
+    def add(self, percentage, weightage):
+        self.count += 1
+        delta = percentage - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (percentage - self.mean)
+        self.highest = max(self.highest, percentage)
+        self.lowest = min(self.lowest, percentage)
+        self.weighted_sum += percentage * weightage
+        self.weight_total += weightage
+        self.recent.append(percentage)
+
+    @property
+    def std_dev(self):
+        return (self.m2 / self.count) ** 0.5 if self.count else 0.0
+
+
+class _GradeColumns:
+    """
+    One student's graded results as parallel typed arrays, in assessment-date
+    order: percentage, weightage, month (year * 12 + month - 1) and an index
+    into ``subjects``. Monthly attendance is kept as month -> (total, present).
+    """
+    __slots__ = (
+        'percentages', 'weightages', 'months', 'subject_index',
+        'subjects', '_positions', 'attendance',
+    )
+
+    def __init__(self):
+        self.percentages = array('d')
+        self.weightages = array('d')
+        self.months = array('l')
+        self.subject_index = array('l')
+        self.subjects = []
+        self._positions = {}
+        self.attendance = {}
+
+    def add_grade(self, percentage, weightage, day, subject_id, name, code):
+        if subject_id not in self._positions:
+            self._positions[subject_id] = len(self.subjects)
+            self.subjects.append((name, code))
+        self.percentages.append(float(percentage))
+        self.weightages.append(float(weightage))
+        self.months.append(day.year * 12 + day.month - 1)
+        self.subject_index.append(self._positions[subject_id])
+
+    def add_attendance(self, period_start, total, present):
+        month = period_start.year * 12 + period_start.month - 1
+        month_total, month_present = self.attendance.get(month, (0, 0))
+        self.attendance[month] = (month_total + total, month_present + present)
+
+
+# Columns shared by the per-student and per-class loaders
+GRADE_COLUMNS = (
+    'percentage', 'assessment__weightage', 'assessment__date',
+    'assessment__subject_id', 'assessment__subject__name', 'assessment__subject__code',
+)
+ATTENDANCE_COLUMNS = ('period_start', 'total', 'present')
+
+
+def _graded(grades):
+    return grades.filter(
+        is_absent=False,
+        percentage__isnull=False
+    ).order_by('assessment__date', 'id')
+
 
 class StudentPerformanceAnalytics:
     """Advanced analytics for student performance"""
     
-    def __init__(self, student_id):
+    def __init__(self, student_id, student=None, columns=None, rank_percentile=None):
+        """
+        ``student``, ``columns`` and ``rank_percentile`` may be passed in
+        when they were loaded for many students at once (see
+        ``ClassPerformanceAnalytics``); otherwise they are queried here.
+        """
         self.student_id = student_id
-        self.student = User.objects.get(id=student_id)
-        self.cache_duration = 300  # 5 minutes
+        self.student = student if student is not None else User.objects.get(id=student_id)
+        self._columns = columns
+        self._rank_percentile = rank_percentile
+        self._summary = None
     
     def get_cache_key(self, suffix):
         """Generate cache key for student analytics"""
         return f"student_analytics_{self.student_id}_{suffix}"
     
     def get_comprehensive_analytics(self):
-        """Get all analytics data with caching"""
-        cache_key = self.get_cache_key('comprehensive')
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return cached_data
-        
-        data = {
+        """
+        Get all analytics data, cached until the student's results change.
+        
+        The entry stores the version it was computed for (see
+        ``analytics_version``, which also covers the account details in
+        ``student_info``) instead of expiring after a fixed time; a
+        stale entry is served while one worker recomputes it. The rank
+        percentile depends on every student's results, so it is always
+        read fresh rather than cached.
+        """
+        data, state = get_or_compute(
+            self.get_cache_key('comprehensive'),
+            self.compute_analytics,
+            version=analytics_version([self.student])[self.student_id],
+            timeout=None,
+        )
+        record_cache_access(hit=state != MISS)
+        if state != MISS and data['overall_metrics']['total_assessments']:
+            data['overall_metrics']['rank_percentile'] = self._calculate_rank_percentile()
+        return data
+    
+    def compute_analytics(self):
+        """Compute all analytics data, bypassing the cache"""
+        return {
             'student_info': self._get_student_info(),
             'grade_trends': self._get_grade_trends(),
             'subject_comparison': self._get_subject_comparison(),
@@ -36,9 +152,52 @@ class StudentPerformanceAnalytics:
             'recommendations': self._generate_recommendations(),
             'overall_metrics': self._get_overall_metrics()
         }
-        
-        cache.set(cache_key, data, self.cache_duration)
-        return data
+    
+    def _load(self):
+        """
+        Fetch the student's graded results and monthly attendance once.
+        
+        Every metric below is derived from the returned ``_GradeColumns``,
+        so one analytics run costs two queries plus the rank.
+        """
+        if self._columns is not None:
+            return self._columns
+        
+        columns = _GradeColumns()
+        for row in _graded(Grade.objects.filter(student=self.student)).values_list(*GRADE_COLUMNS):
+            columns.add_grade(*row)
+        for row in AttendanceRollup.objects.filter(
+            student=self.student,
+            period=AttendanceRollup.MONTH
+        ).values_list(*ATTENDANCE_COLUMNS):
+            columns.add_attendance(*row)
+        return columns
+    
+    @property
+    def summary(self):
+        """Per-subject and per-month aggregates from a single pass over the arrays."""
+        if self._summary is None:
+            columns = self._load()
+            percentages = columns.percentages
+            by_subject = [_SubjectSummary(name, code) for name, code in columns.subjects]
+            by_month = {}
+            for i in range(len(percentages)):
+                percentage = percentages[i]
+                month = columns.months[i]
+                by_subject[columns.subject_index[i]].add(percentage, columns.weightages[i])
+                month_sum, month_count = by_month.get(month, (0.0, 0))
+                by_month[month] = (month_sum + percentage, month_count + 1)
+            
+            self._summary = {
+                'count': len(percentages),
+                'mean': sum(percentages) / len(percentages) if percentages else None,
+                'highest': max(percentages) if percentages else None,
+                'lowest': min(percentages) if percentages else None,
+                'subjects': by_subject,
+                'months': by_month,
+                'attendance': columns.attendance,
+            }
+        return self._summary
     
     def _get_student_info(self):
         """Get basic student information"""
@@ -51,34 +210,19 @@ class StudentPerformanceAnalytics:
     
     def _get_grade_trends(self):
         """Calculate grade trends over time"""
-        grades = Grade.objects.filter(
-            student=self.student,
-            is_absent=False
-        ).select_related('assessment').order_by('assessment__date')
+        months = self.summary['months']
         
-        if not grades.exists():
+        if not months:
             return {'data': [], 'trend': 'insufficient_data'}
         
-        # Group by month
-        monthly_data = {}
-        for grade in grades:
-            month_key = grade.assessment.date.strftime('%Y-%m')
-            if month_key not in monthly_data:
-                monthly_data[month_key] = {
-                    'grades': [],
-                    'date': grade.assessment.date.strftime('%Y-%m-%d')
-                }
-            monthly_data[month_key]['grades'].append(float(grade.percentage))
-        
-        # Calculate averages
+        # Monthly averages
         trend_data = []
-        for month_key in sorted(monthly_data.keys()):
-            data = monthly_data[month_key]
-            avg = sum(data['grades']) / len(data['grades'])
+        for month in sorted(months):
+            month_sum, month_count = months[month]
             trend_data.append({
-                'date': month_key,
-                'average': round(avg, 2),
-                'count': len(data['grades'])
+                'date': _month_label(month),
+                'average': round(month_sum / month_count, 2),
+                'count': month_count
             })
         
         # Determine trend direction
@@ -102,39 +246,18 @@ class StudentPerformanceAnalytics:
     
     def _get_subject_comparison(self):
         """Compare performance across subjects"""
-        grades = Grade.objects.filter(
-            student=self.student,
-            is_absent=False
-        ).select_related('assessment__subject')
-        
-        if not grades.exists():
-            return []
-        
-        # Group by subject
-        subject_data = {}
-        for grade in grades:
-            subject = grade.assessment.subject
-            if subject.id not in subject_data:
-                subject_data[subject.id] = {
-                    'subject': subject.name,
-                    'subject_code': subject.code,
-                    'grades': []
-                }
-            subject_data[subject.id]['grades'].append(float(grade.percentage))
-        
-        # Calculate statistics
-        comparison = []
-        for subject_id, data in subject_data.items():
-            grades_list = data['grades']
-            comparison.append({
-                'subject': data['subject'],
-                'subject_code': data['subject_code'],
-                'average': round(sum(grades_list) / len(grades_list), 2),
-                'highest': round(max(grades_list), 2),
-                'lowest': round(min(grades_list), 2),
-                'count': len(grades_list),
-                'consistency': self._calculate_consistency(grades_list)
-            })
+        comparison = [
+            {
+                'subject': subject.name,
+                'subject_code': subject.code,
+                'average': round(subject.mean, 2),
+                'highest': round(subject.highest, 2),
+                'lowest': round(subject.lowest, 2),
+                'count': subject.count,
+                'consistency': self._calculate_consistency(subject.count, subject.std_dev)
+            }
+            for subject in self.summary['subjects']
+        ]
         
         # Sort by average descending
         comparison.sort(key=lambda x: x['average'], reverse=True)
@@ -142,9 +265,9 @@ class StudentPerformanceAnalytics:
     
     def _get_attendance_correlation(self):
         """Analyze correlation between attendance and grades"""
-        # Get attendance stats
-        attendance = Attendance.objects.filter(student=self.student)
-        total_attendance = attendance.count()
+        # Attendance totals from the monthly buckets
+        attendance = self.summary['attendance'].values()
+        total_attendance = sum(total for total, _ in attendance)
         
         if total_attendance == 0:
             return {
@@ -154,16 +277,12 @@ class StudentPerformanceAnalytics:
                 'insight': 'No attendance data available'
             }
         
-        present = attendance.filter(status='present').count()
+        present = sum(present for _, present in attendance)
         attendance_rate = (present / total_attendance) * 100
         
-        # Get grade average
-        grades = Grade.objects.filter(
-            student=self.student,
-            is_absent=False
-        )
+        grade_avg = self.summary['mean']
         
-        if not grades.exists():
+        if grade_avg is None:
             return {
                 'correlation': 'insufficient_data',
                 'attendance_rate': round(attendance_rate, 2),
@@ -171,8 +290,6 @@ class StudentPerformanceAnalytics:
                 'insight': 'No grade data available'
             }
         
-        grade_avg = grades.aggregate(avg=Avg('percentage'))['avg']
-        
         # Simple correlation insight
         if attendance_rate >= 90 and grade_avg >= 80:
             correlation = 'strong_positive'
@@ -197,82 +314,34 @@ class StudentPerformanceAnalytics:
     
     def _get_monthly_attendance_grades(self):
         """Get monthly attendance and grade data for correlation chart"""
-        grades = Grade.objects.filter(
-            student=self.student,
-            is_absent=False
-        ).select_related('assessment')
-        
-        attendance = Attendance.objects.filter(student=self.student)
-        
-        # Group by month
-        monthly = {}
+        grades = self.summary['months']
+        attendance = self.summary['attendance']
         
-        for grade in grades:
-            month = grade.assessment.date.strftime('%Y-%m')
-            if month not in monthly:
-                monthly[month] = {'grades': [], 'attendance': []}
-            monthly[month]['grades'].append(float(grade.percentage))
-        
-        for att in attendance:
-            month = att.date.strftime('%Y-%m')
-            if month not in monthly:
-                monthly[month] = {'grades': [], 'attendance': []}
-            monthly[month]['attendance'].append(1 if att.status == 'present' else 0)
-        
-        # Calculate averages
         result = []
-        for month in sorted(monthly.keys()):
-            data = monthly[month]
+        for month in sorted(grades.keys() | attendance.keys()):
+            month_sum, month_count = grades.get(month, (0.0, 0))
+            total, present = attendance.get(month, (0, 0))
             result.append({
-                'month': month,
-                'grade_avg': round(sum(data['grades']) / len(data['grades']), 2) if data['grades'] else 0,
-                'attendance_rate': round((sum(data['attendance']) / len(data['attendance']) * 100), 2) if data['attendance'] else 0
+                'month': _month_label(month),
+                'grade_avg': round(month_sum / month_count, 2) if month_count else 0,
+                'attendance_rate': round((present / total * 100), 2) if total else 0
             })
         
         return result
     
     def _predict_final_grades(self):
         """Predict final grades based on current performance"""
-        grades = Grade.objects.filter(
-            student=self.student,
-            is_absent=False
-        ).select_related('assessment__subject')
-        
-        if not grades.exists():
-            return []
-        
-        # Group by subject
-        subject_predictions = {}
-        for grade in grades:
-            subject = grade.assessment.subject
-            if subject.id not in subject_predictions:
-                subject_predictions[subject.id] = {
-                    'subject': subject.name,
-                    'grades': [],
-                    'weightages': []
-                }
-            subject_predictions[subject.id]['grades'].append(float(grade.percentage))
-            subject_predictions[subject.id]['weightages'].append(
-                float(grade.assessment.weightage)
-            )
-        
-        # Calculate predictions
         predictions = []
-        for subject_id, data in subject_predictions.items():
-            grades_list = data['grades']
-            weightages = data['weightages']
-            
+        for subject in self.summary['subjects']:
             # Weighted average
-            if sum(weightages) > 0:
-                weighted_avg = sum(
-                    g * w for g, w in zip(grades_list, weightages)
-                ) / sum(weightages)
+            if subject.weight_total > 0:
+                weighted_avg = subject.weighted_sum / subject.weight_total
             else:
-                weighted_avg = sum(grades_list) / len(grades_list)
+                weighted_avg = subject.mean
             
-            # Trend adjustment
-            if len(grades_list) >= 3:
-                recent_trend = sum(grades_list[-3:]) / 3
+            # Trend adjustment from the three most recent assessments
+            if subject.count >= 3:
+                recent_trend = sum(subject.recent) / 3
                 adjustment = (recent_trend - weighted_avg) * 0.3
                 predicted = weighted_avg + adjustment
             else:
@@ -283,10 +352,10 @@ class StudentPerformanceAnalytics:
             
             # Determine grade letter
             predicted_letter = self._get_grade_letter(predicted)
-            confidence = self._calculate_prediction_confidence(len(grades_list))
+            confidence = self._calculate_prediction_confidence(subject.count)
             
             predictions.append({
-                'subject': data['subject'],
+                'subject': subject.name,
                 'current_average': round(weighted_avg, 2),
                 'predicted_final': round(predicted, 2),
                 'predicted_grade': predicted_letter,
@@ -407,12 +476,9 @@ class StudentPerformanceAnalytics:
     
     def _get_overall_metrics(self):
         """Calculate overall performance metrics"""
-        grades = Grade.objects.filter(
-            student=self.student,
-            is_absent=False
-        )
+        summary = self.summary
         
-        if not grades.exists():
+        if not summary['count']:
             return {
                 'total_assessments': 0,
                 'average_score': 0,
@@ -422,12 +488,12 @@ class StudentPerformanceAnalytics:
                 'rank_percentile': 0
             }
         
-        stats = grades.aggregate(
-            avg=Avg('percentage'),
-            max=Max('percentage'),
-            min=Min('percentage'),
-            count=Count('id')
-        )
+        stats = {
+            'avg': summary['mean'],
+            'max': summary['highest'],
+            'min': summary['lowest'],
+            'count': summary['count'],
+        }
         
         # Calculate GPA (simple 4.0 scale)
         avg_pct = float(stats['avg'])
@@ -453,16 +519,11 @@ class StudentPerformanceAnalytics:
             'rank_percentile': self._calculate_rank_percentile()
         }
     
-    def _calculate_consistency(self, grades_list):
-        """Calculate consistency of grades"""
-        if len(grades_list) < 3:
+    def _calculate_consistency(self, count, std_dev):
+        """Calculate consistency of grades from their population standard deviation"""
+        if count < 3:
             return 'insufficient_data'
         
-        # Calculate standard deviation
-        mean = sum(grades_list) / len(grades_list)
-        variance = sum((x - mean) ** 2 for x in grades_list) / len(grades_list)
-        std_dev = variance ** 0.5
-        
         if std_dev < 5:
             return 'very_consistent'
         elif std_dev < 10:
@@ -474,12 +535,7 @@ class StudentPerformanceAnalytics:
     
     def _get_grade_letter(self, percentage):
         """Get grade letter from percentage"""
-        grade_config = GradeConfig.objects.filter(
-            min_percentage__lte=percentage,
-            max_percentage__gte=percentage
-        ).first()
-        
-        return grade_config.grade_letter if grade_config else 'N/A'
+        return get_grading_scale().letter_for(percentage, default='N/A')
     
     def _calculate_prediction_confidence(self, sample_size):
         """Calculate confidence level for predictions"""
@@ -491,30 +547,164 @@ class StudentPerformanceAnalytics:
             return 'low'
     
     def _calculate_rank_percentile(self):
-        """Calculate student's rank percentile"""
-        # Get all students' averages
-        all_students = Grade.objects.filter(
-            is_absent=False
-        ).values('student').annotate(
-            avg=Avg('percentage')
-        ).order_by('-avg')
-        
-        # Find this student's position
-        student_avg = Grade.objects.filter(
-            student=self.student,
-            is_absent=False
-        ).aggregate(avg=Avg('percentage'))['avg']
-        
-        if not student_avg:
-            return 0
+        """Calculate student's rank percentile from the maintained averages"""
+        if self._rank_percentile is not None:
+            return self._rank_percentile
+        return StudentAverage.objects.percentile_for(self.student_id) or 0
+
+
+class BatchPerformanceAnalytics:
+    """
+    Comprehensive analytics for many students at once.
+    
+    The students, their graded results, their monthly attendance and the
+    rank percentiles are each loaded in one query, whatever the number of
+    students; the per-student metrics are then computed from memory with
+    ``StudentPerformanceAnalytics``, one student at a time.
+    """
+    
+    def __init__(self, students):
+        self.students = students
+        self._data = None
+    
+    def load(self):
+        """Fetch the students and their data, once; later calls reuse it."""
+        if self._data is None:
+            self._data = self._load()
+        return self._data
+    
+    def _load(self):
+        students = list(self.students)
+        student_ids = [student.id for student in students]
+        columns = {student_id: _GradeColumns() for student_id in student_ids}
         
-        rank = 1
-        for idx, s in enumerate(all_students, 1):
-            if s['avg'] < student_avg:
-                rank = idx
-                break
+        rows = _graded(Grade.objects.filter(student_id__in=student_ids)).values_list(
+            'student_id', *GRADE_COLUMNS
+        )
+        for student_id, *row in rows:
+            columns[student_id].add_grade(*row)
         
-        total = len(all_students)
-        percentile = ((total - rank + 1) / total * 100) if total > 0 else 0
+        for student_id, *row in AttendanceRollup.objects.filter(
+            student_id__in=student_ids,
+            period=AttendanceRollup.MONTH
+        ).values_list('student_id', *ATTENDANCE_COLUMNS):
+            columns[student_id].add_attendance(*row)
         
-        return round(percentile, 2)
\ No newline at end of file
+        percentiles = StudentAverage.objects.percentiles_for(student_ids)
+        return students, columns, percentiles
+    
+    def iter_analytics(self):
+        """
+        Yield each student's comprehensive analytics, in the students' order.
+        
+        The data is fetched by ``load()`` (when iteration starts, unless it
+        was called before); the analytics themselves are computed lazily so
+        a streaming response can send each student as soon as it is ready.
+        """
+        students, columns, percentiles = self.load()
+        for student in students:
+            yield StudentPerformanceAnalytics(
+                student.id,
+                student=student,
+                columns=columns[student.id],
+                rank_percentile=percentiles.get(student.id, 0),
+            ).compute_analytics()
+
+
+class ClassPerformanceAnalytics(BatchPerformanceAnalytics):
+    """Comprehensive analytics for every student enrolled in a class, in name order."""
+    
+    def __init__(self, class_obj):
+        self.class_obj = class_obj
+        super().__init__(
+            class_obj.students.filter(role=User.STUDENT).order_by('last_name', 'first_name', 'id')
+        )
+
+
+# Shared counters, so the ratio covers every worker
+CACHE_HITS_KEY = 'student_analytics:hits'
+CACHE_MISSES_KEY = 'student_analytics:misses'
+
+WARM_BATCH_SIZE = 200
+
+
+def _account_token(student):
+    """Changes whenever the account details shown in ``student_info`` do."""
+    details = '\0'.join((student.first_name, student.last_name, student.email, student.username))
+    return f'{zlib.crc32(details.encode()):08x}'
+
+
+def analytics_version(students):
+    """
+    Map each student's id to the version their cached analytics must
+    carry: the student's own data version, the grading scale version and
+    a token of their account details.
+    """
+    scale_version = get_grading_scale().version
+    tokens = {student.id: _account_token(student) for student in students}
+    return {
+        student_id: f'{version}:{scale_version}:{tokens[student_id]}'
+        for student_id, version in get_student_versions(list(tokens)).items()
+    }
+
+
+def record_cache_access(hit):
+    key = CACHE_HITS_KEY if hit else CACHE_MISSES_KEY
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass  # Evicted between add and incr; losing one count is fine
+
+
+def cache_stats():
+    """
+    Hits, misses and hit ratio of reads of the comprehensive analytics.
+    Stale results served while another worker recomputes count as hits.
+    The counters cover every process only when the cache is shared.
+    """
+    counts = cache.get_many([CACHE_HITS_KEY, CACHE_MISSES_KEY])
+    hits = counts.get(CACHE_HITS_KEY, 0)
+    misses = counts.get(CACHE_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
+
+
+def reset_cache_stats():
+    cache.delete_many([CACHE_HITS_KEY, CACHE_MISSES_KEY])
+
+
+def warm_analytics_cache(students=None, batch_size=WARM_BATCH_SIZE):
+    """
+    Precompute the comprehensive analytics of every student whose cached
+    entry is missing or older than their current version.
+    
+    ``students`` defaults to all active student accounts. Stale students
+    are computed ``batch_size`` at a time with ``BatchPerformanceAnalytics``.
+    Returns ``(checked, warmed)`` counts.
+    """
+    if students is None:
+        students = User.objects.filter(role=User.STUDENT, is_active=True).order_by('id')
+    students = list(students)
+    versions = analytics_version(students)
+    keys = {
+        student.id: StudentPerformanceAnalytics(student.id, student=student).get_cache_key('comprehensive')
+        for student in students
+    }
+    entries = cache.get_many(list(keys.values()))
+    
+    stale = [
+        student for student in students
+        if not is_fresh(entries.get(keys[student.id]), versions[student.id])
+    ]
+    for start in range(0, len(stale), batch_size):
+        batch = stale[start:start + batch_size]
+        cache.set_many({
+            keys[student.id]: cache_entry(data, versions[student.id])
+            for student, data in zip(batch, BatchPerformanceAnalytics(batch).iter_analytics())
+        }, None)
+    return len(students), len(stale)
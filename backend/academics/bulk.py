@@ -0,0 +1,532 @@
+# backend/academics/bulk.py
+from django.db import transaction
+from django.utils import timezone
+from .models import Assessment, Attendance, Class, Grade, StudentAverage, User
+from .grading import get_grading_scale
+from .caching import bump_data_versions_on_commit
+from .serializers import (
+    BulkGradeRowSerializer, BulkGradeUpdateRowSerializer,
+    BulkAttendanceRowSerializer, BulkAttendanceUpdateRowSerializer,
+)
+
+
+BULK_BATCH_SIZE = 500
+
+# How bulk inserts treat rows that already exist
+ON_CONFLICT_ERROR = 'error'    # reject the whole batch
+ON_CONFLICT_SKIP = 'skip'      # keep the stored row
+ON_CONFLICT_UPDATE = 'update'  # overwrite the stored row
+ON_CONFLICT_CHOICES = (ON_CONFLICT_ERROR, ON_CONFLICT_SKIP, ON_CONFLICT_UPDATE)
+
+
+def calculate_grade(grade, scale):
+    """Fill in percentage and grade letter in memory, mirroring Grade.save()."""
+    if grade.marks_obtained is not None and not grade.is_absent:
+        grade.percentage = (grade.marks_obtained / grade.assessment.total_marks) * 100
+        grade_letter = scale.letter_for(grade.percentage)
+        if grade_letter:
+            grade.grade_letter = grade_letter
+    return grade
+
+
+def _does_not_exist(pk):
+    return [f'Invalid pk "{pk}" - object does not exist.']
+
+
+def bump_for_assessments(assessments):
+    """Bump the data versions of the assessments' classes and subjects."""
+    bump_data_versions_on_commit(
+        class_ids={assessment.class_assigned_id for assessment in assessments},
+        subject_ids={assessment.subject_id for assessment in assessments},
+    )
+
+
+def bulk_upsert(queryset, objs, on_conflict, unique_fields, update_fields):
+    """
+    Insert objs in batches, resolving unique conflicts in the database.
+
+    ``skip`` issues ``ON CONFLICT DO NOTHING`` and ``update`` issues
+    ``ON CONFLICT (...) DO UPDATE`` on unique_fields, so no per-row
+    existence checks are needed. With ``skip`` the database does not
+    report ids, so the stored rows are read back through queryset in one
+    query.
+    """
+    options = {}
+    if on_conflict == ON_CONFLICT_SKIP:
+        options['ignore_conflicts'] = True
+    elif on_conflict == ON_CONFLICT_UPDATE:
+        options.update(update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields)
+
+    with transaction.atomic():
+        objs = queryset.bulk_create(objs, batch_size=BULK_BATCH_SIZE, **options)
+    if on_conflict != ON_CONFLICT_SKIP:
+        return objs
+
+    attnames = [queryset.model._meta.get_field(name).attname for name in unique_fields]
+
+    def key(obj):
+        return tuple(getattr(obj, attname) for attname in attnames)
+
+    wanted = {key(obj) for obj in objs}
+    lookup = {f'{attname}__in': {k[i] for k in wanted} for i, attname in enumerate(attnames)}
+    stored = {key(obj): obj for obj in queryset.filter(**lookup) if key(obj) in wanted}
+    return [stored[k] for k in dict.fromkeys(key(obj) for obj in objs) if k in stored]
+
+
+class BulkGradeCreate:
+    """
+    Validates and inserts a batch of grades with a fixed number of queries.
+
+    Assessments, students, existing (assessment, student) pairs and the
+    grading scale are loaded once for the whole batch; percentages and
+    grade letters are computed in memory and rows are written with
+    ``bulk_create``.
+
+    ``on_conflict`` decides what happens to rows whose (assessment,
+    student) pair already exists: ``error`` rejects the batch, ``skip``
+    keeps the stored grade and ``update`` overwrites it, both resolved by
+    the database with an upsert.
+
+    Usage:
+        pipeline = BulkGradeCreate(rows, graded_by=request.user)
+        if pipeline.is_valid():
+            grades = pipeline.save()
+        else:
+            pipeline.errors  # one dict per row, empty for valid rows
+    """
+
+    UNIQUE_FIELDS = ['assessment', 'student']
+    UPDATE_FIELDS = [
+        'marks_obtained', 'is_absent', 'remarks', 'percentage',
+        'grade_letter', 'graded_by', 'graded_at',
+    ]
+
+    def __init__(self, rows, graded_by, on_conflict=ON_CONFLICT_ERROR):
+        self.rows = rows
+        self.graded_by = graded_by
+        self.on_conflict = on_conflict
+        self.errors = []
+        self.grades = []
+
+    def is_valid(self):
+        serializer = BulkGradeRowSerializer(data=self.rows, many=True)
+        if not serializer.is_valid():
+            self.errors = serializer.errors
+            return False
+        rows = serializer.validated_data
+
+        assessments = Assessment.objects.select_related('subject', 'class_assigned').in_bulk(
+            {row['assessment'] for row in rows}
+        )
+        students = User.objects.in_bulk({row['student'] for row in rows})
+        existing = set()
+        if self.on_conflict == ON_CONFLICT_ERROR:
+            existing = set(
+                Grade.objects.filter(
+                    assessment_id__in=assessments.keys(),
+                    student_id__in=students.keys()
+                ).values_list('assessment_id', 'student_id')
+            )
+        scale = get_grading_scale()
+
+        self.errors = []
+        grades = {}
+        for row in rows:
+            errors = self._validate_row(row, assessments, students, existing, grades)
+            self.errors.append(errors)
+            if errors:
+                continue
+            pair = (row['assessment'], row['student'])
+            if pair in grades and self.on_conflict == ON_CONFLICT_SKIP:
+                continue
+            # A repeated pair replaces the earlier row, as a later upsert would
+            grades[pair] = calculate_grade(Grade(
+                assessment=assessments[row['assessment']],
+                student=students[row['student']],
+                marks_obtained=row.get('marks_obtained'),
+                is_absent=row['is_absent'],
+                remarks=row['remarks'],
+                graded_by=self.graded_by,
+            ), scale)
+
+        self.grades = list(grades.values())
+        return not any(self.errors)
+
+    def _validate_row(self, row, assessments, students, existing, seen):
+        """Same rules as GradeSerializer.validate, against the preloaded data."""
+        assessment = assessments.get(row['assessment'])
+        student = students.get(row['student'])
+        if assessment is None:
+            return {'assessment': _does_not_exist(row['assessment'])}
+        if student is None:
+            return {'student': _does_not_exist(row['student'])}
+
+        marks_obtained = row.get('marks_obtained')
+        if not row['is_absent'] and marks_obtained is None:
+            return {'marks_obtained': ['Marks required if student is not absent.']}
+        if marks_obtained and marks_obtained > assessment.total_marks:
+            return {'marks_obtained': [f'Marks cannot exceed total marks ({assessment.total_marks}).']}
+        if marks_obtained and marks_obtained < 0:
+            return {'marks_obtained': ['Marks cannot be negative.']}
+
+        pair = (assessment.id, student.id)
+        if self.on_conflict == ON_CONFLICT_ERROR and (pair in existing or pair in seen):
+            return {'non_field_errors': ['Grade already exists for this student and assessment.']}
+        return {}
+
+    def save(self):
+        grades = bulk_upsert(
+            Grade.objects.select_related('assessment__subject', 'student', 'graded_by'),
+            self.grades, self.on_conflict, self.UNIQUE_FIELDS, self.UPDATE_FIELDS
+        )
+        # bulk_create sends no signals, so update derived data here
+        bump_for_assessments({grade.assessment for grade in self.grades})
+        StudentAverage.objects.refresh_on_commit({grade.student_id for grade in self.grades})
+        return grades
+
+
+class BulkGradeUpdate:
+    """
+    Applies partial updates to many grades with a fixed number of queries.
+
+    Target grades, any newly referenced assessments/students and the
+    (assessment, student) pairs they could collide with are loaded once.
+    Each row is validated against the merged (stored + submitted) values,
+    percentage and grade letter are recalculated in memory, and valid rows
+    are persisted with chunked ``bulk_update`` calls. Invalid rows are
+    reported and skipped, as with the per-row endpoint.
+    """
+
+    SAVED_FIELDS = [
+        'assessment', 'student', 'marks_obtained', 'is_absent', 'remarks',
+        'percentage', 'grade_letter', 'graded_at',
+    ]
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.errors = []
+        self.updated = []
+
+    def run(self):
+        """Validate and persist. Returns the list of updated Grade instances."""
+        self.errors = []
+        candidates = []
+        for row in self.rows:
+            if not isinstance(row, dict) or not row.get('id'):
+                self.errors.append({'data': row, 'error': 'Missing id'})
+                continue
+            serializer = BulkGradeUpdateRowSerializer(data=row, partial=True)
+            if not serializer.is_valid():
+                self.errors.append({'id': row.get('id'), 'errors': serializer.errors})
+                continue
+            candidates.append(serializer.validated_data)
+
+        grades = Grade.objects.select_related(
+            'assessment', 'assessment__subject', 'student', 'graded_by'
+        ).in_bulk({row['id'] for row in candidates})
+        assessments = Assessment.objects.select_related('subject').in_bulk(
+            {row['assessment'] for row in candidates if 'assessment' in row}
+        )
+        students = User.objects.in_bulk(
+            {row['student'] for row in candidates if 'student' in row}
+        )
+
+        # (assessment, student) -> grade id, for every pair a row could move to
+        assessment_ids = {g.assessment_id for g in grades.values()} | set(assessments)
+        student_ids = {g.student_id for g in grades.values()} | set(students)
+        pairs = {
+            (assessment_id, student_id): grade_id
+            for grade_id, assessment_id, student_id in Grade.objects.filter(
+                assessment_id__in=assessment_ids, student_id__in=student_ids
+            ).values_list('id', 'assessment_id', 'student_id')
+        }
+
+        scale = get_grading_scale()
+        now = timezone.now()
+        touched = {grade.assessment for grade in grades.values()} | set(assessments.values())
+        touched_students = {grade.student_id for grade in grades.values()} | set(students)
+        changed = {}
+        for row in candidates:
+            grade = grades.get(row['id'])
+            if grade is None:
+                self.errors.append({'id': row['id'], 'error': 'Grade not found'})
+                continue
+            errors = self._apply(grade, row, assessments, students, pairs)
+            if errors:
+                self.errors.append({'id': row['id'], 'errors': errors})
+                continue
+            grade.graded_at = now
+            calculate_grade(grade, scale)
+            changed[grade.id] = grade
+
+        self.updated = list(changed.values())
+        if self.updated:
+            with transaction.atomic():
+                Grade.objects.bulk_update(
+                    self.updated, self.SAVED_FIELDS, batch_size=BULK_BATCH_SIZE
+                )
+            # bulk_update sends no signals; both old and new scopes are stale
+            bump_for_assessments(touched)
+            StudentAverage.objects.refresh_on_commit(touched_students)
+        return self.updated
+
+    def _apply(self, grade, row, assessments, students, pairs):
+        """Validate the merged values and apply them to grade; returns errors."""
+        assessment = grade.assessment
+        if 'assessment' in row:
+            assessment = assessments.get(row['assessment'])
+            if assessment is None:
+                return {'assessment': _does_not_exist(row['assessment'])}
+        student = grade.student
+        if 'student' in row:
+            student = students.get(row['student'])
+            if student is None:
+                return {'student': _does_not_exist(row['student'])}
+
+        is_absent = row.get('is_absent', grade.is_absent)
+        marks_obtained = row.get('marks_obtained', grade.marks_obtained)
+        if not is_absent and marks_obtained is None:
+            return {'marks_obtained': ['Marks required if student is not absent.']}
+        if marks_obtained and marks_obtained > assessment.total_marks:
+            return {'marks_obtained': [f'Marks cannot exceed total marks ({assessment.total_marks}).']}
+        if marks_obtained and marks_obtained < 0:
+            return {'marks_obtained': ['Marks cannot be negative.']}
+
+        pair = (assessment.id, student.id)
+        if pairs.get(pair, grade.id) != grade.id:
+            return {'non_field_errors': ['Grade already exists for this student and assessment.']}
+
+        pairs.pop((grade.assessment_id, grade.student_id), None)
+        pairs[pair] = grade.id
+        grade.assessment = assessment
+        grade.student = student
+        grade.is_absent = is_absent
+        grade.marks_obtained = marks_obtained
+        grade.remarks = row.get('remarks', grade.remarks)
+        return {}
+
+
+class BulkAttendanceCreate:
+    """
+    Validates and inserts a batch of attendance records.
+
+    Students and classes are resolved once for the whole batch and rows
+    are written with ``bulk_create``. Existing (student, class, date)
+    records are handled per ``on_conflict`` like BulkGradeCreate; only the
+    ``error`` mode looks them up, with one query for the batch.
+    """
+
+    UNIQUE_FIELDS = ['student', 'class_assigned', 'date']
+    UPDATE_FIELDS = ['status', 'recorded_by', 'notes']
+
+    def __init__(self, rows, recorded_by, on_conflict=ON_CONFLICT_ERROR):
+        self.rows = rows
+        self.recorded_by = recorded_by
+        self.on_conflict = on_conflict
+        self.errors = []
+        self.records = []
+
+    def is_valid(self):
+        serializer = BulkAttendanceRowSerializer(data=self.rows, many=True)
+        if not serializer.is_valid():
+            self.errors = serializer.errors
+            return False
+        rows = serializer.validated_data
+
+        students = User.objects.in_bulk({row['student'] for row in rows})
+        classes = Class.objects.in_bulk({row['class_assigned'] for row in rows})
+        existing = set()
+        if self.on_conflict == ON_CONFLICT_ERROR:
+            existing = set(
+                Attendance.objects.filter(
+                    student_id__in=students.keys(),
+                    class_assigned_id__in=classes.keys(),
+                    date__in={row['date'] for row in rows},
+                ).values_list(*Attendance.ROLLUP_FIELDS)
+            )
+
+        self.errors = []
+        records = {}
+        for row in rows:
+            key = (row['student'], row['class_assigned'], row['date'])
+            if row['student'] not in students:
+                errors = {'student': _does_not_exist(row['student'])}
+            elif row['class_assigned'] not in classes:
+                errors = {'class_assigned': _does_not_exist(row['class_assigned'])}
+            elif self.on_conflict == ON_CONFLICT_ERROR and (key in existing or key in records):
+                errors = {"non_field_errors": ["Attendance for this student on this date already exists."]}
+            else:
+                errors = {}
+            self.errors.append(errors)
+            if errors or (key in records and self.on_conflict == ON_CONFLICT_SKIP):
+                continue
+            records[key] = Attendance(
+                student=students[row['student']],
+                class_assigned=classes[row['class_assigned']],
+                date=row['date'],
+                status=row['status'],
+                notes=row['notes'],
+                recorded_by=self.recorded_by,
+            )
+
+        self.records = list(records.values())
+        return not any(self.errors)
+
+    def save(self):
+        return bulk_upsert(
+            Attendance.objects.select_related('student', 'class_assigned', 'recorded_by'),
+            self.records, self.on_conflict, self.UNIQUE_FIELDS, self.UPDATE_FIELDS
+        )
+
+
+class BulkAttendanceUpdate:
+    """
+    Applies partial updates to many attendance records in one batch.
+
+    Records are loaded with a single query, duplicates are checked against
+    an in-memory (student, class, date) index instead of a query per row,
+    and valid rows are written with chunked ``bulk_update`` calls (which
+    also refresh the attendance rollups once for the batch).
+    """
+
+    SAVED_FIELDS = ['student', 'class_assigned', 'date', 'status', 'recorded_by', 'notes']
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.errors = []
+        self.updated = []
+
+    def run(self):
+        """Validate and persist. Returns the list of updated Attendance instances."""
+        self.errors = []
+        candidates = []
+        for row in self.rows:
+            if not isinstance(row, dict) or not row.get('id'):
+                self.errors.append({"record": row, "error": "Missing 'id' field"})
+                continue
+            serializer = BulkAttendanceUpdateRowSerializer(data=row, partial=True)
+            if not serializer.is_valid():
+                self.errors.append({"record_id": row.get('id'), "errors": serializer.errors})
+                continue
+            candidates.append(serializer.validated_data)
+
+        records = Attendance.objects.select_related(
+            'student', 'class_assigned', 'recorded_by'
+        ).in_bulk({row['id'] for row in candidates})
+        users = User.objects.in_bulk(
+            {row['student'] for row in candidates if 'student' in row}
+            | {row['recorded_by'] for row in candidates if row.get('recorded_by')}
+        )
+        classes = Class.objects.in_bulk(
+            {row['class_assigned'] for row in candidates if 'class_assigned' in row}
+        )
+
+        # (student, class, date) -> record id, for every key a row could move to
+        student_ids = {r.student_id for r in records.values()} | set(users)
+        class_ids = {r.class_assigned_id for r in records.values()} | set(classes)
+        dates = {r.date for r in records.values()} | {row['date'] for row in candidates if 'date' in row}
+        index = {
+            key[1:]: key[0]
+            for key in Attendance.objects.filter(
+                student_id__in=student_ids, class_assigned_id__in=class_ids, date__in=dates
+            ).values_list('id', 'student_id', 'class_assigned_id', 'date')
+        }
+
+        changed = {}
+        for row in candidates:
+            record = records.get(row['id'])
+            if record is None:
+                self.errors.append({"record_id": row['id'], "error": "Attendance record not found"})
+                continue
+            errors = self._apply(record, row, users, classes, index)
+            if errors:
+                self.errors.append({"record_id": row['id'], "errors": errors})
+                continue
+            changed[record.id] = record
+
+        self.updated = list(changed.values())
+        if self.updated:
+            with transaction.atomic():
+                Attendance.objects.bulk_update(
+                    self.updated, self.SAVED_FIELDS, batch_size=BULK_BATCH_SIZE
+                )
+        return self.updated
+
+    def _apply(self, record, row, users, classes, index):
+        """Validate the merged values and apply them to record; returns errors."""
+        student = record.student
+        if 'student' in row:
+            student = users.get(row['student'])
+            if student is None:
+                return {'student': _does_not_exist(row['student'])}
+        class_assigned = record.class_assigned
+        if 'class_assigned' in row:
+            class_assigned = classes.get(row['class_assigned'])
+            if class_assigned is None:
+                return {'class_assigned': _does_not_exist(row['class_assigned'])}
+        recorded_by = record.recorded_by
+        if 'recorded_by' in row:
+            recorded_by = users.get(row['recorded_by']) if row['recorded_by'] else None
+            if row['recorded_by'] and recorded_by is None:
+                return {'recorded_by': _does_not_exist(row['recorded_by'])}
+
+        key = (student.id, class_assigned.id, row.get('date', record.date))
+        if index.get(key, record.id) != record.id:
+            return {"non_field_errors": ["Attendance for this student on this date already exists."]}
+
+        index.pop(record.rollup_key(), None)
+        index[key] = record.id
+        record.student = student
+        record.class_assigned = class_assigned
+        record.date = key[2]
+        record.status = row.get('status', record.status)
+        record.recorded_by = recorded_by
+        record.notes = row.get('notes', record.notes)
+        return {}
+
+
+class RollCall:
+    """
+    Marks a whole class for one date with a single upsert.
+
+    The class roster is expanded server-side: every student gets the
+    default status unless listed in ``exceptions``. Rows are written with
+    one ``INSERT ... ON CONFLICT (student, class_assigned, date) DO UPDATE``
+    so re-submitting a roll call simply overwrites it.
+    """
+
+    UPDATE_FIELDS = ['status', 'recorded_by', 'notes']
+
+    def __init__(self, class_obj, date, status, exceptions, recorded_by):
+        self.class_obj = class_obj
+        self.date = date
+        self.status = status
+        self.exceptions = {row['student']: row for row in exceptions}
+        self.recorded_by = recorded_by
+
+    def unknown_students(self, student_ids):
+        """Exception student ids that are not enrolled in the class."""
+        return sorted(set(self.exceptions) - set(student_ids))
+
+    def save(self, student_ids):
+        """Upsert one record per student and return per-status counts."""
+        counts = {value: 0 for value, _ in Attendance.STATUS_CHOICES}
+        records = []
+        for student_id in student_ids:
+            exception = self.exceptions.get(student_id, {})
+            record = Attendance(
+                student_id=student_id,
+                class_assigned=self.class_obj,
+                date=self.date,
+                status=exception.get('status', self.status),
+                notes=exception.get('notes', ''),
+                recorded_by=self.recorded_by,
+            )
+            counts[record.status] += 1
+            records.append(record)
+
+        bulk_upsert(
+            Attendance.objects, records, ON_CONFLICT_UPDATE,
+            BulkAttendanceCreate.UNIQUE_FIELDS, self.UPDATE_FIELDS
+        )
+        return counts
@@ -0,0 +1,213 @@
+# backend/academics/caching.py
+import functools
+import hashlib
+import json
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+# Results cached against data versions never go stale (provided every
+# process shares the cache, see cache_is_shared), so this only bounds how
+# long unused entries stay around.
+RESULT_CACHE_TIMEOUT = 60 * 60
+
+GLOBAL_VERSION_KEY = 'data_version:all'
+
+# Backends whose entries are private to one process (or never stored)
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def cache_is_shared(alias='default'):
+    """
+    Whether every process (web workers, report workers, management
+    commands) sees the same cache. The version tokens in this module and
+    the grading scale version are only seen across processes when it is.
+    """
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def _version_keys(class_ids=(), subject_ids=(), include_global=False):
+    keys = [f'data_version:class:{pk}' for pk in sorted(set(class_ids))]
+    keys += [f'data_version:subject:{pk}' for pk in sorted(set(subject_ids))]
+    if include_global:
+        keys.append(GLOBAL_VERSION_KEY)
+    return keys
+
+
+def _get_tokens(keys):
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        # First reader of a scope (or an evicted key) picks a fresh token
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, None)
+        versions.update(cache.get_many(missing))
+    return versions
+
+
+def get_data_versions(class_ids=(), subject_ids=(), include_global=False):
+    """
+    Return one token combining the current data versions of the given
+    classes and subjects (and the global version), in a single cache read.
+
+    A version changes whenever grades or assessments in its scope change,
+    so the token can be part of a result cache key. Bumps are only seen by
+    processes sharing the cache; with a process-local backend other
+    workers keep their old tokens (the academics.E001 deploy check).
+    """
+    keys = _version_keys(class_ids, subject_ids, include_global)
+    versions = _get_tokens(keys)
+    return hashlib.md5(':'.join(versions[key] for key in keys).encode()).hexdigest()
+
+
+def bump_data_versions(class_ids=(), subject_ids=()):
+    """Give the classes, subjects and the global scope fresh versions."""
+    keys = _version_keys(class_ids, subject_ids, include_global=True)
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+
+def bump_data_versions_on_commit(class_ids=(), subject_ids=()):
+    """
+    Bump once the current transaction commits (immediately in autocommit),
+    so a reader cannot cache pre-commit data under the new version.
+    """
+    class_ids, subject_ids = set(class_ids), set(subject_ids)
+    transaction.on_commit(lambda: bump_data_versions(class_ids, subject_ids))
+
+
+def _student_version_key(student_id):
+    return f'data_version:student:{student_id}'
+
+
+def get_student_versions(student_ids):
+    """
+    Map each student id to the current version of their own results
+    (grades and attendance), in a single cache read.
+    """
+    keys = {student_id: _student_version_key(student_id) for student_id in student_ids}
+    versions = _get_tokens(list(keys.values()))
+    return {student_id: versions[key] for student_id, key in keys.items()}
+
+
+def bump_student_versions(student_ids):
+    """Give the students' own results fresh versions."""
+    cache.set_many({_student_version_key(pk): uuid.uuid4().hex for pk in student_ids}, None)
+
+
+def bump_student_versions_on_commit(student_ids):
+    """Bump the students' versions once the current transaction commits."""
+    student_ids = {pk for pk in student_ids if pk is not None}
+    if student_ids:
+        transaction.on_commit(lambda: bump_student_versions(student_ids))
+
+
+def result_cache_key(prefix, scope, params, versions=None):
+    """
+    Cache key for a result computed for scope with the given parameters.
+
+    Leave ``versions`` out when the entry records its own version (see
+    ``get_or_compute``), so a stale entry can still be found and served.
+    """
+    digest = hashlib.md5(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    key = f'{prefix}:{scope}:{digest}'
+    return key if versions is None else f'{key}:{versions}'
+
+
+# States reported by get_or_compute
+FRESH = 'fresh'
+STALE = 'stale'
+MISS = 'miss'
+
+# How long one worker may hold a recompute lock, and how long others
+# with nothing to serve wait for its result before computing themselves
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 1
+LOCK_POLL_INTERVAL = 0.05
+
+
+def cache_entry(data, version=None):
+    """The value get_or_compute stores: the result plus what it was computed for."""
+    return {'version': version, 'computed_at': time.time(), 'data': data}
+
+
+def is_fresh(entry, version=None, max_age=None):
+    if not entry or entry['version'] != version:
+        return False
+    return max_age is None or time.time() - entry['computed_at'] < max_age
+
+
+def get_or_compute(key, compute, version=None, max_age=None, timeout=RESULT_CACHE_TIMEOUT,
+                   lock_timeout=LOCK_TIMEOUT, serve_stale=True, wait=LOCK_WAIT):
+    """
+    Return ``(result, state)`` for a cached computation, serving stale
+    results while a single worker recomputes.
+
+    An entry is fresh while its version matches ``version`` and, when
+    ``max_age`` is given, it is younger than ``max_age`` seconds. Entries
+    stay in the cache for ``timeout`` seconds (None: until evicted), so
+    stale results remain available after they stop being fresh.
+
+    Only the worker that wins the ``<key>:lock`` lock stores its result.
+    Others serve the stale entry if there is one and ``serve_stale`` is
+    true (STALE); otherwise they re-read the cache for up to ``wait``
+    seconds, until the winner stores a fresh result or releases the
+    lock. Only if it is slow or failed do they compute the result
+    themselves, duplicating its work rather than blocking the request
+    any longer. With ``serve_stale`` false a result never predates the
+    current ``version``. State is FRESH for results read from the cache
+    and MISS for results computed by this call.
+    """
+    entry = cache.get(key)
+    if is_fresh(entry, version, max_age):
+        return entry['data'], FRESH
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, lock_timeout):
+        if serve_stale and entry is not None:
+            return entry['data'], STALE
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if is_fresh(entry, version, max_age):
+                return entry['data'], FRESH
+            if cache.get(lock_key) is None:
+                break  # The winner failed without storing a result
+        return compute(), MISS
+
+    try:
+        data = compute()
+        cache.set(key, cache_entry(data, version), timeout)
+    finally:
+        cache.delete(lock_key)
+    return data, MISS
+
+
+def stale_while_revalidate(key, version=None, max_age=None, timeout=RESULT_CACHE_TIMEOUT,
+                           serve_stale=True):
+    """
+    Decorator caching a function's result with ``get_or_compute``.
+
+    ``key`` and the optional ``version`` are called with the function's
+    arguments to build the cache key and the version the result must match.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            data, _ = get_or_compute(
+                key(*args, **kwargs),
+                lambda: func(*args, **kwargs),
+                version=version(*args, **kwargs) if version else None,
+                max_age=max_age,
+                timeout=timeout,
+                serve_stale=serve_stale,
+            )
+            return data
+        return wrapper
+    return decorator
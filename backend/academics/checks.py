@@ -0,0 +1,18 @@
+# backend/academics/checks.py
+from django.core.checks import Error, Tags, register
+from .caching import cache_is_shared
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Deployments run several processes, which must share one cache."""
+    if cache_is_shared():
+        return []
+    return [Error(
+        "CACHES['default'] is process-local. Data versions bumped by a "
+        "grade edit in one process are not seen by the others, which keep "
+        "serving cached statistics and analytics until they time out, and "
+        "grading scale changes reach them only after the local copy expires.",
+        hint="Configure a shared cache backend, e.g. set REDIS_URL.",
+        id='academics.E001',
+    )]
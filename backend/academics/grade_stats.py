@@ -0,0 +1,223 @@
+# backend/academics/grade_stats.py
+import math
+from django.db import connection
+from django.db.models import Aggregate, Avg, Count, F, FloatField, IntegerField, Max, Min, Q, Value, Window
+from django.db.models.functions import Floor, Least, RowNumber
+from .caching import get_data_versions, result_cache_key, stale_while_revalidate
+
+
+DEFAULT_PERCENTILES = (25, 75)
+MAX_HISTOGRAM_BUCKETS = 100
+
+
+class PercentileCont(Aggregate):
+    """PostgreSQL ``percentile_cont(fraction) WITHIN GROUP (ORDER BY expression)``."""
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction, **extra):
+        # fraction is interpolated into the SQL, so it must be a plain number
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def percentile_cont(sorted_values, fraction):
+    """Linear-interpolation percentile, matching PostgreSQL's percentile_cont."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower, upper = math.floor(position), math.ceil(position)
+    low, high = float(sorted_values[lower]), float(sorted_values[upper])
+    return low + (high - low) * (position - lower)
+
+
+def parse_percentiles(value):
+    """Parse ``"25,75,90"`` into a tuple of ints; raises ValueError if out of range."""
+    if not value:
+        return DEFAULT_PERCENTILES
+    percentiles = tuple(sorted({int(part) for part in value.split(',') if part.strip()}))
+    if any(p < 0 or p > 100 for p in percentiles):
+        raise ValueError('Percentiles must be between 0 and 100.')
+    return percentiles
+
+
+class AssessmentStatistics:
+    """
+    Score statistics for one assessment in two queries.
+
+    The first query aggregates counts, mean, min, max and (on PostgreSQL)
+    the median and percentiles with ``percentile_cont``. The second groups
+    graded rows by letter and, optionally, by histogram bucket. On other
+    databases the second query returns the marks themselves and the
+    percentiles are interpolated in Python the same way.
+
+    ``total_students`` is the class size, passed in by the caller so it
+    can come from the query that loaded the assessment.
+    """
+
+    def __init__(self, assessment, total_students, percentiles=DEFAULT_PERCENTILES, buckets=None):
+        self.assessment = assessment
+        self.total_students = total_students
+        self.percentiles = percentiles
+        self.buckets = buckets
+        self.use_database_percentiles = connection.vendor == 'postgresql'
+
+    def compute(self):
+        """Return the statistics dict, or None when nothing has been graded."""
+        assessment = self.assessment
+        graded = Q(is_absent=False)
+        aggregates = {
+            'recorded': Count('id'),
+            'graded': Count('id', filter=graded),
+            'absent': Count('id', filter=Q(is_absent=True)),
+            'average': Avg('marks_obtained', filter=graded),
+            'highest': Max('marks_obtained', filter=graded),
+            'lowest': Min('marks_obtained', filter=graded),
+        }
+        if assessment.passing_marks:
+            aggregates['passing'] = Count(
+                'id', filter=graded & Q(marks_obtained__gte=assessment.passing_marks)
+            )
+        if self.use_database_percentiles:
+            aggregates['median'] = PercentileCont('marks_obtained', 0.5, filter=graded)
+            for p in self.percentiles:
+                aggregates[f'p{p}'] = PercentileCont('marks_obtained', p / 100, filter=graded)
+
+        totals = assessment.grades.aggregate(**aggregates)
+        if not totals['graded']:
+            return None
+
+        distribution, histogram, marks = self._group()
+        if not self.use_database_percentiles:
+            marks.sort()
+            totals['median'] = percentile_cont(marks, 0.5)
+            for p in self.percentiles:
+                totals[f'p{p}'] = percentile_cont(marks, p / 100)
+
+        stats = {
+            'assessment_id': assessment.id,
+            'assessment_name': assessment.name,
+            'total_marks': float(assessment.total_marks),
+            'passing_marks': float(assessment.passing_marks) if assessment.passing_marks else None,
+            'total_students': self.total_students,
+            'graded_count': totals['graded'],
+            'absent_count': totals['absent'],
+            'pending_count': self.total_students - totals['recorded'],
+            'average': round(float(totals['average']), 2),
+            'highest': float(totals['highest']),
+            'lowest': float(totals['lowest']),
+            'median': round(float(totals['median']), 2),
+            'percentiles': {
+                f'p{p}': round(float(totals[f'p{p}']), 2) for p in self.percentiles
+            },
+            'passing_count': totals.get('passing'),
+            'grade_distribution': distribution,
+        }
+        if self.buckets:
+            stats['histogram'] = histogram
+        return stats
+
+    def _group(self):
+        """Grade distribution, histogram and (without database percentiles) raw marks."""
+        grades = self.assessment.grades.filter(is_absent=False)
+        fields = ['grade_letter']
+        if self.buckets:
+            # Marks equal to total_marks belong in the last bucket
+            grades = grades.annotate(bucket=Least(
+                Floor(F('marks_obtained') * self.buckets / self.assessment.total_marks),
+                Value(self.buckets - 1),
+                output_field=IntegerField(),
+            ))
+            fields.append('bucket')
+
+        if self.use_database_percentiles:
+            rows = grades.values(*fields).annotate(count=Count('id')).order_by()
+            marks = None
+        else:
+            rows = [dict(row, count=1) for row in grades.values(*fields, 'marks_obtained')]
+            marks = [row['marks_obtained'] for row in rows]
+
+        letters = {}
+        bucket_counts = [0] * (self.buckets or 0)
+        for row in rows:
+            letters[row['grade_letter']] = letters.get(row['grade_letter'], 0) + row['count']
+            if self.buckets:
+                bucket_counts[int(row['bucket'])] += row['count']
+
+        distribution = dict(sorted(letters.items(), key=lambda item: -item[1]))
+        width = 100 / self.buckets if self.buckets else 0
+        histogram = [
+            {
+                'start': round(index * width, 2),
+                'end': round((index + 1) * width, 2),
+                'count': count,
+            }
+            for index, count in enumerate(bucket_counts)
+        ]
+        return distribution, histogram, marks
+
+
+@stale_while_revalidate(
+    key=lambda assessment, total_students, percentiles=DEFAULT_PERCENTILES, buckets=None: result_cache_key(
+        'assessment_statistics', assessment.id, [total_students, percentiles, buckets]
+    ),
+    version=lambda assessment, *args, **kwargs: get_data_versions(
+        class_ids=[assessment.class_assigned_id], subject_ids=[assessment.subject_id]
+    ),
+    serve_stale=False,
+)
+def assessment_statistics(assessment, total_students, percentiles=DEFAULT_PERCENTILES, buckets=None):
+    """
+    ``AssessmentStatistics.compute()``, cached until the assessment's class
+    or subject changes. Never stale: after a grade edit, requests that lose
+    the recompute lock wait briefly for the winner's result, and compute the
+    statistics themselves (duplicating its work) only if it is slow.
+    """
+    return AssessmentStatistics(
+        assessment, total_students, percentiles=percentiles, buckets=buckets
+    ).compute()
+
+
+def most_common_grades(grades, student_ids):
+    """
+    Map each student id to their most frequent grade letter, in one query.
+
+    Letters are counted per student and ranked with ROW_NUMBER() so only
+    the top letter per student is returned (ties go to the better letter).
+    """
+    rows = (
+        grades.filter(student_id__in=student_ids)
+        .order_by()
+        .values('student_id', 'grade_letter')
+        .annotate(count=Count('id'))
+        .annotate(position=Window(
+            RowNumber(),
+            partition_by=F('student_id'),
+            order_by=[F('count').desc(), F('grade_letter').asc()],
+        ))
+        .filter(position=1)
+        .values_list('student_id', 'grade_letter')
+    )
+    return dict(rows)
+
+
+def recent_percentages(grades, student_ids, limit):
+    """
+    Map each student id to their latest ``limit`` percentages, newest
+    first, in one query using ROW_NUMBER() over assessment date.
+    """
+    rows = (
+        grades.filter(student_id__in=student_ids)
+        .annotate(position=Window(
+            RowNumber(),
+            partition_by=F('student_id'),
+            order_by=[F('assessment__date').desc(), F('id').desc()],
+        ))
+        .filter(position__lte=limit)
+        .order_by('student_id', 'position')
+        .values_list('student_id', 'percentage')
+    )
+    recent = {student_id: [] for student_id in student_ids}
+    for student_id, percentage in rows:
+        recent[student_id].append(percentage)
+    return recent
@@ -0,0 +1,112 @@
+# backend/academics/grading.py
+import threading
+import time
+import uuid
+from bisect import bisect_right
+from django.core.cache import cache
+from django.db import transaction
+
+
+SCALE_VERSION_KEY = 'grading_scale_version'
+
+# Longest a process keeps its local scale without reloading it. A bump
+# is only seen by other processes through a shared cache, so this bounds
+# how long they can grade with old bands when the cache is per process.
+SCALE_MAX_AGE = 30
+
+
+class GradingScale:
+    """
+    Immutable, in-memory copy of the GradeConfig bands.
+
+    Bands are sorted by min_percentage so a percentage is resolved with a
+    single bisect instead of a database range query.
+    """
+    __slots__ = ('version', '_mins', '_bands')
+
+    def __init__(self, bands, version=None):
+        # bands: iterable of (min_percentage, max_percentage, grade_letter, gpa_value)
+        self._bands = tuple(sorted(bands, key=lambda band: band[0]))
+        self._mins = tuple(band[0] for band in self._bands)
+        self.version = version
+
+    def __len__(self):
+        return len(self._bands)
+
+    def band_for(self, percentage):
+        """Return the (min, max, letter, gpa) band containing percentage, or None."""
+        if percentage is None or not self._bands:
+            return None
+        # Bands may touch (80-90, 90-100); like the old ``-min_percentage``
+        # ordering, the band with the highest minimum wins.
+        idx = bisect_right(self._mins, percentage) - 1
+        if idx < 0:
+            return None
+        band = self._bands[idx]
+        return band if percentage <= band[1] else None
+
+    def letter_for(self, percentage, default=''):
+        band = self.band_for(percentage)
+        return band[2] if band else default
+
+    def gpa_for(self, percentage, default=None):
+        band = self.band_for(percentage)
+        return band[3] if band else default
+
+
+_local_scale = None
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def _current_version():
+    version = cache.get(SCALE_VERSION_KEY)
+    if version is None:
+        # First worker to look (or an evicted key) picks a fresh token
+        cache.add(SCALE_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(SCALE_VERSION_KEY)
+    return version
+
+
+def _is_current(scale, version):
+    return (
+        scale is not None
+        and scale.version == version
+        and time.monotonic() - _loaded_at < SCALE_MAX_AGE
+    )
+
+
+def get_grading_scale():
+    """
+    Return the process-local grading scale, reloading it when another
+    worker (or this one) has bumped the shared version after a GradeConfig
+    change, or once it is SCALE_MAX_AGE seconds old. Costs one cache read,
+    and one query per reload.
+    """
+    global _local_scale, _loaded_at
+    version = _current_version()
+    scale = _local_scale
+    if _is_current(scale, version):
+        return scale
+
+    with _lock:
+        if not _is_current(_local_scale, version):
+            from .models import GradeConfig
+            bands = GradeConfig.objects.values_list(
+                'min_percentage', 'max_percentage', 'grade_letter', 'gpa_value'
+            )
+            _local_scale = GradingScale(bands, version)
+            _loaded_at = time.monotonic()
+        return _local_scale
+
+
+def invalidate_grading_scale():
+    """Bump the shared version so every worker reloads the scale."""
+    global _local_scale
+    cache.set(SCALE_VERSION_KEY, uuid.uuid4().hex, None)
+    _local_scale = None
+
+
+def invalidate_grading_scale_on_commit():
+    """Invalidate once the current transaction commits (immediately in autocommit)."""
+    transaction.on_commit(invalidate_grading_scale)
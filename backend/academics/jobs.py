@@ -0,0 +1,74 @@
+# backend/academics/jobs.py
+import logging
+import tempfile
+from django.core.files import File
+from django.core.files.base import ContentFile
+from .analytics import StudentPerformanceAnalytics
+from .models import Class, ReportJob, ReportJobSuperseded, User
+from .report_cache import ReportCardCache
+from .report_generator import BulkReportCards, ReportData, render_analytics_pdf, report_filename, stream_zip
+
+
+logger = logging.getLogger(__name__)
+
+
+def _run_report_card(job):
+    params = job.params
+    class_id = params.get('class_id')
+    student = User.objects.get(id=params['student_id'], role=User.STUDENT)
+    class_obj = Class.objects.filter(id=class_id).first() if class_id else None
+    job.set_progress(0, total=1)
+    data = ReportData.load(student, class_id, class_obj)
+    report_cache = ReportCardCache()
+    key = report_cache.key(data, params.get('term'), params.get('academic_year'))
+    with report_cache.fetch(key, data, params.get('term'), params.get('academic_year')) as pdf:
+        job.succeed(report_filename(student, params.get('academic_year')), File(pdf))
+
+
+def _run_bulk_report_cards(job):
+    params = job.params
+    academic_year = params.get('academic_year')
+    bulk = BulkReportCards(params['class_id'], term=params.get('term'), academic_year=academic_year)
+    job.set_progress(0, total=len(bulk.load()))
+
+    def reports():
+        for done, (data, pdf) in enumerate(bulk.iter_reports(), start=1):
+            yield report_filename(data, academic_year), pdf
+            job.set_progress(done)
+
+    # Spool the archive to disk so memory stays bounded for large classes
+    with tempfile.TemporaryFile() as archive:
+        for chunk in stream_zip(reports()):
+            archive.write(chunk)
+        archive.seek(0)
+        job.succeed(
+            f"report_cards_{bulk.class_obj.name}_{academic_year or 'current'}.zip", File(archive)
+        )
+
+
+def _run_analytics_pdf(job):
+    student_id = job.params['student_id']
+    job.set_progress(0, total=1)
+    data = StudentPerformanceAnalytics(student_id).get_comprehensive_analytics()
+    buffer = render_analytics_pdf(data)
+    job.succeed(f"analytics_{student_id}.pdf", ContentFile(buffer.getvalue()))
+
+
+RUNNERS = {
+    ReportJob.REPORT_CARD: _run_report_card,
+    ReportJob.BULK_REPORT_CARDS: _run_bulk_report_cards,
+    ReportJob.ANALYTICS_PDF: _run_analytics_pdf,
+}
+
+
+def run_job(job):
+    """Run a claimed job, recording success or the error it failed with."""
+    try:
+        RUNNERS[job.kind](job)
+    except ReportJobSuperseded:
+        # Requeued as stale while running; the worker that claimed it since owns it now
+        logger.warning("Report job %s was requeued while running; dropping this run", job.pk)
+    except Exception as e:
+        logger.exception("Report job %s failed", job.pk)
+        job.fail(str(e))
+    return job
@@ -0,0 +1,47 @@
+# backend/academics/management/commands/benchmark_report_setup.py
+import timeit
+from django.core.management.base import BaseCommand
+from academics.report_generator import ReportCardGenerator
+from academics.report_styles import build_footer, build_header, build_report_styles
+
+
+def _rebuild_per_report():
+    """Setup as it was done for every report: a new stylesheet, header and footer."""
+    styles = build_report_styles()
+    build_header(styles, '2024/2025', 'Term 1')
+    build_footer(styles)
+
+
+def _shared_registry():
+    """Setup with the shared registry: copy the prebuilt header and footer."""
+    generator = ReportCardGenerator()
+    generator._build_header('2024/2025', 'Term 1')
+    generator._build_footer()
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the per-report setup of a report card (styles, header and footer) "
+        "when rebuilt for every report versus taken from the shared style registry."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=1000,
+            help="Report setups timed per run.",
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help="Runs per variant; the fastest is reported.",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        results = {}
+        for label, setup in (('Rebuilt per report', _rebuild_per_report), ('Shared registry', _shared_registry)):
+            best = min(timeit.repeat(setup, number=iterations, repeat=options['repeat']))
+            results[label] = best / iterations
+            self.stdout.write(f"{label}: {results[label] * 1e6:.1f} µs per report")
+
+        before, after = results.values()
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {before / after:.1f}x"))
@@ -0,0 +1,11 @@
+# backend/academics/management/commands/rebuild_attendance_rollups.py
+from django.core.management.base import BaseCommand
+from academics.models import AttendanceRollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild the day/week/month attendance rollup table from raw attendance records."
+
+    def handle(self, *args, **options):
+        created = AttendanceRollup.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} attendance rollup buckets"))
@@ -0,0 +1,11 @@
+# backend/academics/management/commands/rebuild_student_averages.py
+from django.core.management.base import BaseCommand
+from academics.models import StudentAverage
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-student average table used for rank percentiles from raw grades."
+
+    def handle(self, *args, **options):
+        created = StudentAverage.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt averages for {created} students"))
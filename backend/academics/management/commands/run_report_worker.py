@@ -0,0 +1,54 @@
+# backend/academics/management/commands/run_report_worker.py
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from academics.jobs import run_job
+from academics.models import ReportJob
+
+
+class Command(BaseCommand):
+    help = "Run queued report and PDF jobs. Start as many workers as needed; no broker is required."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit once the queue is empty instead of polling for new jobs.",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+        parser.add_argument(
+            '--requeue-after', type=int, default=600,
+            help="Requeue running jobs whose worker has not reported progress for this many seconds.",
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=ReportJob.MAX_ATTEMPTS,
+            help="Mark a stale job failed instead of requeueing it after this many attempts.",
+        )
+
+    def handle(self, *args, **options):
+        requeue_after = timedelta(seconds=options['requeue_after'])
+        while True:
+            # Drop connections broken by a database restart or idle timeout
+            close_old_connections()
+
+            requeued, failed = ReportJob.objects.requeue_stale(requeue_after, options['max_attempts'])
+            if requeued:
+                self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale jobs"))
+            if failed:
+                self.stdout.write(self.style.ERROR(f"Gave up on {failed} jobs whose worker kept dying"))
+
+            job = ReportJob.objects.claim_next()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            run_job(job)
+            if job.status == ReportJob.SUCCEEDED:
+                self.stdout.write(self.style.SUCCESS(f"Finished {job}"))
+            elif job.status == ReportJob.FAILED:
+                self.stdout.write(self.style.ERROR(f"{job} failed: {job.error}"))
@@ -0,0 +1,51 @@
+# backend/academics/management/commands/warm_analytics_cache.py
+import time
+from django.core.management.base import BaseCommand, CommandError
+from academics.analytics import WARM_BATCH_SIZE, cache_stats, reset_cache_stats, warm_analytics_cache
+from academics.caching import cache_is_shared
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute comprehensive analytics for active students whose cached "
+        "results are stale, then report the analytics cache hit ratio."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Keep running, warming again every INTERVAL seconds (default: run once).",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=WARM_BATCH_SIZE,
+            help="Students computed together per batch.",
+        )
+        parser.add_argument(
+            '--reset-stats', action='store_true',
+            help="Reset the hit/miss counters after reporting them.",
+        )
+
+    def handle(self, *args, **options):
+        if not cache_is_shared():
+            # Warming a per-process cache fills only this command's memory,
+            # and its counters never see the web workers' reads
+            raise CommandError(
+                "CACHES['default'] is process-local, so warmed entries would not reach "
+                "the web workers. Configure a shared cache backend (e.g. set REDIS_URL)."
+            )
+        while True:
+            checked, warmed = warm_analytics_cache(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Checked {checked} students, warmed {warmed} stale entries"
+            ))
+            self._report(options['reset_stats'])
+            if options['interval'] <= 0:
+                return
+            time.sleep(options['interval'])
+
+    def _report(self, reset):
+        stats = cache_stats()
+        ratio = 'n/a' if stats['hit_ratio'] is None else f"{stats['hit_ratio']:.1%}"
+        self.stdout.write(f"Cache hits: {stats['hits']}, misses: {stats['misses']}, hit ratio: {ratio}")
+        if reset:
+            reset_cache_stats()
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
+
+
+def build_rollups(apps, schema_editor):
+    Attendance = apps.get_model('academics', 'Attendance')
+    AttendanceRollup = apps.get_model('academics', 'AttendanceRollup')
+
+    for period, trunc in (('day', TruncDay), ('week', TruncWeek), ('month', TruncMonth)):
+        rows = (
+            Attendance.objects
+            .order_by()
+            .annotate(bucket=trunc('date'))
+            .values('student_id', 'class_assigned_id', 'bucket')
+            .annotate(
+                total=Count('id'),
+                present=Count('id', filter=Q(status='present')),
+                late=Count('id', filter=Q(status='late')),
+                absent=Count('id', filter=Q(status='absent')),
+            )
+        )
+        AttendanceRollup.objects.bulk_create([
+            AttendanceRollup(
+                student_id=row['student_id'],
+                class_assigned_id=row['class_assigned_id'],
+                period=period,
+                period_start=row['bucket'],
+                total=row['total'],
+                present=row['present'],
+                late=row['late'],
+                absent=row['absent'],
+            )
+            for row in rows
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0005_parentstudentrelationship'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField(help_text='Day, Monday of the week or first of the month')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('class_assigned', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='academics.class')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'period_start'], name='academics_a_period_4fd04f_idx'), models.Index(fields=['period', 'class_assigned', 'period_start'], name='academics_a_period_e8f0e8_idx')],
+                'unique_together': {('student', 'class_assigned', 'period', 'period_start')},
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
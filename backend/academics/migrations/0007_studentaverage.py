@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg, Count
+
+
+def build_averages(apps, schema_editor):
+    Grade = apps.get_model('academics', 'Grade')
+    StudentAverage = apps.get_model('academics', 'StudentAverage')
+
+    rows = (
+        Grade.objects
+        .filter(is_absent=False, percentage__isnull=False)
+        .order_by()
+        .values('student_id')
+        .annotate(average=Avg('percentage'), count=Count('id'))
+    )
+    StudentAverage.objects.bulk_create([
+        StudentAverage(
+            student_id=row['student_id'],
+            average_percentage=row['average'],
+            graded_count=row['count'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0006_attendancerollup'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentAverage',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='grade_average', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('average_percentage', models.DecimalField(decimal_places=4, max_digits=7)),
+                ('graded_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['average_percentage'], name='academics_s_average_86ea28_idx')],
+            },
+        ),
+        migrations.RunPython(build_averages, migrations.RunPython.noop),
+    ]
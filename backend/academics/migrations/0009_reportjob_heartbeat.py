@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0008_reportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportjob',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0, help_text='Times a worker has claimed the job'),
+        ),
+        migrations.AddField(
+            model_name='reportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last progress report from the worker running the job', null=True),
+        ),
+    ]
@@ -1,7 +1,18 @@
-from django.db import models
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import reduce
+from operator import or_
+from datetime import date, timedelta
+from django.db import models, transaction
+from django.db.models import Avg, Count, Q, Sum
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+from .grading import get_grading_scale
+from .caching import bump_student_versions_on_commit
 
 User = get_user_model()
 # Reference to custom User model
@@ -98,6 +109,40 @@ class Timetable(models.Model):
         super().save(*args, **kwargs)
 
 
+class AttendanceQuerySet(models.QuerySet):
+    """Keeps attendance rollups in sync for bulk ORM operations."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        AttendanceRollup.objects.refresh(obj.rollup_key() for obj in objs)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        keys = [obj.rollup_key() for obj in objs]
+        keys += [obj._loaded_key for obj in objs if getattr(obj, '_loaded_key', None)]
+        AttendanceRollup.objects.refresh(keys)
+        return rows
+
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db):
+            before = list(self.values_list('pk', *self.model.ROLLUP_FIELDS))
+            pks = [row[0] for row in before]
+            keys = [row[1:] for row in before]
+            rows = super().update(**kwargs)
+            keys += self.model.objects.filter(pk__in=pks).values_list(*self.model.ROLLUP_FIELDS)
+            AttendanceRollup.objects.refresh(keys)
+        return rows
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            keys = list(self.values_list(*self.model.ROLLUP_FIELDS))
+            result = super().delete()
+            AttendanceRollup.objects.refresh(keys)
+        return result
+
+
 class Attendance(models.Model):
     """Tracks daily attendance for each student in a class."""
 
@@ -125,6 +170,11 @@ class Attendance(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = AttendanceQuerySet.as_manager()
+
+    # Fields identifying the rollup buckets a record counts towards
+    ROLLUP_FIELDS = ('student_id', 'class_assigned_id', 'date')
+
     class Meta:
         unique_together = ('student', 'class_assigned', 'date')
         ordering = ['-date']
@@ -137,7 +187,272 @@ class Attendance(models.Model):
 
     def __str__(self):
         return f"{self.student} - {self.class_assigned} - {self.date} ({self.status})"
-    
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded rollup key so moved records refresh their old buckets."""
+        instance = super().from_db(db, field_names, values)
+        if all(f in field_names for f in cls.ROLLUP_FIELDS):
+            instance._loaded_key = instance.rollup_key()
+        return instance
+
+    def rollup_key(self):
+        return (self.student_id, self.class_assigned_id, self.date)
+
+    def save(self, *args, **kwargs):
+        """Save the record and refresh the rollup buckets it touches."""
+        super().save(*args, **kwargs)
+        keys = [self.rollup_key()]
+        if getattr(self, '_loaded_key', None):
+            keys.append(self._loaded_key)
+        AttendanceRollup.objects.refresh(keys)
+        self._loaded_key = self.rollup_key()
+
+    def delete(self, *args, **kwargs):
+        key = self.rollup_key()
+        result = super().delete(*args, **kwargs)
+        AttendanceRollup.objects.refresh([key])
+        return result
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def _bucket_range(period, day):
+    """Inclusive (start, end) dates of the rollup bucket containing day."""
+    if period == AttendanceRollup.DAY:
+        return day, day
+    if period == AttendanceRollup.WEEK:
+        start = _week_start(day)
+        return start, start + timedelta(days=6)
+    start = day.replace(day=1)
+    return start, _next_month(start) - timedelta(days=1)
+
+
+class AttendanceRollupQuerySet(models.QuerySet):
+
+    def for_range(self, start=None, end=None):
+        """Buckets covering the inclusive date range (see AttendanceRollup.cover)."""
+        return self.filter(AttendanceRollup.cover(start, end))
+
+    def totals(self):
+        """Summed present/late/absent counts, with zeros when nothing matches."""
+        totals = self.aggregate(
+            total=Sum('total'),
+            present=Sum('present'),
+            late=Sum('late'),
+            absent=Sum('absent'),
+        )
+        return {key: value or 0 for key, value in totals.items()}
+
+
+class AttendanceRollupManager(models.Manager.from_queryset(AttendanceRollupQuerySet)):
+    """Maintains precomputed attendance counts from raw Attendance rows."""
+
+    _state = threading.local()
+
+    @contextmanager
+    def deferred(self):
+        """Collect refreshes made inside the block and apply them once at the end."""
+        if getattr(self._state, 'pending', None) is not None:
+            yield
+            return
+        self._state.pending = set()
+        try:
+            yield
+            pending = self._state.pending
+        finally:
+            self._state.pending = None
+        self.refresh(pending)
+
+    def refresh(self, keys):
+        """
+        Recompute the day, week and month buckets touched by the given
+        (student_id, class_id, date) keys.
+        """
+        keys = {key for key in keys if None not in key}
+        if not keys:
+            return
+        pending = getattr(self._state, 'pending', None)
+        if pending is not None:
+            pending.update(keys)
+            return
+
+        # Group the touched buckets by period and (student, class), so only
+        # buckets holding a changed date are re-aggregated
+        touched = {
+            period: defaultdict(set) for period, _ in AttendanceRollup.PERIOD_CHOICES
+        }
+        for student_id, class_id, day in keys:
+            for period, buckets in touched.items():
+                buckets[student_id, class_id].add(_bucket_range(period, day))
+
+        with transaction.atomic(using=self.db):
+            for period, buckets in touched.items():
+                attendance = Attendance.objects.filter(reduce(or_, (
+                    Q(student_id=student_id, class_assigned_id=class_id)
+                    & reduce(or_, (Q(date__range=bucket) for bucket in sorted(ranges)))
+                    for (student_id, class_id), ranges in buckets.items()
+                )))
+                # Upsert in key order so concurrent refreshes lock rows consistently
+                rollups = sorted(
+                    self._aggregate(attendance, period),
+                    key=lambda r: (r.student_id, r.class_assigned_id, r.period_start),
+                )
+                self.bulk_create(
+                    rollups,
+                    batch_size=1000,
+                    update_conflicts=True,
+                    unique_fields=['student', 'class_assigned', 'period', 'period_start'],
+                    update_fields=['total', 'present', 'late', 'absent'],
+                )
+
+                # Buckets whose last record was removed or moved elsewhere
+                filled = {(r.student_id, r.class_assigned_id, r.period_start) for r in rollups}
+                empty = [
+                    Q(student_id=student_id, class_assigned_id=class_id, period_start=start)
+                    for (student_id, class_id), ranges in buckets.items()
+                    for start, _ in ranges
+                    if (student_id, class_id, start) not in filled
+                ]
+                if empty:
+                    self.filter(reduce(or_, empty), period=period).delete()
+        bump_student_versions_on_commit({key[0] for key in keys})
+
+    def rebuild(self):
+        """Drop and recompute every rollup bucket. Returns the number of buckets."""
+        created = 0
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            for period, _ in AttendanceRollup.PERIOD_CHOICES:
+                created += len(self.bulk_create(
+                    self._aggregate(Attendance.objects.all(), period), batch_size=1000
+                ))
+        return created
+
+    def _aggregate(self, attendance, period):
+        trunc = {
+            AttendanceRollup.DAY: TruncDay,
+            AttendanceRollup.WEEK: TruncWeek,
+            AttendanceRollup.MONTH: TruncMonth,
+        }[period]
+        rows = (
+            attendance
+            .order_by()
+            .annotate(bucket=trunc('date'))
+            .values('student_id', 'class_assigned_id', 'bucket')
+            .annotate(
+                total=Count('id'),
+                present=Count('id', filter=Q(status=Attendance.PRESENT)),
+                late=Count('id', filter=Q(status=Attendance.LATE)),
+                absent=Count('id', filter=Q(status=Attendance.ABSENT)),
+            )
+        )
+        return [
+            AttendanceRollup(
+                student_id=row['student_id'],
+                class_assigned_id=row['class_assigned_id'],
+                period=period,
+                period_start=row['bucket'],
+                total=row['total'],
+                present=row['present'],
+                late=row['late'],
+                absent=row['absent'],
+            )
+            for row in rows
+        ]
+
+
+class AttendanceRollup(models.Model):
+    """Precomputed attendance counts per student, class and day/week/month."""
+
+    DAY = 'day'
+    WEEK = 'week'
+    MONTH = 'month'
+
+    PERIOD_CHOICES = [
+        (DAY, 'Day'),
+        (WEEK, 'Week'),
+        (MONTH, 'Month'),
+    ]
+
+    student = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="attendance_rollups"
+    )
+    class_assigned = models.ForeignKey(
+        Class, on_delete=models.CASCADE, related_name="attendance_rollups"
+    )
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField(help_text="Day, Monday of the week or first of the month")
+    total = models.PositiveIntegerField(default=0)
+    present = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+
+    objects = AttendanceRollupManager()
+
+    class Meta:
+        unique_together = ('student', 'class_assigned', 'period', 'period_start')
+        indexes = [
+            models.Index(fields=['period', 'period_start']),
+            models.Index(fields=['period', 'class_assigned', 'period_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.class_assigned} - {self.period} {self.period_start}"
+
+    @classmethod
+    def cover(cls, start=None, end=None):
+        """
+        Q selecting buckets that tile the inclusive [start, end] range exactly once.
+
+        Whole months are read from month buckets, the leftover edges from
+        week buckets and the remainder from day buckets. Dates may be
+        ``date`` objects or ISO strings; invalid strings raise ValueError.
+        """
+        if isinstance(start, str):
+            start = date.fromisoformat(start)
+        if isinstance(end, str):
+            end = date.fromisoformat(end)
+        if start is None and end is None:
+            return Q(period=cls.MONTH)
+
+        first = start if start is None or start.day == 1 else _next_month(start)
+        stop = None if end is None else (end + timedelta(days=1)).replace(day=1)
+        if first is not None and stop is not None and first >= stop:
+            return cls._partial_cover(start, end)
+
+        q = Q(period=cls.MONTH)
+        if first is not None:
+            q &= Q(period_start__gte=first)
+        if stop is not None:
+            q &= Q(period_start__lt=stop)
+        if start is not None and start < first:
+            q |= cls._partial_cover(start, first - timedelta(days=1))
+        if end is not None and stop <= end:
+            q |= cls._partial_cover(stop, end)
+        return q
+
+    @classmethod
+    def _partial_cover(cls, start, end):
+        """Week buckets fully inside [start, end] plus day buckets for the edges."""
+        first = _week_start(start) if start.weekday() == 0 else _week_start(start) + timedelta(days=7)
+        stop = _week_start(end + timedelta(days=1))
+        if first >= stop:
+            return Q(period=cls.DAY, period_start__range=(start, end))
+
+        q = Q(period=cls.WEEK, period_start__gte=first, period_start__lt=stop)
+        if start < first:
+            q |= Q(period=cls.DAY, period_start__range=(start, first - timedelta(days=1)))
+        if stop <= end:
+            q |= Q(period=cls.DAY, period_start__range=(stop, end))
+        return q
+
 
 class GradeConfig(models.Model):
     """System-wide grading scale configuration."""
@@ -189,6 +504,20 @@ class GradeConfig(models.Model):
             })
 
 
+class AssessmentQuerySet(models.QuerySet):
+
+    def with_grade_summary(self):
+        """
+        Annotate ``grade_count`` and ``average_marks`` over non-absent grades,
+        so listing assessments does not query or load grades per row.
+        """
+        graded = Q(grades__is_absent=False)
+        return self.annotate(
+            grade_count=Count('grades', filter=graded),
+            average_marks=Avg('grades__marks_obtained', filter=graded),
+        )
+
+
 class Assessment(models.Model):
     """Represents an assessment (exam, quiz, assignment, project)."""
     QUIZ = 'quiz'
@@ -244,6 +573,8 @@ class Assessment(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = AssessmentQuerySet.as_manager()
     
     class Meta:
         ordering = ['-date', 'name']
@@ -254,6 +585,18 @@ class Assessment(models.Model):
     
     def __str__(self):
         return f"{self.name} - {self.subject.name} ({self.assessment_type})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded class and subject so a move invalidates both scopes."""
+        instance = super().from_db(db, field_names, values)
+        if 'class_assigned_id' in field_names and 'subject_id' in field_names:
+            instance._loaded_scope = instance.version_scope()
+        return instance
+
+    def version_scope(self):
+        """(class id, subject id) whose data versions this assessment's grades belong to."""
+        return (self.class_assigned_id, self.subject_id)
     
     def clean(self):
         """Validate assessment data."""
@@ -311,6 +654,16 @@ class Grade(models.Model):
     
     def __str__(self):
         return f"{self.student.username} - {self.assessment.name}: {self.marks_obtained}/{self.assessment.total_marks}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded assessment and student so a moved grade updates both sides."""
+        instance = super().from_db(db, field_names, values)
+        if 'assessment_id' in field_names:
+            instance._loaded_assessment_id = instance.assessment_id
+        if 'student_id' in field_names:
+            instance._loaded_student_id = instance.student_id
+        return instance
     
     def clean(self):
         """Validate grade data."""
@@ -332,20 +685,136 @@ class Grade(models.Model):
             # Calculate percentage
             self.percentage = (self.marks_obtained / self.assessment.total_marks) * 100
             
-            # Determine grade letter
+            # Determine grade letter from the cached grading scale
             try:
-                grade_config = GradeConfig.objects.filter(
-                    min_percentage__lte=self.percentage,
-                    max_percentage__gte=self.percentage
-                ).first()
+                grade_letter = get_grading_scale().letter_for(self.percentage)
                 
-                if grade_config:
-                    self.grade_letter = grade_config.grade_letter
+                if grade_letter:
+                    self.grade_letter = grade_letter
             except Exception as e:
                 print(f"Grade letter calculation failed: {e}")
         
         super().save(*args, **kwargs)
 
+
+def _count(queryset):
+    """Scalar subquery counting the rows of queryset."""
+    return models.Subquery(
+        queryset.order_by().annotate(count=models.Func(models.F('pk'), function='COUNT')).values('count')
+    )
+
+
+class StudentAverageManager(models.Manager):
+    """Maintains each student's average percentage over graded results."""
+
+    def refresh(self, student_ids):
+        """Recompute the stored averages of the given students."""
+        student_ids = {pk for pk in student_ids if pk is not None}
+        if not student_ids:
+            return
+        averages = sorted(
+            self._aggregate(Grade.objects.filter(student_id__in=student_ids)),
+            key=lambda average: average.student_id,
+        )
+        with transaction.atomic(using=self.db):
+            # Upsert in key order so concurrent refreshes of one student
+            # neither collide on the primary key nor deadlock
+            self.bulk_create(
+                averages,
+                update_conflicts=True,
+                unique_fields=['student'],
+                update_fields=['average_percentage', 'graded_count', 'updated_at'],
+            )
+            graded = {average.student_id for average in averages}
+            self.filter(student_id__in=student_ids - graded).delete()
+        bump_student_versions_on_commit(student_ids)
+
+    def refresh_on_commit(self, student_ids):
+        """Refresh once the current transaction commits (immediately in autocommit)."""
+        student_ids = set(student_ids)
+        transaction.on_commit(lambda: self.refresh(student_ids), using=self.db)
+
+    def rebuild(self):
+        """Drop and recompute every stored average. Returns the number of rows."""
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            return len(self.bulk_create(self._aggregate(Grade.objects.all()), batch_size=1000))
+
+    def percentile_for(self, student_id):
+        """
+        Rank percentile of a student among all students with grades, or None.
+
+        Students are ranked by average like SQL RANK(): the best student
+        gets 100 and students with equal averages share a percentile.
+        """
+        return self.percentiles_for([student_id]).get(student_id)
+
+    def percentiles_for(self, student_ids):
+        """
+        Map each given student with an average to their rank percentile,
+        in one query. Per student it costs a range count on the
+        average_percentage index, not a scan of every average.
+        """
+        rows = (
+            self.filter(student_id__in=set(student_ids))
+            .annotate(
+                total=_count(self.all()),
+                above=_count(self.filter(average_percentage__gt=models.OuterRef('average_percentage'))),
+            )
+            .values_list('student_id', 'total', 'above')
+        )
+        return {
+            student_id: round((total - above) / total * 100, 2)
+            for student_id, total, above in rows
+        }
+
+    def _aggregate(self, grades):
+        rows = (
+            grades
+            .filter(is_absent=False, percentage__isnull=False)
+            .order_by()
+            .values('student_id')
+            .annotate(average=Avg('percentage'), count=Count('id'))
+        )
+        return [
+            StudentAverage(
+                student_id=row['student_id'],
+                average_percentage=row['average'],
+                graded_count=row['count'],
+            )
+            for row in rows
+        ]
+
+
+class StudentAverage(models.Model):
+    """
+    Precomputed average percentage per student, used for rank percentiles.
+
+    Kept in sync by the Grade signals and the bulk grade pipelines; the
+    ``rebuild_student_averages`` management command recomputes it from
+    scratch.
+    """
+    student = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='grade_average'
+    )
+    average_percentage = models.DecimalField(max_digits=7, decimal_places=4)
+    graded_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = StudentAverageManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['average_percentage']),
+        ]
+
+    def __str__(self):
+        return f"{self.student.username}: {self.average_percentage}%"
+
+
 class ParentStudentRelationship(models.Model):
     """Links parents to their student children with permission settings."""
     
@@ -408,4 +877,162 @@ class ParentStudentRelationship(models.Model):
         if self.student.role != User.STUDENT:
             raise ValueError("Related user must have student role")
         
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+
+class ReportJobSuperseded(Exception):
+    """The job was requeued and claimed again while this worker was still running it."""
+
+
+class ReportJobManager(models.Manager):
+    """Database-backed queue of report jobs, consumed by run_report_worker."""
+
+    def claim_next(self):
+        """
+        Mark the oldest pending job as running and return it, or None.
+
+        Rows locked by another worker are skipped, so several workers can
+        poll the same table without handing out a job twice.
+        """
+        with transaction.atomic(using=self.db):
+            job = (
+                self.select_for_update(skip_locked=True)
+                .filter(status=ReportJob.PENDING)
+                .order_by('created_at', 'id')
+                .first()
+            )
+            if job is not None:
+                job.status = ReportJob.RUNNING
+                job.started_at = job.heartbeat_at = timezone.now()
+                job.attempts += 1
+                job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'attempts'])
+        return job
+
+    def requeue_stale(self, older_than, max_attempts=None):
+        """
+        Recover running jobs whose worker has not reported progress for
+        older_than (a timedelta), presumably because it died.
+
+        Jobs that have already been claimed ``max_attempts`` times are
+        marked failed instead, so a job that keeps killing its worker is
+        not retried forever. Returns ``(requeued, failed)`` counts.
+        """
+        max_attempts = max_attempts or ReportJob.MAX_ATTEMPTS
+        stale = self.filter(
+            status=ReportJob.RUNNING,
+            heartbeat_at__lt=timezone.now() - older_than
+        )
+        failed = stale.filter(attempts__gte=max_attempts).update(
+            status=ReportJob.FAILED,
+            error=f"Worker stopped responding ({max_attempts} attempts)",
+            finished_at=timezone.now(),
+        )
+        requeued = stale.filter(attempts__lt=max_attempts).update(
+            status=ReportJob.PENDING, started_at=None, heartbeat_at=None, completed=0
+        )
+        return requeued, failed
+
+
+class ReportJob(models.Model):
+    """A report or PDF rendered in the background by run_report_worker."""
+
+    REPORT_CARD = 'report_card'
+    BULK_REPORT_CARDS = 'bulk_report_cards'
+    ANALYTICS_PDF = 'analytics_pdf'
+
+    KIND_CHOICES = [
+        (REPORT_CARD, 'Report card'),
+        (BULK_REPORT_CARDS, 'Class report cards'),
+        (ANALYTICS_PDF, 'Analytics PDF'),
+    ]
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='report_jobs'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    total = models.PositiveIntegerField(default=0, help_text="Students to render")
+    completed = models.PositiveIntegerField(default=0, help_text="Students rendered so far")
+    result = models.FileField(upload_to='report_jobs/%Y/%m/', blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True, blank=True, help_text="Last progress report from the worker running the job"
+    )
+    attempts = models.PositiveIntegerField(default=0, help_text="Times a worker has claimed the job")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ReportJobManager()
+
+    # Claims before a job whose worker keeps dying is marked failed
+    MAX_ATTEMPTS = 3
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['requested_by', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+    @property
+    def progress(self):
+        """Percentage of students rendered."""
+        if self.status == self.SUCCEEDED:
+            return 100.0
+        return round(self.completed / self.total * 100, 2) if self.total else 0.0
+
+    def _claimed(self):
+        """This job, while it is still held by the claim this instance came from."""
+        return ReportJob.objects.filter(pk=self.pk, status=self.RUNNING, attempts=self.attempts)
+
+    def set_progress(self, completed, total=None):
+        """
+        Record progress and a heartbeat without touching other fields a
+        poller may be reading. Raises ReportJobSuperseded if the job was
+        requeued to another worker meanwhile.
+        """
+        self.completed = completed
+        fields = {'completed': completed, 'heartbeat_at': timezone.now()}
+        if total is not None:
+            self.total = fields['total'] = total
+        if not self._claimed().update(**fields):
+            raise ReportJobSuperseded(self.pk)
+
+    def succeed(self, filename, content):
+        """Store the rendered file and mark the job as done."""
+        self.result.save(filename, content, save=False)
+        self.status = self.SUCCEEDED
+        self.completed = self.total
+        self.finished_at = timezone.now()
+        updated = self._claimed().update(
+            result=self.result.name, status=self.status,
+            completed=self.completed, finished_at=self.finished_at,
+        )
+        if not updated:
+            self.result.delete(save=False)
+            raise ReportJobSuperseded(self.pk)
+
+    def fail(self, error):
+        self.error = error
+        self.finished_at = timezone.now()
+        self._claimed().update(status=self.FAILED, error=error, finished_at=self.finished_at)
+        self.status = self.FAILED
@@ -0,0 +1,117 @@
+# backend/academics/rankings.py
+from django.db.models import Count, F, FloatField, ExpressionWrapper, Max, Q, Subquery, Sum
+
+
+class AttendanceRankings:
+    """
+    Per-student attendance totals and rankings computed in the database.
+
+    Works on an AttendanceRollup queryset (usually from ``for_range``), so
+    the cost follows the number of buckets rather than raw records. Every
+    method issues a fixed number of queries, no matter how many students
+    the base queryset covers.
+    """
+
+    STUDENT_FIELDS = (
+        'student_id',
+        'student__username',
+        'student__first_name',
+        'student__last_name',
+        'student__email',
+    )
+
+    def __init__(self, rollup_qs):
+        self.rollup_qs = rollup_qs
+
+    def student_totals(self):
+        """One row per student with present/late/absent totals and rate."""
+        return (
+            self.rollup_qs
+            .order_by()
+            .values(*self.STUDENT_FIELDS)
+            .annotate(
+                total_records=Sum('total'),
+                present_records=Sum('present'),
+                late_records=Sum('late'),
+                absent_records=Sum('absent'),
+            )
+            .annotate(
+                attendance_rate=ExpressionWrapper(
+                    (F('present_records') + F('late_records')) * 100.0 / F('total_records'),
+                    output_field=FloatField()
+                )
+            )
+        )
+
+    def count(self):
+        """Number of distinct students in the base queryset."""
+        return self.rollup_qs.order_by().values('student_id').distinct().count()
+
+    def top(self, limit):
+        """Students with the highest attendance rate, best first."""
+        rows = self.student_totals().order_by('-attendance_rate', 'student_id')[:limit]
+        return [self._to_ranking(row) for row in rows]
+
+    def bottom(self, limit):
+        """Students with the lowest attendance rate, worst first."""
+        rows = self.student_totals().order_by('attendance_rate', '-student_id')[:limit]
+        return [self._to_ranking(row) for row in rows]
+
+    def student_position(self, student_id):
+        """
+        Rank, percentile and category for one student in a single query.
+
+        Students are ranked like RANK() over their attendance rate: the
+        rank is one more than the number of students with a higher rate,
+        so students with equal rates share a rank.
+        """
+        student = self.student_totals().filter(student_id=student_id)
+        counts = self.student_totals().aggregate(
+            total_students=Count('student_id'),
+            ahead=Count('student_id', filter=Q(
+                attendance_rate__gt=Subquery(student.values('attendance_rate'))
+            )),
+            student_rate=Max('attendance_rate', filter=Q(student_id=student_id)),
+            student_records=Max('total_records', filter=Q(student_id=student_id)),
+        )
+        if counts['student_records'] is None:
+            return None
+
+        rank = counts['ahead'] + 1
+        total_students = counts['total_students']
+        percentile = round(((total_students - rank + 1) / total_students) * 100, 2)
+        return {
+            'rank': rank,
+            'total_students': total_students,
+            'percentile': percentile,
+            'attendance_rate': round(counts['student_rate'], 2) if counts['student_records'] else 0,
+            'category': self.category_for(percentile),
+        }
+
+    @staticmethod
+    def category_for(percentile):
+        """Map a percentile to the attendance category label."""
+        if percentile >= 80:
+            return "Excellent"
+        elif percentile >= 60:
+            return "Good"
+        elif percentile >= 40:
+            return "Average"
+        elif percentile >= 20:
+            return "Below Average"
+        return "Needs Improvement"
+
+    @staticmethod
+    def _to_ranking(row):
+        full_name = f"{row['student__first_name']} {row['student__last_name']}".strip()
+        return {
+            'student_id': row['student_id'],
+            'student_username': row['student__username'],
+            'student_name': full_name or row['student__username'],
+            'total_records': row['total_records'],
+            'present': row['present_records'],
+            'absent': row['absent_records'],
+            'late': row['late_records'],
+            'attendance_rate': round(row['attendance_rate'], 2) if row['total_records'] else 0,
+            'email': row['student__email'],
+        }
@@ -0,0 +1,20 @@
+# backend/academics/render_worker.py
+import multiprocessing
+
+# Render workers are started fresh rather than forked from the web process,
+# which would share its open database connections (and any threads' locks).
+# They import this module before Django is set up, so it must not import
+# models at module level.
+
+
+def render_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def init_render_worker():
+    # Worker processes only render; they need the app registry, not a connection
+    import django
+    from django.db import connections
+    django.setup()
+    connections.close_all()
@@ -0,0 +1,129 @@
+# backend/academics/report_cache.py
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from django.conf import settings
+from .report_generator import ReportCardGenerator
+
+
+# Bump when the report card layout changes so cached PDFs are re-rendered
+REPORT_LAYOUT_VERSION = 1
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Estimated bytes under each cache root, per process (see ReportCardCache.put)
+_sizes = {}
+_sizes_lock = threading.Lock()
+
+
+class ReportCardCache:
+    """
+    Rendered report card PDFs stored under ``MEDIA_ROOT/report_cards``.
+
+    Files are content addressed: the name is a hash of the loaded
+    ReportData (student details, class, every grade row with its subject
+    name), the term, the academic year and the layout version. Anything
+    that changes the PDF therefore produces a new key rather than needing
+    invalidation, in every process sharing the directory, and the key
+    doubles as the ETag.
+
+    Reads refresh a file's modification time, and once writes push the
+    directory over ``max_bytes`` (the REPORT_CACHE_MAX_BYTES setting) the
+    least recently used files are evicted.
+    """
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = Path(root or Path(settings.MEDIA_ROOT) / 'report_cards')
+        self.max_bytes = max_bytes or getattr(settings, 'REPORT_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+
+    def key(self, data, term=None, academic_year=None):
+        """Content hash of a report card's inputs; data is a loaded ReportData."""
+        inputs = [
+            REPORT_LAYOUT_VERSION,
+            [getattr(data, name) for name in data.__slots__ if name != 'grades'],
+            [[getattr(grade, name) for name in grade.__slots__] for grade in data.grades],
+            term or '', academic_year or '',
+        ]
+        return hashlib.sha256(json.dumps(inputs, default=str).encode()).hexdigest()
+
+    def path(self, key):
+        return self.root / key[:2] / f'{key}.pdf'
+
+    def open(self, key):
+        """Open the cached PDF for reading and mark it as recently used, or return None."""
+        path = self.path(key)
+        try:
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # Evicted after opening; the open handle still reads it
+        return file
+
+    def put(self, key, data):
+        """Store a rendered PDF atomically, then enforce the size cap."""
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as temp:
+            temp.write(data)
+        os.replace(temp_path, path)
+
+        # Only scan the directory once this process's running estimate
+        # (seeded by one scan, then grown by its own writes) passes the cap
+        with _sizes_lock:
+            size = _sizes.get(self.root)
+        if size is None:
+            size = self._total_size()
+        else:
+            size += len(data)
+        if size > self.max_bytes:
+            size = self.evict()
+        with _sizes_lock:
+            _sizes[self.root] = size
+        return path
+
+    def _files(self):
+        files = []
+        for path in self.root.glob('*/*.pdf'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _total_size(self):
+        return sum(size for _, size, _ in self._files())
+
+    def evict(self):
+        """
+        Delete least recently used PDFs until the cache fits in max_bytes.
+        Returns the bytes left.
+        """
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+    def fetch(self, key, data, term=None, academic_year=None):
+        """Open the report card for key, rendering data and storing it first if needed."""
+        file = self.open(key)
+        if file is None:
+            buffer = ReportCardGenerator().render(data, term, academic_year)
+            self.put(key, buffer.getvalue())
+            buffer.seek(0)
+            return buffer
+        return file
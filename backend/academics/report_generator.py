@@ -1,68 +1,91 @@
 # backend/academics/report_generator.py
-from io import BytesIO
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO, RawIOBase
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import (
     SimpleDocTemplate, Table, TableStyle, Paragraph, 
     Spacer, Image, PageBreak
 )
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.enums import TA_LEFT, TA_RIGHT
 from django.conf import settings
-from django.db.models import Avg, Sum, Count, Q
+from django.db.models import Sum, Count, Q
 from .models import Grade, Assessment, GradeConfig, User, Class, Subject
+from .render_worker import init_render_worker, render_context
+from .report_styles import REPORT_STYLES, footer_flowables, header_flowables
 from decimal import Decimal
 import os
 
 
+class ReportGrade:
+    """One graded result, reduced to what the report card sections show."""
+    __slots__ = ('assessment_id', 'subject', 'percentage', 'grade_letter', 'remarks')
+    
+    def __init__(self, assessment_id, subject, percentage, grade_letter, remarks):
+        self.assessment_id = assessment_id
+        self.subject = subject
+        self.percentage = percentage
+        self.grade_letter = grade_letter
+        self.remarks = remarks
+
+
+# Columns loaded per grade: the student id, then ReportGrade's fields
+REPORT_GRADE_COLUMNS = (
+    'student_id', 'assessment_id', 'assessment__subject__name',
+    'percentage', 'grade_letter', 'remarks',
+)
+
+
+def report_grade_rows(grades, class_id=None):
+    """Values rows of the non-absent grades a report card covers, most recently graded first."""
+    grades = grades.filter(is_absent=False)
+    if class_id:
+        grades = grades.filter(assessment__class_assigned_id=class_id)
+    return grades.values_list(*REPORT_GRADE_COLUMNS)
+
+
+class ReportData:
+    """
+    Everything one report card shows, loaded before rendering.
+    
+    Plain and slotted, so every section builder reads the same rows
+    without touching the database and a whole class of cards is cheap to
+    hand to worker processes.
+    """
+    __slots__ = (
+        'student_id', 'student_name', 'username', 'email',
+        'class_name', 'grades', 'average_percentage',
+    )
+    
+    def __init__(self, student, grades, class_obj=None):
+        self.student_id = student.id
+        self.student_name = student.get_full_name()
+        self.username = student.username
+        self.email = student.email
+        self.class_name = class_obj.name if class_obj else None
+        self.grades = tuple(grades)
+        percentages = [grade.percentage for grade in self.grades if grade.percentage is not None]
+        self.average_percentage = sum(percentages) / len(percentages) if percentages else 0
+    
+    @classmethod
+    def load(cls, student, class_id=None, class_obj=None):
+        """Fetch the student's report grades in one query."""
+        rows = report_grade_rows(Grade.objects.filter(student=student), class_id)
+        return cls(student, [ReportGrade(*row[1:]) for row in rows], class_obj)
+
+
 class ReportCardGenerator:
     """Generates professional PDF report cards for students"""
     
     def __init__(self):
         self.buffer = BytesIO()
-        self.styles = getSampleStyleSheet()
-        self.setup_custom_styles()
-    
-    def setup_custom_styles(self):
-        """Create custom paragraph styles"""
-        self.styles.add(ParagraphStyle(
-            name='SchoolName',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1e40af'),
-            spaceAfter=6,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='ReportTitle',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#374151'),
-            spaceAfter=12,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='StudentInfo',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            spaceAfter=6,
-            fontName='Helvetica'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=self.styles['Heading3'],
-            fontSize=13,
-            textColor=colors.HexColor('#1f2937'),
-            spaceAfter=10,
-            spaceBefore=15,
-            fontName='Helvetica-Bold'
-        ))
+        # Shared, read-only styles (see report_styles); nothing is rebuilt per report
+        self.styles = REPORT_STYLES
     
     def generate_report(self, student_id, class_id=None, term=None, academic_year=None):
         """
@@ -80,132 +103,90 @@ class ReportCardGenerator:
         try:
             # Fetch student data
             student = User.objects.get(id=student_id, role=User.STUDENT)
+            class_obj = Class.objects.filter(id=class_id).first() if class_id else None
             
-            # Fetch grades
-            grades = Grade.objects.filter(
-                student=student,
-                is_absent=False
-            ).select_related(
-                'assessment',
-                'assessment__subject',
-                'assessment__class_assigned'
-            )
-            
-            # Apply filters
-            if class_id:
-                grades = grades.filter(assessment__class_assigned_id=class_id)
-            
-            # Create PDF document
-            doc = SimpleDocTemplate(
-                self.buffer,
-                pagesize=A4,
-                rightMargin=0.75*inch,
-                leftMargin=0.75*inch,
-                topMargin=0.75*inch,
-                bottomMargin=0.75*inch
-            )
-            
-            # Build document elements
-            elements = []
-            
-            # Header
-            elements.extend(self._build_header(student, academic_year, term))
-            elements.append(Spacer(1, 0.3*inch))
-            
-            # Student Information
-            elements.extend(self._build_student_info(student, class_id))
-            elements.append(Spacer(1, 0.2*inch))
-            
-            # Academic Performance
-            elements.extend(self._build_academic_performance(grades))
-            elements.append(Spacer(1, 0.2*inch))
-            
-            # Subject-wise breakdown
-            elements.extend(self._build_subject_breakdown(grades))
-            elements.append(Spacer(1, 0.2*inch))
-            
-            # Performance Summary
-            elements.extend(self._build_performance_summary(grades))
-            elements.append(Spacer(1, 0.2*inch))
-            
-            # Teacher Remarks
-            elements.extend(self._build_remarks(grades, student))
-            elements.append(Spacer(1, 0.2*inch))
-            
-            # Footer
-            elements.extend(self._build_footer())
-            
-            # Build PDF
-            doc.build(elements)
-            
-            # Reset buffer position
-            self.buffer.seek(0)
-            self.buffer.flush()
-            return self.buffer
+            return self.render(ReportData.load(student, class_id, class_obj), term, academic_year)
             
         except User.DoesNotExist:
             raise ValueError(f"Student with ID {student_id} not found")
         except Exception as e:
             raise Exception(f"Error generating report: {str(e)}")
     
-    def _build_header(self, student, academic_year, term):
-        """Build report card header with school info"""
-        elements = []
+    def render(self, data, term=None, academic_year=None):
+        """
+        Render a report card from already loaded data, without database access.
         
-        # School name
-        school_name = Paragraph("APOLLO-KEY ACADEMY", self.styles['SchoolName'])
-        elements.append(school_name)
+        Args:
+            data: ReportData for the student
         
-        # School tagline
-        tagline = Paragraph(
-            "Excellence in Education",
-            self.styles['Normal']
+        Returns:
+            BytesIO buffer containing PDF
+        """
+        # Create PDF document
+        doc = SimpleDocTemplate(
+            self.buffer,
+            pagesize=A4,
+            rightMargin=0.75*inch,
+            leftMargin=0.75*inch,
+            topMargin=0.75*inch,
+            bottomMargin=0.75*inch
         )
-        tagline.alignment = TA_CENTER
-        elements.append(tagline)
-        elements.append(Spacer(1, 0.1*inch))
-        
-        # Report title
-        title_text = "STUDENT REPORT CARD"
-        if academic_year:
-            title_text += f" - {academic_year}"
-        if term:
-            title_text += f" ({term})"
-        
-        title = Paragraph(title_text, self.styles['ReportTitle'])
-        elements.append(title)
-        
-        # Divider line
-        line_data = [['', '']]
-        line_table = Table(line_data, colWidths=[6*inch])
-        line_table.setStyle(TableStyle([
-            ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor('#3b82f6'))
-        ]))
-        elements.append(line_table)
         
-        return elements
+        # Build document elements
+        elements = []
+        
+        # Header
+        elements.extend(self._build_header(academic_year, term))
+        elements.append(Spacer(1, 0.3*inch))
+        
+        # Student Information
+        elements.extend(self._build_student_info(data))
+        elements.append(Spacer(1, 0.2*inch))
+        
+        # Academic Performance
+        elements.extend(self._build_academic_performance(data))
+        elements.append(Spacer(1, 0.2*inch))
+        
+        # Subject-wise breakdown
+        elements.extend(self._build_subject_breakdown(data))
+        elements.append(Spacer(1, 0.2*inch))
+        
+        # Performance Summary
+        elements.extend(self._build_performance_summary(data))
+        elements.append(Spacer(1, 0.2*inch))
+        
+        # Teacher Remarks
+        elements.extend(self._build_remarks(data))
+        elements.append(Spacer(1, 0.2*inch))
+        
+        # Footer
+        elements.extend(self._build_footer())
+        
+        # Build PDF
+        doc.build(elements)
+        
+        # Reset buffer position
+        self.buffer.seek(0)
+        self.buffer.flush()
+        return self.buffer
     
-    def _build_student_info(self, student, class_id):
+    def _build_header(self, academic_year, term):
+        """Build report card header with school info"""
+        return header_flowables(academic_year, term)
+    
+    def _build_student_info(self, data):
         """Build student information section"""
         elements = []
         
-        # Get class info
-        class_obj = None
-        if class_id:
-            try:
-                class_obj = Class.objects.get(id=class_id)
-            except Class.DoesNotExist:
-                pass
-        
         # Student info table
         info_data = [
-            ['Student Name:', student.get_full_name()],
-            ['Student ID:', str(student.id)],
-            ['Email:', student.email],
+            ['Student Name:', data.student_name],
+            ['Student ID:', str(data.student_id)],
+            ['Email:', data.email],
         ]
         
-        if class_obj:
-            info_data.append(['Class:', class_obj.name])
+        if data.class_name:
+            info_data.append(['Class:', data.class_name])
         
         info_table = Table(info_data, colWidths=[2*inch, 4*inch])
         info_table.setStyle(TableStyle([
@@ -223,7 +204,7 @@ class ReportCardGenerator:
         
         return elements
     
-    def _build_academic_performance(self, grades):
+    def _build_academic_performance(self, data):
         """Build academic performance overview"""
         elements = []
         
@@ -231,18 +212,18 @@ class ReportCardGenerator:
         header = Paragraph("Academic Performance Overview", self.styles['SectionHeader'])
         elements.append(header)
         
-        if not grades.exists():
+        if not data.grades:
             no_data = Paragraph("No grades available for this period.", self.styles['Normal'])
             elements.append(no_data)
             return elements
         
         # Calculate statistics
-        total_assessments = grades.values('assessment').distinct().count()
-        avg_percentage = grades.aggregate(avg=Avg('percentage'))['avg'] or 0
+        total_assessments = len({grade.assessment_id for grade in data.grades})
+        avg_percentage = data.average_percentage
         
         # Get grade letter distribution
         grade_dist = {}
-        for grade in grades:
+        for grade in data.grades:
             letter = grade.grade_letter or 'N/A'
             grade_dist[letter] = grade_dist.get(letter, 0) + 1
         
@@ -271,7 +252,7 @@ class ReportCardGenerator:
         
         return elements
     
-    def _build_subject_breakdown(self, grades):
+    def _build_subject_breakdown(self, data):
         """Build subject-wise grade breakdown"""
         elements = []
         
@@ -279,13 +260,13 @@ class ReportCardGenerator:
         header = Paragraph("Subject-wise Performance", self.styles['SectionHeader'])
         elements.append(header)
         
-        if not grades.exists():
+        if not data.grades:
             return elements
         
         # Group grades by subject
         subjects = {}
-        for grade in grades.select_related('assessment__subject'):
-            subject_name = grade.assessment.subject.name
+        for grade in data.grades:
+            subject_name = grade.subject
             if subject_name not in subjects:
                 subjects[subject_name] = []
             subjects[subject_name].append(grade)
@@ -333,7 +314,7 @@ class ReportCardGenerator:
         
         return elements
     
-    def _build_performance_summary(self, grades):
+    def _build_performance_summary(self, data):
         """Build performance summary with insights"""
         elements = []
         
@@ -341,11 +322,11 @@ class ReportCardGenerator:
         header = Paragraph("Performance Summary", self.styles['SectionHeader'])
         elements.append(header)
         
-        if not grades.exists():
+        if not data.grades:
             return elements
         
         # Calculate insights
-        avg_percentage = grades.aggregate(avg=Avg('percentage'))['avg'] or 0
+        avg_percentage = data.average_percentage
         
         # Determine performance category
         if avg_percentage >= 90:
@@ -390,7 +371,7 @@ class ReportCardGenerator:
         
         return elements
     
-    def _build_remarks(self, grades, student):
+    def _build_remarks(self, data):
         """Build teacher remarks section"""
         elements = []
         
@@ -400,7 +381,7 @@ class ReportCardGenerator:
         
         # Collect unique remarks from grades
         remarks = []
-        for grade in grades:
+        for grade in data.grades:
             if grade.remarks and grade.remarks.strip():
                 remarks.append(f"• {grade.remarks}")
         
@@ -426,36 +407,7 @@ class ReportCardGenerator:
     
     def _build_footer(self):
         """Build report card footer"""
-        elements = []
-        
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Signature section
-        sig_data = [
-            ['_____________________', '', '_____________________'],
-            ['Class Teacher', '', 'Principal'],
-        ]
-        
-        sig_table = Table(sig_data, colWidths=[2*inch, 2*inch, 2*inch])
-        sig_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'BOTTOM'),
-            ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ]))
-        
-        elements.append(sig_table)
-        
-        # Footer text
-        elements.append(Spacer(1, 0.2*inch))
-        footer_text = Paragraph(
-            "<i>This is a computer-generated report card. No signature is required.</i>",
-            self.styles['Normal']
-        )
-        footer_text.alignment = TA_CENTER
-        elements.append(footer_text)
-        
-        return elements
+        return footer_flowables()
     
     def generate_bulk_reports(self, class_id, term=None, academic_year=None):
         """
@@ -464,22 +416,217 @@ class ReportCardGenerator:
         Returns:
             List of tuples: [(student_id, buffer), ...]
         """
+        bulk = BulkReportCards(class_id, term=term, academic_year=academic_year)
+        return [(data.student_id, BytesIO(pdf)) for data, pdf in bulk.iter_reports()]
+
+
+def render_analytics_pdf(data):
+    """
+    Render comprehensive analytics (see StudentPerformanceAnalytics) as a PDF.
+    
+    Returns:
+        BytesIO buffer containing PDF
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    elements = []
+    styles = REPORT_STYLES
+    
+    # Title
+    title = Paragraph(
+        f"<b>Performance Analytics: {data['student_info']['name']}</b>",
+        styles['Title']
+    )
+    elements.append(title)
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Overall Metrics
+    metrics = data['overall_metrics']
+    elements.append(Paragraph("<b>Overall Performance</b>", styles['Heading2']))
+    metrics_data = [
+        ['Total Assessments', str(metrics['total_assessments'])],
+        ['Average Score', f"{metrics['average_score']}%"],
+        ['GPA', str(metrics['gpa'])],
+        ['Rank Percentile', f"{metrics['rank_percentile']}%"]
+    ]
+    metrics_table = Table(metrics_data, colWidths=[3*inch, 2*inch])
+    metrics_table.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ]))
+    elements.append(metrics_table)
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Strengths and Weaknesses
+    sw = data['strengths_weaknesses']
+    elements.append(Paragraph("<b>Strengths & Weaknesses</b>", styles['Heading2']))
+    
+    if sw['strengths']:
+        elements.append(Paragraph("<b>Strengths:</b>", styles['Normal']))
+        for s in sw['strengths']:
+            elements.append(Paragraph(
+                f"• {s['subject']}: {s['average']}%",
+                styles['Normal']
+            ))
+    
+    if sw['weaknesses']:
+        elements.append(Paragraph("<b>Weaknesses:</b>", styles['Normal']))
+        for w in sw['weaknesses']:
+            elements.append(Paragraph(
+                f"• {w['subject']}: {w['average']}%",
+                styles['Normal']
+            ))
+    
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Recommendations
+    elements.append(Paragraph("<b>Recommendations</b>", styles['Heading2']))
+    for rec in data['recommendations'][:5]:
+        elements.append(Paragraph(
+            f"• [{rec['priority'].upper()}] {rec['message']}",
+            styles['Normal']
+        ))
+    
+    # Build PDF
+    doc.build(elements)
+    buffer.seek(0)
+    
+    return buffer
+
+
+def report_filename(student, academic_year=None):
+    """Download name of a report card; student may be a User or ReportData."""
+    return f"report_card_{student.username}_{academic_year or 'current'}.pdf"
+
+
+def _render_report(job):
+    data, term, academic_year = job
+    buffer = ReportCardGenerator().render(data, term, academic_year)
+    return data, buffer.getvalue()
+
+
+_render_pools = {}
+_render_pools_lock = threading.Lock()
+
+
+def _render_pool(workers):
+    """The process's shared render pool, so concurrent bulk requests share its workers."""
+    with _render_pools_lock:
+        pool = _render_pools.get(workers)
+        if pool is None:
+            pool = _render_pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=render_context(), initializer=init_render_worker
+            )
+        return pool
+
+
+def _discard_render_pool(workers, pool):
+    with _render_pools_lock:
+        if _render_pools.get(workers) is pool:
+            del _render_pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class BulkReportCards:
+    """
+    Report cards for every student in a class.
+    
+    The class's students and all their grades in the class are fetched
+    in two queries by ``load()`` into one ReportData per student. Rendering
+    is CPU-bound, so the PDFs are built in a process pool shared by every
+    bulk request in the process, with at most two reports per worker in
+    flight so memory stays bounded however large the class is.
+    """
+    
+    def __init__(self, class_id, term=None, academic_year=None):
+        try:
+            self.class_obj = Class.objects.get(id=class_id)
+        except (Class.DoesNotExist, ValueError):
+            raise ValueError(f"Class with ID {class_id} not found")
+        self.term = term
+        self.academic_year = academic_year
+        self._jobs = None
+    
+    def load(self):
+        """Fetch the students and grades, once; returns the render jobs."""
+        if self._jobs is None:
+            students = list(self.class_obj.students.filter(role=User.STUDENT).order_by('id'))
+            grades = {student.id: [] for student in students}
+            rows = report_grade_rows(
+                Grade.objects.filter(student__in=students), self.class_obj.id
+            )
+            for student_id, *row in rows:
+                grades[student_id].append(ReportGrade(*row))
+            self._jobs = [
+                (ReportData(student, grades[student.id], self.class_obj), self.term, self.academic_year)
+                for student in students
+            ]
+        return self._jobs
+    
+    def iter_reports(self, workers=None):
+        """
+        Yield ``(ReportData, pdf_bytes)`` for each student, in student id order.
+        
+        ``workers`` defaults to the REPORT_RENDER_WORKERS setting; with one
+        worker (or one report) the reports are rendered in this process.
+        """
+        jobs = self.load()
+        workers = workers or getattr(settings, 'REPORT_RENDER_WORKERS', None) or 1
+        if workers <= 1 or len(jobs) <= 1:
+            for job in jobs:
+                yield _render_report(job)
+            return
+        
+        pool = _render_pool(workers)
+        pending = deque()
         try:
-            class_obj = Class.objects.get(id=class_id)
-            students = class_obj.students.filter(role=User.STUDENT)
-            
-            reports = []
-            for student in students:
-                generator = ReportCardGenerator()
-                buffer = generator.generate_report(
-                    student.id,
-                    class_id=class_id,
-                    term=term,
-                    academic_year=academic_year
-                )
-                reports.append((student.id, buffer))
-            
-            return reports
-            
-        except Class.DoesNotExist:
-            raise ValueError(f"Class with ID {class_id} not found")
\ No newline at end of file
+            for job in jobs:
+                pending.append(pool.submit(_render_report, job))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start afresh next time
+            _discard_render_pool(workers, pool)
+            raise
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    def iter_zip(self, workers=None):
+        """Yield a ZIP archive of all report cards in chunks, one report at a time."""
+        return stream_zip(
+            (report_filename(data, self.academic_year), pdf)
+            for data, pdf in self.iter_reports(workers)
+        )
+
+
+class _ZipChunks(RawIOBase):
+    """Write-only stream whose contents are drained after each archive member."""
+    
+    def __init__(self):
+        self._chunks = []
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(files):
+    """Yield a ZIP archive of ``(name, bytes)`` pairs without buffering it whole."""
+    stream = _ZipChunks()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files:
+            archive.writestr(name, data)
+            yield stream.drain()
+    yield stream.drain()
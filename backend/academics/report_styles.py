@@ -0,0 +1,195 @@
+# backend/academics/report_styles.py
+import copy
+from functools import lru_cache
+from types import MappingProxyType
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import Table, TableStyle, Paragraph, Spacer
+
+
+class FrozenParagraphStyle(ParagraphStyle):
+    """
+    A ParagraphStyle that cannot be changed once built.
+
+    Shared styles are read by every render in the process, so an
+    accidental ``style.fontSize = ...`` would leak into unrelated reports.
+    Copies (ReportLab deep-copies a style before adjusting it) come back
+    as ordinary, mutable ParagraphStyles.
+    """
+
+    def __init__(self, style):
+        self.__dict__.update(style.__dict__)
+        self.__dict__['_frozen'] = True
+
+    def __setattr__(self, name, value):
+        if self.__dict__.get('_frozen'):
+            raise AttributeError(f"Shared report style {self.name!r} is read-only")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Shared report style {self.name!r} is read-only")
+
+    def __deepcopy__(self, memo):
+        return self.clone(self.name)
+
+    def clone(self, name, parent=None, **kwds):
+        style = ParagraphStyle(name)
+        style.__dict__.update(
+            (key, value) for key, value in self.__dict__.items() if key not in ('name', '_frozen')
+        )
+        style.name = name
+        if parent is not None:
+            style.parent = parent
+        style.__dict__.update(kwds)
+        return style
+
+
+def build_report_styles():
+    """A new, mutable stylesheet: ReportLab's sample styles plus the report card styles."""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='SchoolName',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1e40af'),
+        spaceAfter=6,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold'
+    ))
+
+    styles.add(ParagraphStyle(
+        name='ReportTitle',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#374151'),
+        spaceAfter=12,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold'
+    ))
+
+    styles.add(ParagraphStyle(
+        name='StudentInfo',
+        parent=styles['Normal'],
+        fontSize=11,
+        spaceAfter=6,
+        fontName='Helvetica'
+    ))
+
+    styles.add(ParagraphStyle(
+        name='SectionHeader',
+        parent=styles['Heading3'],
+        fontSize=13,
+        textColor=colors.HexColor('#1f2937'),
+        spaceAfter=10,
+        spaceBefore=15,
+        fontName='Helvetica-Bold'
+    ))
+    return styles
+
+
+def _freeze(styles):
+    frozen = {name: FrozenParagraphStyle(style) for name, style in styles.byName.items()}
+    frozen.update((alias, frozen[style.name]) for alias, style in styles.byAlias.items())
+    return MappingProxyType(frozen)
+
+
+# Built once per process (including each render worker) and shared by every report
+REPORT_STYLES = _freeze(build_report_styles())
+
+DIVIDER_STYLE = TableStyle([
+    ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor('#3b82f6'))
+])
+
+SIGNATURE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'BOTTOM'),
+    ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+])
+
+
+def report_title(academic_year=None, term=None):
+    title_text = "STUDENT REPORT CARD"
+    if academic_year:
+        title_text += f" - {academic_year}"
+    if term:
+        title_text += f" ({term})"
+    return title_text
+
+
+def build_header(styles, academic_year=None, term=None):
+    """New header flowables: school name, tagline, report title and divider."""
+    elements = []
+
+    # School name
+    elements.append(Paragraph("APOLLO-KEY ACADEMY", styles['SchoolName']))
+
+    # School tagline
+    tagline = Paragraph("Excellence in Education", styles['Normal'])
+    tagline.alignment = TA_CENTER
+    elements.append(tagline)
+    elements.append(Spacer(1, 0.1*inch))
+
+    # Report title
+    elements.append(Paragraph(report_title(academic_year, term), styles['ReportTitle']))
+
+    # Divider line
+    line_table = Table([['', '']], colWidths=[6*inch])
+    line_table.setStyle(DIVIDER_STYLE)
+    elements.append(line_table)
+
+    return elements
+
+
+def build_footer(styles):
+    """New footer flowables: signature lines and the computer-generated notice."""
+    elements = []
+
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Signature section
+    sig_data = [
+        ['_____________________', '', '_____________________'],
+        ['Class Teacher', '', 'Principal'],
+    ]
+    sig_table = Table(sig_data, colWidths=[2*inch, 2*inch, 2*inch])
+    sig_table.setStyle(SIGNATURE_STYLE)
+    elements.append(sig_table)
+
+    # Footer text
+    elements.append(Spacer(1, 0.2*inch))
+    footer_text = Paragraph(
+        "<i>This is a computer-generated report card. No signature is required.</i>",
+        styles['Normal']
+    )
+    footer_text.alignment = TA_CENTER
+    elements.append(footer_text)
+
+    return elements
+
+
+# Prototype flowables, parsed and styled once. ReportLab records layout
+# state (wrapped lines, computed widths) on a flowable while building a
+# document, so each render gets shallow copies rather than these objects.
+_HEADER = tuple(build_header(REPORT_STYLES))
+_FOOTER = tuple(build_footer(REPORT_STYLES))
+
+
+@lru_cache(maxsize=64)
+def _title(academic_year, term):
+    return Paragraph(report_title(academic_year, term), REPORT_STYLES['ReportTitle'])
+
+
+def header_flowables(academic_year=None, term=None):
+    """Header flowables for one render, copied from the shared prototypes."""
+    school_name, tagline, spacer, title, divider = _HEADER
+    if academic_year or term:
+        title = _title(academic_year, term)
+    return [copy.copy(flowable) for flowable in (school_name, tagline, spacer, title, divider)]
+
+
+def footer_flowables():
+    """Footer flowables for one render, copied from the shared prototypes."""
+    return [copy.copy(flowable) for flowable in _FOOTER]
@@ -1,6 +1,7 @@
 # backend/academics/serializers.py - CLEANED (ONLY SERIALIZERS)
 from rest_framework import serializers
-from .models import Class, Subject, Timetable, Attendance, GradeConfig, Assessment, Grade, ParentStudentRelationship
+from rest_framework.reverse import reverse
+from .models import Class, Subject, Timetable, Attendance, GradeConfig, Assessment, Grade, ParentStudentRelationship, ReportJob
 from decimal import Decimal
 from django.db.models import Avg, Count, Sum, Q
 from django.contrib.auth import get_user_model
@@ -194,6 +195,48 @@ class AttendanceSerializer(serializers.ModelSerializer):
         validated_data["recorded_by"] = user
         return super().create(validated_data)
 
+MAX_BULK_ATTENDANCE = 5000
+
+
+class BulkAttendanceRowSerializer(serializers.Serializer):
+    """
+    Field-level validation for one row of a bulk attendance upload.
+    
+    Related objects are plain ids, resolved once for the whole batch.
+    """
+    student = serializers.IntegerField()
+    class_assigned = serializers.IntegerField()
+    date = serializers.DateField()
+    status = serializers.ChoiceField(choices=Attendance.STATUS_CHOICES)
+    notes = serializers.CharField(required=False, allow_blank=True, default="")
+
+
+class BulkAttendanceUpdateRowSerializer(BulkAttendanceRowSerializer):
+    """One row of a bulk attendance update; used with ``partial=True``."""
+    id = serializers.IntegerField()
+    recorded_by = serializers.IntegerField(allow_null=True)
+
+
+class RollCallExceptionSerializer(serializers.Serializer):
+    """A student whose status differs from the roll call default."""
+    student = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Attendance.STATUS_CHOICES)
+    notes = serializers.CharField(allow_blank=True, required=False, default="")
+
+
+class RollCallSerializer(serializers.Serializer):
+    """Marks every student in a class for one date."""
+    class_id = serializers.IntegerField()
+    date = serializers.DateField()
+    status = serializers.ChoiceField(choices=Attendance.STATUS_CHOICES, default=Attendance.PRESENT)
+    exceptions = RollCallExceptionSerializer(many=True, required=False, default=list)
+
+    def validate_exceptions(self, value):
+        students = [row["student"] for row in value]
+        if len(students) != len(set(students)):
+            raise serializers.ValidationError("Each student can only appear once in exceptions.")
+        return value
+
 # ADD these new serializers (append to existing serializers.py):
 
 class GradeConfigSerializer(serializers.ModelSerializer):
@@ -259,13 +302,18 @@ class AssessmentSerializer(serializers.ModelSerializer):
     
     def get_grade_count(self, obj):
         """Count of students who have been graded."""
+        if hasattr(obj, 'grade_count'):  # annotated by with_grade_summary()
+            return obj.grade_count
         return obj.grades.filter(is_absent=False).count()
     
     def get_average_marks(self, obj):
         """Average marks for this assessment."""
-        avg = obj.grades.filter(is_absent=False).aggregate(
-            avg=Avg('marks_obtained')
-        )['avg']
+        if hasattr(obj, 'average_marks'):
+            avg = obj.average_marks
+        else:
+            avg = obj.grades.filter(is_absent=False).aggregate(
+                avg=Avg('marks_obtained')
+            )['avg']
         return round(float(avg), 2) if avg else None
     
     def validate(self, data):
@@ -387,6 +435,9 @@ class GradeSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+MAX_BULK_GRADES = 5000
+
+
 class BulkGradeSerializer(serializers.Serializer):
     """Serializer for bulk grade creation/update."""
     grades = GradeSerializer(many=True)
@@ -396,12 +447,36 @@ class BulkGradeSerializer(serializers.Serializer):
         if not value:
             raise serializers.ValidationError("At least one grade is required.")
         
-        if len(value) > 100:
-            raise serializers.ValidationError("Maximum 100 grades can be processed at once.")
+        if len(value) > MAX_BULK_GRADES:
+            raise serializers.ValidationError(f"Maximum {MAX_BULK_GRADES} grades can be processed at once.")
         
         return value
 
 
+class BulkGradeRowSerializer(serializers.Serializer):
+    """
+    Field-level validation for one row of a bulk grade upload.
+    
+    Related objects are plain ids here; the bulk pipeline resolves them
+    for the whole batch at once instead of one query per row.
+    """
+    assessment = serializers.IntegerField()
+    student = serializers.IntegerField()
+    marks_obtained = serializers.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        required=False,
+        allow_null=True
+    )
+    is_absent = serializers.BooleanField(required=False, default=False)
+    remarks = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class BulkGradeUpdateRowSerializer(BulkGradeRowSerializer):
+    """One row of a bulk grade update; used with ``partial=True``."""
+    id = serializers.IntegerField()
+
+
 class StudentGradebookSerializer(serializers.Serializer):
     """Serializer for student gradebook summary."""
     student_id = serializers.IntegerField()
@@ -556,4 +631,44 @@ class ChildTimetableSerializer(serializers.Serializer):
     start_time = serializers.TimeField()
     end_time = serializers.TimeField()
     teacher_name = serializers.CharField()
-    class_name = serializers.CharField()
\ No newline at end of file
+    class_name = serializers.CharField()
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    """Status of a queued report job, for polling."""
+    
+    progress = serializers.FloatField(read_only=True)
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ReportJob
+        fields = [
+            'id', 'kind', 'params', 'status', 'total', 'completed', 'progress', 'attempts',
+            'error', 'download_url', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+    
+    def get_download_url(self, obj):
+        if obj.status != ReportJob.SUCCEEDED:
+            return None
+        url = reverse('report-job-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class ReportJobCreateSerializer(serializers.Serializer):
+    """Queues a report card, class report cards or analytics PDF."""
+    
+    kind = serializers.ChoiceField(choices=ReportJob.KIND_CHOICES)
+    student_id = serializers.IntegerField(required=False)
+    class_id = serializers.IntegerField(required=False)
+    term = serializers.CharField(required=False, allow_blank=True)
+    academic_year = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate(self, data):
+        if data['kind'] == ReportJob.BULK_REPORT_CARDS:
+            if not data.get('class_id'):
+                raise serializers.ValidationError({'class_id': 'This field is required.'})
+        elif not data.get('student_id'):
+            raise serializers.ValidationError({'student_id': 'This field is required.'})
+        return data
@@ -0,0 +1,62 @@
+# backend/academics/signals.py
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from .models import Assessment, Grade, GradeConfig, StudentAverage
+from .grading import invalidate_grading_scale_on_commit
+from .caching import bump_data_versions_on_commit, bump_student_versions_on_commit
+
+
+@receiver([post_save, post_delete], sender=GradeConfig)
+def grade_config_changed(sender, **kwargs):
+    """Any change to the grading bands invalidates the cached scale in every worker."""
+    invalidate_grading_scale_on_commit()
+
+
+def bump_assessment_scopes(scopes):
+    """Bump the data versions for (class id, subject id) pairs."""
+    scopes = [scope for scope in scopes if scope]
+    bump_data_versions_on_commit(
+        class_ids=[class_id for class_id, _ in scopes],
+        subject_ids=[subject_id for _, subject_id in scopes],
+    )
+
+
+@receiver(pre_delete, sender=Assessment)
+def assessment_deleting(sender, instance, **kwargs):
+    """Remember who was graded so their averages can be refreshed afterwards."""
+    instance._graded_student_ids = list(instance.grades.values_list('student_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Assessment)
+def assessment_changed(sender, instance, **kwargs):
+    """Results cached for the assessment's class and subject are now stale."""
+    bump_assessment_scopes([instance.version_scope(), getattr(instance, '_loaded_scope', None)])
+    instance._loaded_scope = instance.version_scope()
+    StudentAverage.objects.refresh_on_commit(getattr(instance, '_graded_student_ids', []))
+    if kwargs.get('created') is False:
+        # Weightage, date or subject may have changed for everyone graded
+        bump_student_versions_on_commit(instance.grades.values_list('student_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Grade)
+def grade_changed(sender, instance, **kwargs):
+    """Results cached for the grade's class and subject are now stale."""
+    if isinstance(kwargs.get('origin'), Assessment):
+        return  # Deleted with its assessment, which handles the same updates
+    
+    StudentAverage.objects.refresh_on_commit(
+        [instance.student_id, getattr(instance, '_loaded_student_id', None)]
+    )
+    instance._loaded_student_id = instance.student_id
+    
+    assessment_ids = {instance.assessment_id, getattr(instance, '_loaded_assessment_id', None)}
+    assessment_ids.discard(None)
+    cached = instance._state.fields_cache.get('assessment')
+    if cached is not None and assessment_ids == {cached.id}:
+        scopes = [cached.version_scope()]
+    else:
+        scopes = Assessment.objects.filter(id__in=assessment_ids).values_list(
+            'class_assigned_id', 'subject_id'
+        )
+    bump_assessment_scopes(scopes)
+    instance._loaded_assessment_id = instance.assessment_id
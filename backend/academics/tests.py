@@ -3,8 +3,40 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
-from datetime import date, time
-from .models import Class, Subject, Timetable, Attendance
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from datetime import date, time, timedelta
+from io import BytesIO, StringIO
+import os
+import pickle
+import shutil
+import tempfile
+import zipfile
+from unittest import mock, skipUnless
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.utils import timezone
+from decimal import Decimal
+import json
+import math
+from .models import (
+    Class, Subject, Timetable, Attendance, AttendanceRollup,
+    GradeConfig, Assessment, Grade, StudentAverage, ReportJob
+)
+from .analytics import StudentPerformanceAnalytics, ClassPerformanceAnalytics, cache_stats
+from .grade_stats import AssessmentStatistics
+from .bulk import BULK_BATCH_SIZE, BulkGradeUpdate
+from .rankings import AttendanceRankings
+from .jobs import run_job
+from .report_cache import ReportCardCache
+from .report_generator import ReportCardGenerator, ReportData
+from .caching import (
+    bump_data_versions, cache_entry, get_or_compute, result_cache_key, stale_while_revalidate,
+    FRESH, STALE, MISS
+)
+from . import grading
+from .checks import check_shared_cache
+from .grading import get_grading_scale, invalidate_grading_scale
 
 User = get_user_model()
 
@@ -278,6 +310,1465 @@ class AttendanceAPITestCase(APITestCase):
         self.assertTrue(result.get('success'))
 
 
+
+class AttendanceRankingsTestCase(APITestCase):
+    """Test attendance rankings use a fixed number of queries"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            email='admin@example.com',
+            username='admin',
+            password='admin123',
+            role=User.ADMIN
+        )
+        self.class_obj = Class.objects.create(name='Class 10A')
+        self.student_count = 0
+    
+    def add_students(self, count):
+        """Create students with a mix of attendance statuses"""
+        statuses = [Attendance.PRESENT, Attendance.LATE, Attendance.ABSENT]
+        records = []
+        for _ in range(count):
+            self.student_count += 1
+            n = self.student_count
+            student = User.objects.create_user(
+                email=f'student{n}@example.com',
+                username=f'student{n}',
+                password='pass123',
+                role=User.STUDENT
+            )
+            for day in range(1, 4):
+                records.append(Attendance(
+                    student=student,
+                    class_assigned=self.class_obj,
+                    date=date(2024, 1, day),
+                    status=statuses[(n + day) % 3 if n % 2 else 0]
+                ))
+        Attendance.objects.bulk_create(records)
+    
+    def get_rankings(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/academics/attendance/rankings/?limit=3')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json(), len(ctx.captured_queries)
+    
+    def test_rankings_order(self):
+        """Test top and bottom lists are sorted by attendance rate"""
+        self.add_students(6)
+        self.client.force_authenticate(user=self.admin)
+        data, _ = self.get_rankings()
+        
+        self.assertEqual(data['total_students'], 6)
+        top_rates = [s['attendance_rate'] for s in data['top_students']]
+        bottom_rates = [s['attendance_rate'] for s in data['bottom_students']]
+        self.assertEqual(top_rates, sorted(top_rates, reverse=True))
+        self.assertEqual(bottom_rates, sorted(bottom_rates))
+        self.assertEqual(top_rates[0], 100.0)
+        self.assertEqual(data['top_students'][0]['total_records'], 3)
+    
+    def test_rankings_query_count_constant(self):
+        """Benchmark: query count does not grow with the number of students"""
+        self.client.force_authenticate(user=self.admin)
+        self.add_students(5)
+        _, small_queries = self.get_rankings()
+        
+        self.add_students(45)
+        data, large_queries = self.get_rankings()
+        
+        self.assertEqual(data['total_students'], 50)
+        self.assertEqual(small_queries, large_queries)
+    
+    def test_student_rank_single_query(self):
+        """Test a student's rank is computed with one ranked query"""
+        self.add_students(10)
+        self.client.force_authenticate(user=self.admin)
+        student = User.objects.get(username='student2')
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                f'/api/academics/attendance/student-rank/?student_id={student.id}'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        
+        # Even-numbered students attended every day and share the top rank
+        self.assertEqual(data['rank'], 1)
+        self.assertEqual(data['total_students'], 10)
+        self.assertEqual(data['attendance_rate'], 100.0)
+        self.assertEqual(data['category'], 'Excellent')
+        # Student lookup + ranked aggregate
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+        # Lower ranks count the students with a strictly higher rate
+        rankings = AttendanceRankings(AttendanceRollup.objects.for_range())
+        rates = {row['student_id']: row['attendance_rate'] for row in rankings.student_totals()}
+        for student in User.objects.filter(username__in=['student1', 'student3']):
+            position = rankings.student_position(student.id)
+            self.assertEqual(
+                position['rank'],
+                1 + sum(rate > rates[student.id] for rate in rates.values())
+            )
+            self.assertGreater(position['rank'], 5)
+        self.assertIsNone(rankings.student_position(self.admin.id))
+
+
+class AttendanceRollupTestCase(TestCase):
+    """Test the precomputed attendance rollup table"""
+    
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email='student@example.com',
+            username='student',
+            password='pass123',
+            role=User.STUDENT
+        )
+        self.class_obj = Class.objects.create(name='Class 10A')
+        statuses = [Attendance.PRESENT, Attendance.LATE, Attendance.ABSENT, Attendance.PRESENT]
+        Attendance.objects.bulk_create([
+            Attendance(
+                student=self.student,
+                class_assigned=self.class_obj,
+                date=date(2024, 1, 1) + timedelta(days=offset),
+                status=statuses[offset % 4]
+            )
+            for offset in range(120)
+        ])
+    
+    def assert_matches_raw(self, start=None, end=None):
+        raw = Attendance.objects.all()
+        if start:
+            raw = raw.filter(date__gte=start)
+        if end:
+            raw = raw.filter(date__lte=end)
+        totals = AttendanceRollup.objects.for_range(start, end).totals()
+        self.assertEqual(totals['total'], raw.count())
+        self.assertEqual(totals['present'], raw.filter(status=Attendance.PRESENT).count())
+        self.assertEqual(totals['late'], raw.filter(status=Attendance.LATE).count())
+        self.assertEqual(totals['absent'], raw.filter(status=Attendance.ABSENT).count())
+    
+    def test_cover_matches_raw_counts(self):
+        """Test any date range sums to the same counts as the raw records"""
+        for start, end in [
+            (None, None),
+            (date(2024, 1, 10), None),
+            (None, date(2024, 3, 13)),
+            (date(2024, 1, 3), date(2024, 1, 5)),
+            (date(2024, 1, 3), date(2024, 1, 24)),
+            (date(2024, 1, 17), date(2024, 4, 2)),
+            (date(2024, 2, 1), date(2024, 2, 29)),
+        ]:
+            with self.subTest(start=start, end=end):
+                self.assert_matches_raw(start, end)
+    
+    def test_incremental_maintenance(self):
+        """Test rollups follow creates, updates and deletes"""
+        record = Attendance.objects.get(date=date(2024, 2, 10))
+        record.status = Attendance.ABSENT
+        record.save()
+        self.assert_matches_raw()
+        
+        record.date = date(2024, 6, 1)
+        record.save()
+        self.assert_matches_raw()
+        self.assert_matches_raw(date(2024, 2, 1), date(2024, 2, 29))
+        
+        Attendance.objects.filter(date__month=3).update(status=Attendance.LATE)
+        self.assert_matches_raw()
+        
+        Attendance.objects.filter(date__lt=date(2024, 1, 20)).delete()
+        self.assert_matches_raw()
+        self.assertFalse(
+            AttendanceRollup.objects.filter(period=AttendanceRollup.DAY, period_start=date(2024, 1, 5)).exists()
+        )
+
+    def test_refresh_only_touches_changed_buckets(self):
+        """Test a refresh re-aggregates the changed dates' buckets, not the window between them"""
+        untouched = AttendanceRollup.objects.filter(
+            period=AttendanceRollup.MONTH, period_start=date(2024, 2, 1)
+        )
+        untouched.update(total=999)
+
+        keys = [(self.student.id, self.class_obj.id, date(2024, 1, 5)),
+                (self.student.id, self.class_obj.id, date(2024, 3, 20))]
+        AttendanceRollup.objects.refresh(keys)
+        self.assertEqual(untouched.get().total, 999)
+        self.assert_matches_raw(date(2024, 1, 1), date(2024, 1, 31))
+
+        # Refreshing twice upserts the same buckets
+        Attendance.objects.filter(date=date(2024, 1, 5)).delete()
+        AttendanceRollup.objects.refresh(keys)
+        self.assert_matches_raw(date(2024, 3, 1), date(2024, 3, 31))
+        self.assertFalse(
+            AttendanceRollup.objects.filter(period=AttendanceRollup.DAY, period_start=date(2024, 1, 5)).exists()
+        )
+        self.assertEqual(
+            AttendanceRollup.objects.get(period=AttendanceRollup.MONTH, period_start=date(2024, 1, 1)).total, 30
+        )
+
+    def test_rebuild_command(self):
+        """Test the management command rebuilds buckets from scratch"""
+        AttendanceRollup.objects.all().delete()
+        call_command('rebuild_attendance_rollups', stdout=StringIO())
+        self.assert_matches_raw()
+        self.assert_matches_raw(date(2024, 1, 17), date(2024, 4, 2))
+
+
+class GradingScaleTestCase(TestCase):
+    """Test the cached grading scale used when saving grades"""
+    
+    def setUp(self):
+        invalidate_grading_scale()
+        with self.captureOnCommitCallbacks(execute=True):
+            for low, high, letter in [(0, 49.99, 'F'), (50, 69.99, 'C'), (70, 89.99, 'B'), (90, 100, 'A')]:
+                GradeConfig.objects.create(
+                    min_percentage=Decimal(str(low)),
+                    max_percentage=Decimal(str(high)),
+                    grade_letter=letter,
+                    gpa_value=Decimal('1.0')
+                )
+        self.student = User.objects.create_user(
+            email='student@example.com',
+            username='student',
+            password='pass123',
+            role=User.STUDENT
+        )
+        self.class_obj = Class.objects.create(name='Class 10A')
+        self.subject = Subject.objects.create(name='Mathematics', code='MATH')
+        self.assessment = Assessment.objects.create(
+            name='Midterm',
+            assessment_type=Assessment.EXAM,
+            subject=self.subject,
+            class_assigned=self.class_obj,
+            date=date(2024, 3, 1),
+            total_marks=Decimal('50'),
+            weightage=Decimal('20')
+        )
+    
+    def test_letter_lookup(self):
+        """Test bisect lookup matches the configured bands"""
+        scale = get_grading_scale()
+        self.assertEqual(scale.letter_for(Decimal('95')), 'A')
+        self.assertEqual(scale.letter_for(Decimal('90')), 'A')
+        self.assertEqual(scale.letter_for(Decimal('89.99')), 'B')
+        self.assertEqual(scale.letter_for(0), 'F')
+        self.assertEqual(scale.letter_for(89.995), '')
+        self.assertEqual(scale.letter_for(None, default='N/A'), 'N/A')
+    
+    def test_grade_save_uses_cached_scale(self):
+        """Test saving grades does not query GradeConfig"""
+        get_grading_scale()
+        grade = Grade(assessment=self.assessment, student=self.student, marks_obtained=Decimal('36'))
+        with self.assertNumQueries(1):
+            grade.save()
+        self.assertEqual(grade.percentage, Decimal('72'))
+        self.assertEqual(grade.grade_letter, 'B')
+    
+    def test_scale_reloads_after_config_change(self):
+        """Test changing a band invalidates the cached scale"""
+        self.assertEqual(get_grading_scale().letter_for(Decimal('75')), 'B')
+        with self.captureOnCommitCallbacks(execute=True):
+            GradeConfig.objects.filter(grade_letter='B').get().delete()
+        self.assertEqual(get_grading_scale().letter_for(Decimal('75')), '')
+
+    def test_scale_expires_without_a_shared_bump(self):
+        """Test a change another process made is picked up once the local copy expires"""
+        self.assertEqual(get_grading_scale().letter_for(Decimal('75')), 'B')
+        # A queryset update fires no signal, like an edit seen through a per-process cache
+        GradeConfig.objects.filter(grade_letter='B').update(grade_letter='B+')
+        self.assertEqual(get_grading_scale().letter_for(Decimal('75')), 'B')
+        with mock.patch.object(grading, 'SCALE_MAX_AGE', 0):
+            self.assertEqual(get_grading_scale().letter_for(Decimal('75')), 'B+')
+
+    def test_deploy_check_requires_shared_cache(self):
+        """Test check --deploy rejects a process-local cache backend"""
+        self.assertEqual([e.id for e in check_shared_cache(None)], ['academics.E001'])
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}
+        with self.settings(CACHES=redis):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class GradeBulkAPITestCase(APITestCase):
+    """Test bulk grade endpoints"""
+    
+    def setUp(self):
+        invalidate_grading_scale()
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com',
+            username='teacher',
+            password='teacher123',
+            role=User.TEACHER
+        )
+        GradeConfig.objects.create(
+            min_percentage=Decimal('0'), max_percentage=Decimal('59.99'),
+            grade_letter='C', gpa_value=Decimal('2.0')
+        )
+        GradeConfig.objects.create(
+            min_percentage=Decimal('60'), max_percentage=Decimal('100'),
+            grade_letter='A', gpa_value=Decimal('4.0')
+        )
+        self.class_obj = Class.objects.create(name='Class 10A', teacher=self.teacher)
+        self.subject = Subject.objects.create(name='Mathematics', code='MATH', teacher=self.teacher)
+        self.assessment = Assessment.objects.create(
+            name='Final Exam',
+            assessment_type=Assessment.EXAM,
+            subject=self.subject,
+            class_assigned=self.class_obj,
+            date=date(2024, 6, 1),
+            total_marks=Decimal('80'),
+            weightage=Decimal('50')
+        )
+        self.students = [
+            User.objects.create_user(
+                email=f'student{n}@example.com',
+                username=f'student{n}',
+                password='pass123',
+                role=User.STUDENT
+            )
+            for n in range(120)
+        ]
+        self.client.force_authenticate(user=self.teacher)
+    
+    def grade_rows(self, students):
+        return [
+            {'assessment': self.assessment.id, 'student': s.id, 'marks_obtained': str(40 + n % 40)}
+            for n, s in enumerate(students)
+        ]
+    
+    def test_bulk_create_query_count(self):
+        """Test bulk create cost does not grow with the number of rows"""
+        get_grading_scale()
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.post(
+                '/api/academics/grades/bulk-create/',
+                {'grades': self.grade_rows(self.students[:10])},
+                format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(
+                '/api/academics/grades/bulk-create/',
+                {'grades': self.grade_rows(self.students[10:])},
+                format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        
+        grade = Grade.objects.get(assessment=self.assessment, student=self.students[1])
+        self.assertEqual(grade.percentage, Decimal('51.25'))
+        self.assertEqual(grade.grade_letter, 'C')
+        self.assertEqual(grade.graded_by, self.teacher)
+        self.assertEqual(Grade.objects.count(), 120)
+    
+    def test_bulk_create_rejects_duplicates(self):
+        """Test duplicates in the batch or database fail validation"""
+        Grade.objects.create(
+            assessment=self.assessment, student=self.students[0], marks_obtained=Decimal('50')
+        )
+        rows = self.grade_rows(self.students[:3])
+        rows.append(dict(rows[1]))
+        response = self.client.post('/api/academics/grades/bulk-create/', {'grades': rows}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        details = response.json()['details']
+        self.assertIn('non_field_errors', details[0])
+        self.assertEqual(details[1], {})
+        self.assertIn('non_field_errors', details[3])
+        self.assertEqual(Grade.objects.count(), 1)
+    
+    def test_bulk_create_upsert_modes(self):
+        """Test skip keeps and update overwrites existing grades"""
+        Grade.objects.create(
+            assessment=self.assessment, student=self.students[0], marks_obtained=Decimal('20')
+        )
+        rows = self.grade_rows(self.students[:3])
+        url = '/api/academics/grades/bulk-create/'
+        
+        response = self.client.post(url + '?on_conflict=skip', {'grades': rows}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.json()['data']), 3)
+        self.assertEqual(Grade.objects.get(student=self.students[0]).marks_obtained, Decimal('20'))
+        
+        rows.append(dict(rows[0], marks_obtained='64'))
+        response = self.client.post(url + '?on_conflict=update', {'grades': rows}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        grade = Grade.objects.get(student=self.students[0])
+        self.assertEqual((grade.marks_obtained, grade.percentage, grade.grade_letter), (Decimal('64'), Decimal('80.00'), 'A'))
+        self.assertEqual(Grade.objects.count(), 3)
+    
+    def test_bulk_update_recalculates_in_one_batch(self):
+        """Test bulk update re-grades rows without per-row queries"""
+        get_grading_scale()
+        grades = Grade.objects.bulk_create([
+            Grade(assessment=self.assessment, student=s, marks_obtained=Decimal('20'), percentage=Decimal('25'), grade_letter='C')
+            for s in self.students
+        ])
+        
+        def update(rows):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.put(
+                    '/api/academics/grades/bulk-update/', {'grades': rows}, format='json'
+                )
+            # How bulk_update splits the rows into UPDATEs depends on the
+            # backend's parameter limit, so count those separately
+            updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "academics_grade"')]
+            return response, (len(ctx.captured_queries) - len(updates), len(updates))
+        
+        small_rows = [{'id': g.id, 'marks_obtained': '70'} for g in grades[:5]]
+        small_rows.append({'id': grades[2].id, 'student': self.students[2].id})
+        _, small_queries = update(small_rows)
+        rows = [{'id': g.id, 'marks_obtained': '72'} for g in grades[5:]]
+        rows.append({'id': grades[0].id, 'marks_obtained': '100'})
+        rows.append({'id': 999999, 'remarks': 'missing'})
+        rows.append({'id': grades[1].id, 'student': self.students[2].id})
+        response, large_queries = update(rows)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(small_queries[0], large_queries[0])
+        data = response.json()
+        self.assertEqual(data['updated'], 115)
+        fields = [Grade._meta.get_field(name) for name in BulkGradeUpdate.SAVED_FIELDS]
+        batch_size = min(BULK_BATCH_SIZE, connection.ops.bulk_batch_size(['pk', 'pk'] + fields, grades))
+        self.assertEqual(small_queries[1], 1)
+        self.assertEqual(large_queries[1], math.ceil(115 / batch_size))
+        self.assertEqual(data['failed'], 3)
+        self.assertEqual(data['errors'][0]['errors']['marks_obtained'][0], 'Marks cannot exceed total marks (80.00).')
+        self.assertEqual(data['errors'][1], {'id': 999999, 'error': 'Grade not found'})
+        self.assertIn('non_field_errors', data['errors'][2]['errors'])
+        
+        grade = Grade.objects.get(id=grades[10].id)
+        self.assertEqual(grade.percentage, Decimal('90.00'))
+        self.assertEqual(grade.grade_letter, 'A')
+
+
+class AttendanceBulkAPITestCase(APITestCase):
+    """Test bulk attendance endpoints"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com',
+            username='teacher',
+            password='teacher123',
+            role=User.TEACHER
+        )
+        self.class_obj = Class.objects.create(name='Class 10A', teacher=self.teacher)
+        self.students = [
+            User.objects.create_user(
+                email=f'student{n}@example.com',
+                username=f'student{n}',
+                password='pass123',
+                role=User.STUDENT
+            )
+            for n in range(60)
+        ]
+        self.class_obj.students.add(*self.students)
+        self.day = date(2024, 3, 4)
+        self.records = Attendance.objects.bulk_create([
+            Attendance(student=s, class_assigned=self.class_obj, date=self.day, status=Attendance.PRESENT)
+            for s in self.students
+        ])
+        self.client.force_authenticate(user=self.teacher)
+    
+    def update(self, rows):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.put(
+                '/api/academics/attendance/bulk-update/', {'records': rows}, format='json'
+            )
+        return response, len(ctx.captured_queries)
+    
+    def test_bulk_update_query_count(self):
+        """Test bulk update cost does not grow with the number of rows"""
+        _, small_queries = self.update(
+            [{'id': r.id, 'status': Attendance.LATE} for r in self.records[:5]]
+        )
+        response, large_queries = self.update(
+            [{'id': r.id, 'status': Attendance.ABSENT, 'notes': 'Sick'} for r in self.records[5:]]
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(response.json()['updated'], 55)
+        self.assertEqual(Attendance.objects.filter(status=Attendance.ABSENT, notes='Sick').count(), 55)
+        totals = AttendanceRollup.objects.for_range(self.day, self.day).totals()
+        self.assertEqual((totals['late'], totals['absent']), (5, 55))
+    
+    def test_bulk_update_reports_row_errors(self):
+        """Test missing, unknown and conflicting rows are reported and skipped"""
+        moved = self.day + timedelta(days=1)
+        rows = [
+            {'status': Attendance.LATE},
+            {'id': 999999, 'status': Attendance.LATE},
+            {'id': self.records[0].id, 'date': moved.isoformat()},
+            {'id': self.records[1].id, 'student': self.students[4].id},
+            {'id': self.records[2].id, 'student': self.students[0].id, 'date': moved.isoformat()},
+            {'id': self.records[3].id, 'status': 'unknown'},
+        ]
+        response, _ = self.update(rows)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['updated'], 1)
+        self.assertEqual(data['failed'], 5)
+        self.assertEqual(data['errors'][0]['error'], "Missing 'id' field")
+        self.assertIn('status', data['errors'][1]['errors'])
+        self.assertEqual(data['errors'][2], {'record_id': 999999, 'error': 'Attendance record not found'})
+        self.assertIn('non_field_errors', data['errors'][3]['errors'])
+        self.assertIn('non_field_errors', data['errors'][4]['errors'])
+        self.assertEqual(Attendance.objects.get(id=self.records[0].id).date, moved)
+    
+    def test_bulk_create_on_conflict_modes(self):
+        """Test error, skip and update modes for existing attendance"""
+        day = self.day + timedelta(days=1)
+        rows = [
+            {'student': s.id, 'class_assigned': self.class_obj.id, 'date': d.isoformat(), 'status': Attendance.LATE}
+            for s in self.students[:3] for d in (self.day, day)
+        ]
+        url = '/api/academics/attendance/bulk-create/'
+        response = self.client.post(url, {'records': rows}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('non_field_errors', response.json()['details'][0])
+        self.assertEqual(response.json()['details'][1], {})
+        
+        response = self.client.post(url + '?on_conflict=skip', {'records': rows}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(all(row['id'] for row in response.json()['data']))
+        self.assertEqual(Attendance.objects.filter(status=Attendance.LATE).count(), 3)
+        
+        response = self.client.post(url + '?on_conflict=skip', {'records': rows}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Attendance.objects.count(), 63)
+        
+        response = self.client.post(url, {'records': rows, 'on_conflict': 'update'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Attendance.objects.filter(status=Attendance.LATE).count(), 6)
+        totals = AttendanceRollup.objects.for_range(self.day, self.day).totals()
+        self.assertEqual((totals['total'], totals['late']), (60, 3))
+        
+        response = self.client.post(url + '?on_conflict=merge', {'records': rows}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_roll_call_upserts_whole_class(self):
+        """Test roll call marks the roster in one upsert and can be resubmitted"""
+        day = self.day + timedelta(days=1)
+        payload = {
+            'class_id': self.class_obj.id,
+            'date': day.isoformat(),
+            'exceptions': [
+                {'student': self.students[0].id, 'status': Attendance.ABSENT, 'notes': 'Sick'},
+                {'student': self.students[1].id, 'status': Attendance.LATE},
+            ],
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/academics/attendance/roll-call/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['marked'], 60)
+        self.assertEqual((response.json()['present'], response.json()['absent']), (58, 1))
+        upserts = [q for q in ctx.captured_queries if 'ON CONFLICT' in q['sql']]
+        attendance_upserts = [q for q in upserts if 'INSERT INTO "academics_attendance"' in q['sql']]
+        self.assertEqual(len(attendance_upserts), 1)
+        # The rollup buckets are upserted once per period
+        self.assertEqual(len(upserts), 4)
+        
+        payload['exceptions'] = []
+        response = self.client.post('/api/academics/attendance/roll-call/', payload, format='json')
+        self.assertEqual(response.json()['present'], 60)
+        self.assertEqual(Attendance.objects.filter(date=day).count(), 60)
+        self.assertEqual(Attendance.objects.get(date=day, student=self.students[0]).notes, '')
+        totals = AttendanceRollup.objects.for_range(day, day).totals()
+        self.assertEqual((totals['total'], totals['present']), (60, 60))
+    
+    def test_roll_call_rejects_unknown_students_and_other_teachers(self):
+        """Test roll call validation and class ownership"""
+        outsider = User.objects.create_user(
+            email='outsider@example.com', username='outsider', password='pass123', role=User.STUDENT
+        )
+        payload = {
+            'class_id': self.class_obj.id,
+            'date': self.day.isoformat(),
+            'exceptions': [{'student': outsider.id, 'status': Attendance.ABSENT}],
+        }
+        response = self.client.post('/api/academics/attendance/roll-call/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        other = User.objects.create_user(
+            email='other@example.com', username='other', password='pass123', role=User.TEACHER
+        )
+        self.client.force_authenticate(user=other)
+        payload['exceptions'] = []
+        response = self.client.post('/api/academics/attendance/roll-call/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Attendance.objects.exclude(status=Attendance.PRESENT).exists())
+    
+    def test_bulk_update_rejects_oversized_batch(self):
+        """Test the batch size limit"""
+        rows = [{'id': self.records[0].id}] * 5001
+        response, _ = self.update(rows)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AssessmentAPITestCase(APITestCase):
+    """Test Assessment API endpoints"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com',
+            username='teacher',
+            password='teacher123',
+            role=User.TEACHER
+        )
+        self.class_obj = Class.objects.create(name='Class 10A', teacher=self.teacher)
+        self.subject = Subject.objects.create(name='Mathematics', code='MATH', teacher=self.teacher)
+        self.students = [
+            User.objects.create_user(
+                email=f'student{n}@example.com',
+                username=f'student{n}',
+                password='pass123',
+                role=User.STUDENT
+            )
+            for n in range(10)
+        ]
+        self.class_obj.students.add(*self.students)
+        self.client.force_authenticate(user=self.teacher)
+        cache.clear()
+    
+    def add_assessment(self, name, marks):
+        assessment = Assessment.objects.create(
+            name=name,
+            assessment_type=Assessment.QUIZ,
+            subject=self.subject,
+            class_assigned=self.class_obj,
+            date=date(2024, 6, 1),
+            total_marks=Decimal('100'),
+            weightage=Decimal('10'),
+            passing_marks=Decimal('40'),
+        )
+        Grade.objects.bulk_create([
+            Grade(assessment=assessment, student=student, marks_obtained=mark, is_absent=mark is None)
+            for student, mark in zip(self.students, marks)
+        ])
+        return assessment
+    
+    def test_list_annotates_grade_summary(self):
+        """Test list cost does not grow with the number of assessments"""
+        self.add_assessment('Quiz 1', [Decimal('50'), Decimal('70'), None])
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get('/api/academics/assessments/')
+        
+        for n in range(2, 8):
+            self.add_assessment(f'Quiz {n}', [Decimal('60')] * 10)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/academics/assessments/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        rows = response.json()
+        rows = rows.get('results', rows) if isinstance(rows, dict) else rows
+        quiz = next(row for row in rows if row['name'] == 'Quiz 1')
+        self.assertEqual((quiz['grade_count'], quiz['average_marks']), (2, 60.0))
+    
+    def test_statistics_in_two_queries(self):
+        """Test statistics aggregate, percentiles and histogram"""
+        marks = [Decimal(m) for m in ('35', '50', '55', '60', '72', '88', '100')] + [None]
+        assessment = self.add_assessment('Quiz 1', marks)
+        
+        url = f'/api/academics/assessments/{assessment.id}/statistics/?percentiles=25,90&buckets=4'
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # One query loads the assessment; the statistics take two more
+        self.assertEqual(len(ctx.captured_queries), 3)
+        
+        stats = response.json()
+        self.assertEqual(
+            (stats['total_students'], stats['graded_count'], stats['absent_count'], stats['pending_count']),
+            (10, 7, 1, 2)
+        )
+        self.assertEqual((stats['highest'], stats['lowest'], stats['median']), (100.0, 35.0, 60.0))
+        self.assertEqual(stats['passing_count'], 6)
+        self.assertEqual(stats['percentiles'], {'p25': 52.5, 'p90': 92.8})
+        self.assertEqual([b['count'] for b in stats['histogram']], [0, 1, 4, 2])
+        
+        # The portable fallback interpolates in Python and must agree
+        fallback = AssessmentStatistics(assessment, 10, percentiles=(25, 90), buckets=4)
+        fallback.use_database_percentiles = False
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(fallback.compute(), stats)
+        self.assertEqual(len(ctx.captured_queries), 2)
+        
+        response = self.client.get(f'/api/academics/assessments/{assessment.id}/statistics/?buckets=0')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor == 'postgresql', 'percentile_cont is PostgreSQL only')
+    def test_statistics_percentiles_in_database(self):
+        """Test PostgreSQL computes the median and percentiles with percentile_cont"""
+        marks = [Decimal(m) for m in ('35', '50', '55', '60', '72', '88', '100')]
+        assessment = self.add_assessment('Quiz 1', marks)
+        statistics = AssessmentStatistics(assessment, 10, percentiles=(25, 90))
+        self.assertTrue(statistics.use_database_percentiles)
+        with CaptureQueriesContext(connection) as ctx:
+            stats = statistics.compute()
+        sql = ctx.captured_queries[0]['sql']
+        self.assertEqual(sql.count('WITHIN GROUP (ORDER BY'), 3)
+        self.assertIn('PERCENTILE_CONT(0.9) WITHIN GROUP', sql)
+        self.assertEqual((stats['median'], stats['percentiles']), (60.0, {'p25': 52.5, 'p90': 92.8}))
+    
+    def test_student_list_joins_grades_in_memory(self):
+        """Test grade-entry roster cost does not grow with class size"""
+        assessment = self.add_assessment('Quiz 1', [Decimal('50'), None])
+        url = f'/api/academics/assessments/{assessment.id}/student-list/'
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        
+        extra = [
+            User.objects.create_user(
+                email=f'extra{n}@example.com', username=f'extra{n}', password='pass123', role=User.STUDENT
+            )
+            for n in range(20)
+        ]
+        self.class_obj.students.add(*extra)
+        Grade.objects.bulk_create([
+            Grade(assessment=assessment, student=student, marks_obtained=Decimal('75'))
+            for student in extra
+        ])
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        students = {row['username']: row for row in response.json()['students']}
+        self.assertEqual(len(students), 30)
+        self.assertEqual(students['student0']['grade']['marks_obtained'], '50.00')
+        self.assertEqual(students['student0']['grade']['subject_name'], 'Mathematics')
+        self.assertIsNone(students['student5']['grade'])
+        
+        columns = self.client.get(url + '?layout=columns').json()['students']
+        self.assertEqual(len(columns['id']), 30)
+        index = columns['username'].index('student1')
+        self.assertTrue(columns['is_absent'][index])
+        self.assertIsNone(columns['grade_id'][columns['username'].index('student5')])
+
+
+class GradeStatisticsAPITestCase(APITestCase):
+    """Test the grade statistics dashboard"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            email='admin@example.com',
+            username='admin',
+            password='admin123',
+            role=User.ADMIN
+        )
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com',
+            username='teacher',
+            password='teacher123',
+            role=User.TEACHER
+        )
+        self.class_obj = Class.objects.create(name='Class 10A', teacher=self.teacher)
+        self.subject = Subject.objects.create(name='Mathematics', code='MATH', teacher=self.teacher)
+        self.assessments = [
+            Assessment.objects.create(
+                name=f'Quiz {n}',
+                assessment_type=Assessment.QUIZ,
+                subject=self.subject,
+                class_assigned=self.class_obj,
+                date=date(2024, 1, 1) + timedelta(days=7 * n),
+                total_marks=Decimal('100'),
+                weightage=Decimal('10')
+            )
+            for n in range(6)
+        ]
+        cache.clear()
+        self.client.force_authenticate(user=self.admin)
+    
+    def add_students(self, count, scores):
+        """Give each new student one grade per assessment from scores."""
+        offset = User.objects.filter(role=User.STUDENT).count()
+        students = [
+            User.objects.create_user(
+                email=f'student{offset + n}@example.com',
+                username=f'student{offset + n}',
+                password='pass123',
+                role=User.STUDENT
+            )
+            for n in range(count)
+        ]
+        Grade.objects.bulk_create([
+            Grade(
+                assessment=assessment, student=student, marks_obtained=score,
+                percentage=score, grade_letter='A' if score >= 60 else 'C'
+            )
+            for student in students
+            for assessment, score in zip(self.assessments, scores)
+        ])
+        bump_data_versions([self.class_obj.id], [self.subject.id])
+        return students
+    
+    def test_statistics_query_count_is_fixed(self):
+        """Test dashboard cost does not grow with the students surfaced"""
+        declining = [Decimal(s) for s in ('30', '30', '30', '80', '80', '80')]
+        self.add_students(2, declining)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/academics/grades/statistics/')
+        
+        self.add_students(12, [Decimal('90')] * 6)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/academics/grades/statistics/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        # overview, distribution, assessments, top, bottom, mode, trend, subjects
+        self.assertEqual(len(large.captured_queries), 8)
+        data = response.json()
+        self.assertEqual(data['overview']['totalStudents'], 14)
+        self.assertEqual(len(data['topPerformers']), 5)
+        self.assertEqual(data['topPerformers'][0]['grade'], 'A')
+        low = data['needsAttention'][0]
+        # Newest assessments score 80 against 30 for the oldest three
+        self.assertEqual((low['average'], low['grade'], low['trend']), (55.0, 'A', 'improving'))
+    
+    def test_statistics_cached_until_grades_change(self):
+        """Test repeated loads hit the cache and grade edits invalidate it"""
+        students = self.add_students(3, [Decimal('50')] * 6)
+        url = '/api/academics/grades/statistics/'
+        self.assertEqual(self.client.get(url).json()['overview']['averageScore'], 50.0)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        
+        # The teacher's scope has its own entry, keyed by their classes/subjects
+        self.client.force_authenticate(user=self.teacher)
+        teacher_url = f'{url}?class={self.class_obj.id}'
+        self.assertEqual(self.client.get(teacher_url).json()['overview']['totalStudents'], 3)
+        
+        grade = Grade.objects.get(student=students[0], assessment=self.assessments[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/academics/grades/{grade.id}/', {'marks_obtained': '100'}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertNotEqual(self.client.get(teacher_url).json()['overview']['averageScore'], 50.0)
+        self.client.force_authenticate(user=self.admin)
+        # Even while another worker holds the recompute lock (and, here, never
+        # finishes), nothing stale is served
+        cache.add(result_cache_key('grade_statistics', 'admin', [None] * 4) + ':lock', 1)
+        self.assertNotEqual(self.client.get(url).json()['overview']['averageScore'], 50.0)
+    
+    def test_student_report_in_two_queries(self):
+        """Test the student report groups one fetch of grades by subject"""
+        student = self.add_students(1, [Decimal(s) for s in ('40', '60', '80', '90', '70', '50')])[0]
+        science = Subject.objects.create(name='Science', code='SCI', teacher=self.teacher)
+        lab = Assessment.objects.create(
+            name='Lab', assessment_type=Assessment.PROJECT, subject=science,
+            class_assigned=self.class_obj, date=date(2024, 3, 1),
+            total_marks=Decimal('100'), weightage=Decimal('10')
+        )
+        Grade.objects.create(assessment=lab, student=student, is_absent=True)
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f'/api/academics/grades/student-report/?student_id={student.id}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(ctx.captured_queries), 2)
+        
+        report = response.json()
+        self.assertEqual(
+            (report['total_assessments'], report['graded_count'], report['absent_count']), (7, 6, 1)
+        )
+        self.assertEqual(report['overall_percentage'], 65.0)
+        self.assertEqual(len(report['subjects']), 1)
+        self.assertEqual(report['subjects'][0]['grades_count'], 6)
+        self.assertEqual(report['subjects'][0]['grades'][0]['student_name'], student.get_full_name())
+
+
+class StudentPerformanceAnalyticsTestCase(TestCase):
+    """Test the student analytics engine"""
+    
+    def setUp(self):
+        cache.clear()
+        invalidate_grading_scale()
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com', username='teacher', password='teacher123', role=User.TEACHER
+        )
+        self.student = User.objects.create_user(
+            email='student@example.com', username='student', password='pass123', role=User.STUDENT,
+            first_name='Ada', last_name='Lovelace'
+        )
+        self.class_obj = Class.objects.create(name='Class 10A', teacher=self.teacher)
+        self.math = Subject.objects.create(name='Mathematics', code='MATH', teacher=self.teacher)
+        self.art = Subject.objects.create(name='Art', code='ART', teacher=self.teacher)
+        scores = [
+            (self.math, date(2024, 1, 10), '50'), (self.math, date(2024, 2, 10), '60'),
+            (self.math, date(2024, 3, 10), '70'), (self.math, date(2024, 4, 10), '80'),
+            (self.art, date(2024, 1, 20), '90'), (self.art, date(2024, 4, 20), '94'),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            for n, (subject, day, score) in enumerate(scores):
+                assessment = Assessment.objects.create(
+                    name=f'Test {n}', assessment_type=Assessment.EXAM, subject=subject,
+                    class_assigned=self.class_obj, date=day,
+                    total_marks=Decimal('100'), weightage=Decimal('10')
+                )
+                Grade.objects.create(assessment=assessment, student=self.student, marks_obtained=Decimal(score))
+        Attendance.objects.bulk_create([
+            Attendance(student=self.student, class_assigned=self.class_obj, date=date(2024, 1, day),
+                       status=Attendance.PRESENT if day < 9 else Attendance.ABSENT)
+            for day in range(1, 11)
+        ])
+    
+    def test_metrics_from_one_load(self):
+        """Test every section is computed from a single fetch of grades and attendance"""
+        with CaptureQueriesContext(connection) as ctx:
+            data = StudentPerformanceAnalytics(self.student.id).get_comprehensive_analytics()
+        # student, grades, monthly attendance and the rank comparison
+        self.assertEqual(len(ctx.captured_queries), 4)
+        
+        math = next(s for s in data['subject_comparison'] if s['subject_code'] == 'MATH')
+        self.assertEqual((math['average'], math['highest'], math['lowest'], math['count']), (65.0, 80.0, 50.0, 4))
+        self.assertEqual(math['consistency'], 'somewhat_consistent')
+        self.assertEqual(data['subject_comparison'][0]['subject'], 'Art')
+        
+        self.assertEqual(data['grade_trends']['data'][0], {'date': '2024-01', 'average': 70.0, 'count': 2})
+        self.assertEqual(data['grade_trends']['trend'], 'improving')
+        
+        correlation = data['attendance_correlation']
+        self.assertEqual((correlation['attendance_rate'], correlation['grade_average']), (80.0, 74.0))
+        self.assertEqual(correlation['monthly_data'][0], {'month': '2024-01', 'grade_avg': 70.0, 'attendance_rate': 80.0})
+        
+        prediction = next(p for p in data['predicted_grades'] if p['subject'] == 'Mathematics')
+        # Weighted average 65 adjusted 30% towards the last three (70)
+        self.assertEqual((prediction['current_average'], prediction['predicted_final']), (65.0, 66.5))
+        self.assertEqual(data['overall_metrics']['total_assessments'], 6)
+        self.assertEqual(data['overall_metrics']['rank_percentile'], 100.0)
+    
+    def test_cache_follows_student_versions(self):
+        """Test cached analytics stay valid until the student's own results change"""
+        get = lambda: StudentPerformanceAnalytics(self.student.id).get_comprehensive_analytics()
+        get()
+        with CaptureQueriesContext(connection) as ctx:
+            data = get()
+        # student and the fresh rank percentile
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(cache_stats(), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+        
+        # Another student outranking this one leaves the entry valid
+        other = User.objects.create_user(
+            email='other@example.com', username='other', password='pass123', role=User.STUDENT
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.create(
+                assessment=Assessment.objects.first(), student=other, marks_obtained=Decimal('100')
+            )
+        data = get()
+        self.assertEqual(data['overall_metrics']['rank_percentile'], 50.0)
+        self.assertEqual(cache_stats()['hits'], 2)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(
+                student=self.student, class_assigned=self.class_obj, date=date(2024, 2, 1),
+                status=Attendance.PRESENT
+            )
+        data = get()
+        self.assertEqual(cache_stats()['misses'], 2)
+        self.assertEqual(data['attendance_correlation']['attendance_rate'], 81.82)
+        
+        assessment = Assessment.objects.get(name='Test 0')
+        assessment.weightage = Decimal('70')
+        with self.captureOnCommitCallbacks(execute=True):
+            assessment.save()
+        data = get()
+        self.assertEqual(cache_stats()['misses'], 3)
+        prediction = next(p for p in data['predicted_grades'] if p['subject'] == 'Mathematics')
+        self.assertEqual(prediction['current_average'], 56.0)
+        
+        # So do changes to the account details in student_info
+        self.student.last_name = 'King'
+        self.student.save()
+        data = get()
+        self.assertEqual(cache_stats()['misses'], 4)
+        self.assertEqual(data['student_info']['name'], 'Ada King')
+    
+    @mock.patch('academics.management.commands.warm_analytics_cache.cache_is_shared', return_value=True)
+    def test_warm_command(self, cache_is_shared):
+        """Test the warmer fills stale entries only and reports the hit ratio"""
+        out = StringIO()
+        call_command('warm_analytics_cache', stdout=out)
+        self.assertIn('Checked 1 students, warmed 1 stale entries', out.getvalue())
+        
+        out = StringIO()
+        call_command('warm_analytics_cache', stdout=out)
+        self.assertIn('warmed 0 stale entries', out.getvalue())
+        
+        data = StudentPerformanceAnalytics(self.student.id).get_comprehensive_analytics()
+        self.assertEqual(data['overall_metrics']['total_assessments'], 6)
+        out = StringIO()
+        call_command('warm_analytics_cache', '--reset-stats', stdout=out)
+        self.assertIn('Cache hits: 1, misses: 0, hit ratio: 100.0%', out.getvalue())
+        self.assertEqual(cache_stats()['hit_ratio'], None)
+
+        # A per-process cache is refused rather than warmed in isolation
+        cache_is_shared.return_value = False
+        with self.assertRaisesMessage(CommandError, 'process-local'):
+            call_command('warm_analytics_cache', stdout=StringIO())
+    
+    def test_class_analytics_in_fixed_queries(self):
+        """Test class analytics match per-student analytics and load in fixed queries"""
+        other = User.objects.create_user(
+            email='other@example.com', username='other', password='pass123', role=User.STUDENT,
+            first_name='Bob', last_name='Babbage'
+        )
+        ungraded = User.objects.create_user(
+            email='new@example.com', username='new', password='pass123', role=User.STUDENT,
+            first_name='Cy', last_name='Zuse'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for assessment in Assessment.objects.filter(subject=self.math):
+                Grade.objects.create(assessment=assessment, student=other, marks_obtained=Decimal('55'))
+        self.class_obj.students.add(self.student, other, ungraded)
+        
+        expected = [
+            StudentPerformanceAnalytics(student.id).compute_analytics()
+            for student in (other, self.student, ungraded)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            data = list(ClassPerformanceAnalytics(self.class_obj).iter_analytics())
+        # students, grades, monthly attendance and the rank percentiles
+        self.assertEqual(len(ctx.captured_queries), 4)
+        self.assertEqual(data, expected)
+    
+    def test_class_analytics_endpoint(self):
+        """Test the class endpoint streams a JSON array for the class teacher only"""
+        # Only enrolled student accounts are reported
+        self.class_obj.students.add(self.student, self.teacher)
+        client = APIClient()
+        client.force_authenticate(user=self.teacher)
+        response = client.get('/api/academics/analytics/class-performance/', {'class_id': self.class_obj.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([item['student_info']['id'] for item in data], [self.student.id])
+        self.assertEqual(data[0]['overall_metrics']['total_assessments'], 6)
+        
+        # The data is loaded before the response starts, so failures are reported
+        with mock.patch.object(ClassPerformanceAnalytics, '_load', side_effect=DatabaseError('gone')):
+            response = client.get('/api/academics/analytics/class-performance/', {'class_id': self.class_obj.id})
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        other_teacher = User.objects.create_user(
+            email='other@example.com', username='other', password='pass123', role=User.TEACHER
+        )
+        client.force_authenticate(user=other_teacher)
+        response = client.get('/api/academics/analytics/class-performance/', {'class_id': self.class_obj.id})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        
+        client.force_authenticate(user=self.student)
+        response = client.get('/api/academics/analytics/class-performance/', {'class_id': self.class_obj.id})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class StudentAverageTestCase(TestCase):
+    """Test the maintained per-student averages"""
+    
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com', username='teacher', password='teacher123', role=User.TEACHER
+        )
+        self.class_obj = Class.objects.create(name='Class 10A', teacher=self.teacher)
+        self.subject = Subject.objects.create(name='Mathematics', code='MATH', teacher=self.teacher)
+        self.assessment = Assessment.objects.create(
+            name='Final Exam', assessment_type=Assessment.EXAM, subject=self.subject,
+            class_assigned=self.class_obj, date=date(2024, 6, 1),
+            total_marks=Decimal('100'), weightage=Decimal('50')
+        )
+        self.students = [
+            User.objects.create_user(
+                email=f'student{n}@example.com', username=f'student{n}', password='pass123', role=User.STUDENT
+            )
+            for n in range(4)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            for student, marks in zip(self.students, ('90', '70', '70', '40')):
+                Grade.objects.create(assessment=self.assessment, student=student, marks_obtained=Decimal(marks))
+    
+    def test_percentiles_follow_grade_writes(self):
+        """Test averages refresh on save and delete and rank like RANK()"""
+        percentile_for = StudentAverage.objects.percentile_for
+        self.assertEqual([percentile_for(s.id) for s in self.students], [100.0, 75.0, 75.0, 25.0])
+        with CaptureQueriesContext(connection) as ctx:
+            percentile_for(self.students[0].id)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        
+        grade = Grade.objects.get(student=self.students[3])
+        grade.marks_obtained = Decimal('95')
+        with self.captureOnCommitCallbacks(execute=True):
+            grade.save()
+        self.assertEqual(percentile_for(self.students[3].id), 100.0)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            grade.delete()
+        self.assertIsNone(percentile_for(self.students[3].id))
+        self.assertEqual(percentile_for(self.students[1].id), 66.67)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assessment.delete()
+        self.assertFalse(StudentAverage.objects.exists())
+    
+    def test_batch_percentiles(self):
+        """Test percentiles_for matches percentile_for in a single query"""
+        ids = [s.id for s in self.students]
+        with CaptureQueriesContext(connection) as ctx:
+            percentiles = StudentAverage.objects.percentiles_for(ids[1:])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(percentiles, {pk: StudentAverage.objects.percentile_for(pk) for pk in ids[1:]})
+
+    def test_refresh_upserts_in_place(self):
+        """Test refresh updates existing averages without deleting and re-inserting them"""
+        ids = [s.id for s in self.students]
+        Grade.objects.filter(student=self.students[3]).delete()
+        with CaptureQueriesContext(connection) as ctx:
+            StudentAverage.objects.refresh(ids)
+        writes = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith(('INSERT', 'DELETE'))]
+        self.assertEqual(len(writes), 2)
+        self.assertIn('ON CONFLICT', writes[0])
+        self.assertIn(str(ids[3]), writes[1])
+        self.assertEqual(sorted(StudentAverage.objects.values_list('student_id', flat=True)), ids[:3])
+    
+    def test_rebuild_command(self):
+        """Test the management command recomputes every average"""
+        StudentAverage.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_student_averages', stdout=out)
+        self.assertIn('4 students', out.getvalue())
+        self.assertEqual(
+            StudentAverage.objects.get(student=self.students[0]).average_percentage, Decimal('90')
+        )
+
+
+class ReportDataMixin:
+    """A class of three graded students, with the teacher logged in"""
+    
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com', username='teacher', password='teacher123', role=User.TEACHER
+        )
+        self.class_obj = Class.objects.create(name='Class 10A', teacher=self.teacher)
+        self.subject = Subject.objects.create(name='Mathematics', code='MATH', teacher=self.teacher)
+        self.assessment = Assessment.objects.create(
+            name='Midterm', assessment_type=Assessment.EXAM, subject=self.subject,
+            class_assigned=self.class_obj, date=date(2024, 3, 1),
+            total_marks=Decimal('100'), weightage=Decimal('30')
+        )
+        self.students = [
+            User.objects.create_user(
+                email=f'student{n}@example.com', username=f'student{n}', password='pass123', role=User.STUDENT
+            )
+            for n in range(3)
+        ]
+        self.class_obj.students.add(*self.students)
+        for n, student in enumerate(self.students):
+            Grade.objects.create(
+                assessment=self.assessment, student=student,
+                marks_obtained=Decimal(60 + n * 10), remarks='Good work'
+            )
+        self.client.force_authenticate(user=self.teacher)
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings = self.settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class ReportCardAPITestCase(ReportDataMixin, APITestCase):
+    """Test report card generation"""
+    
+    def test_generate_report(self):
+        """Test a single report card is returned as a PDF"""
+        response = self.client.post('/api/academics/grades/generate-report/', {
+            'student_id': self.students[0].id, 'class_id': self.class_obj.id
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+    
+    def test_report_data_loaded_once(self):
+        """Test a report card costs a fixed number of queries and renders from plain data"""
+        with CaptureQueriesContext(connection) as ctx:
+            buffer = ReportCardGenerator().generate_report(self.students[2].id, class_id=self.class_obj.id)
+        # student, class and grades
+        self.assertEqual(len(ctx.captured_queries), 3)
+        self.assertTrue(buffer.getvalue().startswith(b'%PDF'))
+        
+        data = ReportData.load(self.students[2], self.class_obj.id, self.class_obj)
+        self.assertFalse(hasattr(data, '__dict__'))
+        data = pickle.loads(pickle.dumps(data))
+        self.assertEqual((data.class_name, data.average_percentage), ('Class 10A', Decimal('80')))
+        self.assertEqual(
+            [(g.subject, g.grade_letter, g.remarks) for g in data.grades],
+            [('Mathematics', '', 'Good work')]
+        )
+    
+    def test_report_card_cache_and_etag(self):
+        """Test rendered cards are reused until grades change and honour If-None-Match"""
+        url = f'/api/academics/grades/generate-report/?student_id={self.students[0].id}'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        pdf = b''.join(response.streaming_content)
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        with mock.patch.object(ReportCardGenerator, 'render') as render:
+            response = self.client.get(url)
+            self.assertEqual(b''.join(response.streaming_content), pdf)
+        render.assert_not_called()
+        
+        # Keys come from the data itself, so changes made without any cache
+        # bump (as seen by another process) still produce a new card
+        Subject.objects.update(name='Algebra')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        etag = response['ETag']
+        
+        Grade.objects.filter(student=self.students[0]).update(percentage=Decimal('95'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_report_card_cache_evicts_least_recently_used(self):
+        """Test the cache drops the least recently used PDFs beyond its size cap"""
+        report_cache = ReportCardCache(max_bytes=35)
+        with mock.patch.object(report_cache, '_files', wraps=report_cache._files) as scans:
+            for n, key in enumerate(['aa1', 'bb2', 'cc3']):
+                path = report_cache.put(key, b'%PDF-12345')
+                os.utime(path, (1000 + n, 1000 + n))
+        # Only the first write scans the directory while under the cap
+        self.assertEqual(scans.call_count, 1)
+        # Reading the oldest makes it the most recently used
+        report_cache.open('aa1').close()
+        report_cache.put('dd4', b'%PDF-12345')
+        self.assertEqual(
+            sorted(path.stem for path in report_cache.root.glob('*/*.pdf')),
+            ['aa1', 'cc3', 'dd4']
+        )
+    
+    def test_bulk_reports_stream_zip(self):
+        """Test bulk report cards render in a process pool into a streamed ZIP"""
+        with self.settings(REPORT_RENDER_WORKERS=2):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post('/api/academics/grades/generate-bulk-reports/', {
+                    'class_id': self.class_obj.id, 'academic_year': '2024'
+                })
+                content = b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # class, students and every student's grades
+        self.assertEqual(len(ctx.captured_queries), 3)
+        
+        with zipfile.ZipFile(BytesIO(content)) as archive:
+            self.assertEqual(
+                archive.namelist(),
+                [f'report_card_student{n}_2024.pdf' for n in range(3)]
+            )
+            self.assertTrue(all(archive.read(name).startswith(b'%PDF') for name in archive.namelist()))
+        
+        response = self.client.post('/api/academics/grades/generate-bulk-reports/', {'class_id': 999999})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+        # Failures before the first card is sent get a proper error response
+        render = mock.patch('academics.report_generator._render_report', side_effect=RuntimeError('boom'))
+        with self.settings(REPORT_RENDER_WORKERS=1), render:
+            response = self.client.post('/api/academics/grades/generate-bulk-reports/', {
+                'class_id': self.class_obj.id
+            })
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertIn('boom', response.json()['error'])
+
+    def test_shared_report_styles(self):
+        """Test generators share one read-only stylesheet and copy the prebuilt header"""
+        first, second = ReportCardGenerator(), ReportCardGenerator()
+        self.assertIs(first.styles, second.styles)
+        with self.assertRaises(AttributeError):
+            first.styles['Normal'].fontSize = 30
+        with self.assertRaises(TypeError):
+            first.styles['Custom'] = first.styles['Normal']
+
+        header = first._build_header('2024', 'Term 1')
+        self.assertTrue(all(a is not b for a, b in zip(header, second._build_header('2024', 'Term 1'))))
+        self.assertIn('2024 (Term 1)', header[3].getPlainText())
+        # The same prototypes render repeatedly
+        for _ in range(2):
+            buffer = first.generate_report(self.students[0].id, academic_year='2024', term='Term 1')
+            self.assertTrue(buffer.getvalue().startswith(b'%PDF'))
+
+        out = StringIO()
+        call_command('benchmark_report_setup', iterations=2, repeat=1, stdout=out)
+        self.assertIn('Speedup', out.getvalue())
+
+
+class ReportJobAPITestCase(ReportDataMixin, APITestCase):
+    """Test queued report jobs and the worker command"""
+    
+    def setUp(self):
+        super().setUp()
+        settings = self.settings(REPORT_RENDER_WORKERS=1)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # Like the test client, keep the worker from closing the test transaction's connection
+        patcher = mock.patch('academics.management.commands.run_report_worker.close_old_connections')
+        self.close_old_connections = patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_queue_run_and_download(self):
+        """Test a job is queued at once, run by the worker and downloadable"""
+        response = self.client.post('/api/academics/report-jobs/', {
+            'kind': ReportJob.BULK_REPORT_CARDS, 'class_id': self.class_obj.id, 'academic_year': '2024'
+        })
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_url = f"/api/academics/report-jobs/{response.json()['id']}/"
+        self.assertEqual(response.json()['status'], ReportJob.PENDING)
+        self.assertEqual(self.client.get(job_url + 'download/').status_code, status.HTTP_409_CONFLICT)
+        
+        call_command('run_report_worker', '--once', stdout=StringIO())
+        self.close_old_connections.assert_called()
+        
+        job = self.client.get(job_url).json()
+        self.assertEqual(
+            (job['status'], job['completed'], job['total'], job['progress']),
+            (ReportJob.SUCCEEDED, 3, 3, 100.0)
+        )
+        self.assertTrue(job['download_url'].endswith(job_url + 'download/'))
+        response = self.client.get(job_url + 'download/')
+        with zipfile.ZipFile(BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(len(archive.namelist()), 3)
+    
+    def test_permissions_and_failures(self):
+        """Test students only queue their own reports and failed jobs keep the error"""
+        self.client.force_authenticate(user=self.students[0])
+        response = self.client.post('/api/academics/report-jobs/', {
+            'kind': ReportJob.REPORT_CARD, 'student_id': self.students[1].id
+        })
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.post('/api/academics/report-jobs/', {'kind': ReportJob.BULK_REPORT_CARDS, 'class_id': self.class_obj.id})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.post('/api/academics/report-jobs/', {
+            'kind': ReportJob.ANALYTICS_PDF, 'student_id': self.students[0].id
+        })
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        # Other users' jobs are not visible
+        teacher_job = ReportJob.objects.create(
+            kind=ReportJob.BULK_REPORT_CARDS, params={'class_id': 999999}, requested_by=self.teacher
+        )
+        self.assertEqual(len(self.client.get('/api/academics/report-jobs/').json()['results']), 1)
+        
+        with self.assertLogs('academics.jobs', 'ERROR'):
+            call_command('run_report_worker', '--once', stdout=StringIO())
+        teacher_job.refresh_from_db()
+        self.assertEqual(teacher_job.status, ReportJob.FAILED)
+        self.assertIn('not found', teacher_job.error)
+        self.assertEqual(ReportJob.objects.get(requested_by=self.students[0]).status, ReportJob.SUCCEEDED)
+    
+    def test_stale_jobs_requeued_then_failed(self):
+        """Test jobs without a recent heartbeat are requeued, superseded runs are dropped, and retries are capped"""
+        ReportJob.objects.create(
+            kind=ReportJob.REPORT_CARD, params={'student_id': self.students[0].id}, requested_by=self.teacher
+        )
+        first = ReportJob.objects.claim_next()
+        first.set_progress(0, total=1)
+        self.assertEqual(ReportJob.objects.requeue_stale(timedelta(minutes=10)), (0, 0))
+        
+        ReportJob.objects.update(heartbeat_at=timezone.now() - timedelta(minutes=11))
+        self.assertEqual(ReportJob.objects.requeue_stale(timedelta(minutes=10)), (1, 0))
+        second = ReportJob.objects.claim_next()
+        self.assertEqual(second.attempts, 2)
+        
+        # The first worker finishing late must not overwrite the new run
+        with self.assertLogs('academics.jobs', 'WARNING'):
+            run_job(first)
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.result.name), (ReportJob.RUNNING, ''))
+        
+        ReportJob.objects.update(heartbeat_at=timezone.now() - timedelta(minutes=11))
+        self.assertEqual(ReportJob.objects.requeue_stale(timedelta(minutes=10), max_attempts=2), (0, 1))
+        second.refresh_from_db()
+        self.assertEqual(second.status, ReportJob.FAILED)
+        self.assertIn('2 attempts', second.error)
+
+
+class StaleWhileRevalidateTestCase(TestCase):
+    """Test the single-flight, stale-while-revalidate result cache"""
+    
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+    
+    def compute(self):
+        self.calls += 1
+        return self.calls
+    
+    def test_stale_served_while_locked(self):
+        """Test only the lock holder recomputes and others get the stale result"""
+        self.assertEqual(get_or_compute('stats', self.compute, version='v1'), (1, MISS))
+        self.assertEqual(get_or_compute('stats', self.compute, version='v1'), (1, FRESH))
+        
+        # Another worker is recomputing v2
+        cache.add('stats:lock', 1)
+        self.assertEqual(get_or_compute('stats', self.compute, version='v2'), (1, STALE))
+        self.assertEqual(self.calls, 1)
+        
+        cache.delete('stats:lock')
+        self.assertEqual(get_or_compute('stats', self.compute, version='v2'), (2, MISS))
+        self.assertIsNone(cache.get('stats:lock'))
+        
+        # Strict callers never get the previous version's result
+        cache.add('stats:lock', 1)
+        self.assertEqual(
+            get_or_compute('stats', self.compute, version='v3', serve_stale=False, wait=0), (3, MISS)
+        )
+    
+    def test_cold_key_waits_for_lock_holder(self):
+        """Test workers with nothing to serve wait briefly for the holder's result"""
+        cache.add('stats:lock', 1)
+        
+        # The holder stores its result while this worker waits
+        def holder_finishes(seconds):
+            cache.set('stats', cache_entry('theirs'))
+            cache.delete('stats:lock')
+        with mock.patch('academics.caching.time.sleep', side_effect=holder_finishes):
+            self.assertEqual(get_or_compute('stats', self.compute), ('theirs', FRESH))
+        self.assertEqual(self.calls, 0)
+        
+        # The holder fails: compute as soon as the lock is released
+        cache.add('other:lock', 1)
+        holder_fails = lambda seconds: cache.delete('other:lock')
+        with mock.patch('academics.caching.time.sleep', side_effect=holder_fails) as sleep:
+            self.assertEqual(get_or_compute('other', self.compute), (1, MISS))
+        self.assertEqual(sleep.call_count, 1)
+        
+        # The holder never finishes: compute after the wait, leaving the entry to it
+        cache.add('slow:lock', 1)
+        self.assertEqual(get_or_compute('slow', self.compute, wait=0), (2, MISS))
+        self.assertIsNone(cache.get('slow'))
+    
+    def test_max_age_and_decorator(self):
+        """Test entries go stale after max_age and the decorator caches by key"""
+        get_or_compute('stats', self.compute, max_age=60)
+        entry = cache.get('stats')
+        entry['computed_at'] -= 61
+        cache.set('stats', entry)
+        self.assertEqual(get_or_compute('stats', self.compute, max_age=60), (2, MISS))
+        
+        @stale_while_revalidate(key=lambda n: f'double:{n}')
+        def double(n):
+            self.calls += 1
+            return n * 2
+        
+        self.assertEqual([double(2), double(2), double(3)], [4, 4, 6])
+        self.assertEqual(self.calls, 4)
+    
 # ============================================
 # Run tests with:
 # python manage.py test academics
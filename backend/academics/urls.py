@@ -4,8 +4,8 @@ from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .views import (
     ClassViewSet, SubjectViewSet, TimetableViewSet, AttendanceViewSet,
-    GradeConfigViewSet, AssessmentViewSet, GradeViewSet, ParentViewSet,
-    student_performance_analytics, export_analytics_pdf
+    GradeConfigViewSet, AssessmentViewSet, GradeViewSet, ParentViewSet, ReportJobViewSet,
+    student_performance_analytics, class_performance_analytics, export_analytics_pdf
 )
 
 router = DefaultRouter()
@@ -17,6 +17,7 @@ router.register(r"grade-configs", GradeConfigViewSet, basename="grade-config")
 router.register(r"assessments", AssessmentViewSet, basename="assessments")
 router.register(r"grades", GradeViewSet, basename="grade")
 router.register(r"parent", ParentViewSet, basename="parent")
+router.register(r"report-jobs", ReportJobViewSet, basename="report-job")
 
 urlpatterns = [
     # router endpoints
@@ -24,5 +25,6 @@ urlpatterns = [
 
     # custom endpoints
     path('analytics/student-performance/', student_performance_analytics, name='student-performance-analytics'),
+    path('analytics/class-performance/', class_performance_analytics, name='class-performance-analytics'),
     path('analytics/export-pdf/', export_analytics_pdf, name='export-analytics-pdf'),
 ]
@@ -3,9 +3,15 @@ from datetime import datetime
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, Count, Avg
-from .models import Attendance, Class, User, Subject, Timetable, GradeConfig, Assessment, Grade, ParentStudentRelationship
-from .serializers import AttendanceSerializer, ClassSerializer, SubjectSerializer, TimetableSerializer, GradeConfigSerializer, AssessmentSerializer, GradeSerializer, ParentStudentRelationshipSerializer,ChildGradeSerializer,ChildAttendanceSerializer
+from django.db.models import Q, Count, Avg, Sum, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .models import Attendance, AttendanceRollup, Class, User, Subject, Timetable, GradeConfig, Assessment, Grade, ParentStudentRelationship, ReportJob
+from .serializers import AttendanceSerializer, ClassSerializer, SubjectSerializer, TimetableSerializer, GradeConfigSerializer, AssessmentSerializer, GradeSerializer, ParentStudentRelationshipSerializer,ChildGradeSerializer,ChildAttendanceSerializer, RollCallSerializer, MAX_BULK_GRADES, MAX_BULK_ATTENDANCE
+from .serializers import ReportJobSerializer, ReportJobCreateSerializer
+from .bulk import (
+    BulkGradeCreate, BulkGradeUpdate, BulkAttendanceCreate, BulkAttendanceUpdate, RollCall,
+    ON_CONFLICT_ERROR, ON_CONFLICT_CHOICES,
+)
 from django_filters.rest_framework import DjangoFilterBackend
 from .filters import AttendanceFilter
 from django.utils.decorators import method_decorator
@@ -14,23 +20,36 @@ from django.core.cache import cache
 from django.db import transaction
 from .throttles import UserRateThrottle, BurstRateThrottle, BulkOperationThrottle
 from decimal import Decimal
-from django.http import FileResponse, HttpResponse
-from .report_generator import ReportCardGenerator
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import parse_etags, quote_etag
+from django.core.serializers.json import DjangoJSONEncoder
+from .report_generator import ReportData, BulkReportCards, render_analytics_pdf, report_filename
+from .report_cache import ReportCardCache
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .analytics import StudentPerformanceAnalytics
+from .analytics import StudentPerformanceAnalytics, ClassPerformanceAnalytics
+from .rankings import AttendanceRankings
+from .caching import get_data_versions, get_or_compute, result_cache_key
+from .grade_stats import (
+    assessment_statistics, parse_percentiles, most_common_grades, recent_percentages,
+    MAX_HISTOGRAM_BUCKETS,
+)
 from django.http import HttpResponse
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from io import BytesIO
+import itertools
 import json
+import os
 
 
+def get_on_conflict(request):
+    """
+    Read the bulk insert ``on_conflict`` mode (error, skip or update) from
+    the query string or request body. Returns None for unknown values.
+    """
+    value = request.query_params.get("on_conflict") or request.data.get("on_conflict", ON_CONFLICT_ERROR)
+    return value if value in ON_CONFLICT_CHOICES else None
+
 
 class ClassViewSet(viewsets.ModelViewSet):
     queryset = Class.objects.all()
@@ -75,12 +94,19 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def summary(self, request):
         """Get attendance summary (total present/absent/late)."""
-        queryset = self.get_queryset()
+        user = request.user
+        rollups = AttendanceRollup.objects.for_range()
+
+        # Students only see their own records
+        if not user.is_staff and not user.is_superuser and user.role == User.STUDENT:
+            rollups = rollups.filter(student=user)
+
+        totals = rollups.totals()
         summary = {
-            "total_records": queryset.count(),
-            "present": queryset.filter(status=Attendance.PRESENT).count(),
-            "absent": queryset.filter(status=Attendance.ABSENT).count(),
-            "late": queryset.filter(status=Attendance.LATE).count(),
+            "total_records": totals["total"],
+            "present": totals["present"],
+            "absent": totals["absent"],
+            "late": totals["late"],
         }
         return Response(summary, status=status.HTTP_200_OK)
 
@@ -97,31 +123,38 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         start_date = request.query_params.get("start_date")
         end_date = request.query_params.get("end_date")
 
-        # Base queryset with related objects for efficiency
-        attendance_qs = Attendance.objects.select_related("student", "class_assigned")
+        # Rollup buckets covering the requested date range
+        try:
+            rollups = AttendanceRollup.objects.for_range(start_date, end_date)
+        except ValueError:
+            return Response(
+                {"detail": "Dates must use the YYYY-MM-DD format."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         # --- Role-based filtering ---
         if user.is_superuser or user.role == User.ADMIN:
             pass  # See all
         elif user.role == User.TEACHER:
             teacher_classes = Class.objects.filter(teacher=user)
-            attendance_qs = attendance_qs.filter(class_assigned__in=teacher_classes)
+            rollups = rollups.filter(class_assigned__in=teacher_classes)
         elif user.role == User.STUDENT:
-            attendance_qs = attendance_qs.filter(student=user)
+            rollups = rollups.filter(student=user)
         elif user.role == User.PARENT:
             return Response(
                 {"detail": "Parent view not yet implemented."},
                 status=status.HTTP_501_NOT_IMPLEMENTED
             )
         elif user.role == User.STAFF:
-            total = attendance_qs.count()
-            present = attendance_qs.filter(status=Attendance.PRESENT).count()
+            totals = AttendanceRollup.objects.for_range().totals()
+            total = totals["total"]
+            present = totals["present"]
             rate = round((present / total) * 100, 2) if total > 0 else 0
             return Response({
                 "summary": {
                     "total_records": total,
                     "present": present,
-                    "absent": attendance_qs.filter(status=Attendance.ABSENT).count(),
+                    "absent": totals["absent"],
                     "attendance_rate": rate
                 }
             }, status=status.HTTP_200_OK)
@@ -131,27 +164,15 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        # --- Date filters ---
-        if start_date:
-            attendance_qs = attendance_qs.filter(date__gte=start_date)
-        if end_date:
-            attendance_qs = attendance_qs.filter(date__lte=end_date)
-
-        if not attendance_qs.exists():
-            return Response(
-                {"detail": "No attendance records found."},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
         # --- 🚀 Single optimized query for all student stats ---
         stats_qs = (
-            attendance_qs
+            rollups
             .values("student_id", "student__username", "student__first_name", "student__last_name")
             .annotate(
-                total=Count("id"),
-                present=Count("id", filter=Q(status=Attendance.PRESENT)),
-                absent=Count("id", filter=Q(status=Attendance.ABSENT)),
-                late=Count("id", filter=Q(status=Attendance.LATE)),
+                total_records=Sum("total"),
+                present_records=Sum("present"),
+                absent_records=Sum("absent"),
+                late_records=Sum("late"),
             )
             .order_by("student__username")
         )
@@ -159,18 +180,25 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         # Compute attendance rate in Python (after aggregation)
         stats = []
         for s in stats_qs:
-            rate = round(((s["present"] + s["late"]) / s["total"]) * 100, 2) if s["total"] > 0 else 0
+            total = s["total_records"]
+            rate = round(((s["present_records"] + s["late_records"]) / total) * 100, 2) if total > 0 else 0
             stats.append({
                 "student_id": s["student_id"],
                 "student_username": s["student__username"],
                 "student_name": f"{s['student__first_name']} {s['student__last_name']}".strip() or s["student__username"],
-                "total": s["total"],
-                "present": s["present"],
-                "absent": s["absent"],
-                "late": s["late"],
+                "total": total,
+                "present": s["present_records"],
+                "absent": s["absent_records"],
+                "late": s["late_records"],
                 "attendance_rate": rate,
             })
 
+        if not stats:
+            return Response(
+                {"detail": "No attendance records found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
         result = {
             "role": user.role,
             "total_students": len(stats),
@@ -219,12 +247,16 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Limit must be between 1 and 100"},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        attendance_qs = Attendance.objects.select_related("student", "class_assigned")
+        try:
+            rollups = AttendanceRollup.objects.for_range(start_date, end_date)
+        except ValueError:
+            return Response({"detail": "Dates must use the YYYY-MM-DD format."},
+                            status=status.HTTP_400_BAD_REQUEST)
 
         # Role-based filtering
         if user.role == User.TEACHER:
             teacher_classes = Class.objects.filter(teacher=user)
-            attendance_qs = attendance_qs.filter(class_assigned__in=teacher_classes)
+            rollups = rollups.filter(class_assigned__in=teacher_classes)
         elif user.role == User.STUDENT:
             return Response({"detail": "Students cannot view rankings"}, status=status.HTTP_403_FORBIDDEN)
         elif user.role == User.PARENT:
@@ -233,19 +265,17 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         if class_id:
             try:
                 cls = Class.objects.get(id=class_id)
-                attendance_qs = attendance_qs.filter(class_assigned=cls)
+                rollups = rollups.filter(class_assigned=cls)
                 class_name = cls.name
             except Class.DoesNotExist:
                 return Response({"detail": "Class not found"}, status=status.HTTP_404_NOT_FOUND)
         else:
             class_name = "All Classes"
 
-        if start_date:
-            attendance_qs = attendance_qs.filter(date__gte=start_date)
-        if end_date:
-            attendance_qs = attendance_qs.filter(date__lte=end_date)
+        engine = AttendanceRankings(rollups)
+        total_students = engine.count()
 
-        if not attendance_qs.exists():
+        if total_students == 0:
             return Response({
                 "top_students": [],
                 "bottom_students": [],
@@ -254,37 +284,19 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 "message": "No attendance records found"
             }, status=status.HTTP_200_OK)
 
-        # Calculate rankings
-        rankings = []
-        student_ids = attendance_qs.values_list('student_id', flat=True).distinct()
-        for sid in student_ids:
-            records = attendance_qs.filter(student_id=sid)
-            total = records.count()
-            present = records.filter(status=Attendance.PRESENT).count()
-            late = records.filter(status=Attendance.LATE).count()
-            absent = records.filter(status=Attendance.ABSENT).count()
-            rate = round(((present + late) / total) * 100, 2) if total > 0 else 0
-            student = records.first().student
-            rankings.append({
-                "student_id": student.id,
-                "student_username": student.username,
-                "student_name": student.get_full_name(),
-                "total_records": total,
-                "present": present,
-                "absent": absent,
-                "late": late,
-                "attendance_rate": rate,
-                "email": student.email if (user.role == User.ADMIN or user.role == User.TEACHER) else None
-            })
+        # Aggregation, sorting and slicing all happen in the database
+        top_students = engine.top(limit)
+        bottom_students = engine.bottom(limit)
 
-        rankings.sort(key=lambda x: x['attendance_rate'], reverse=True)
-        top_students = rankings[:limit]
-        bottom_students = rankings[-limit:][::-1]
+        show_email = user.role == User.ADMIN or user.role == User.TEACHER
+        if not show_email:
+            for entry in top_students + bottom_students:
+                entry["email"] = None
 
         return Response({
             "top_students": top_students,
             "bottom_students": bottom_students,
-            "total_students": len(rankings),
+            "total_students": total_students,
             "class_name": class_name,
             "filters_applied": {
                 "class_id": class_id,
@@ -312,60 +324,28 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         if user.role == User.STUDENT and user.id != int(student_id):
             return Response({"detail": "You can only view your own rank"}, status=status.HTTP_403_FORBIDDEN)
 
-        attendance_qs = Attendance.objects.select_related("student", "class_assigned")
+        rollups = AttendanceRollup.objects.for_range()
         if class_id:
-            attendance_qs = attendance_qs.filter(class_assigned_id=class_id)
+            rollups = rollups.filter(class_assigned_id=class_id)
         if user.role == User.TEACHER and not (user.is_superuser or user.role == User.ADMIN):
             teacher_classes = Class.objects.filter(teacher=user)
-            attendance_qs = attendance_qs.filter(class_assigned__in=teacher_classes)
-
-        student_ids = attendance_qs.values_list('student_id', flat=True).distinct()
-        all_rankings = []
-        for sid in student_ids:
-            records = attendance_qs.filter(student_id=sid)
-            total = records.count()
-            present = records.filter(status=Attendance.PRESENT).count()
-            late = records.filter(status=Attendance.LATE).count()
-            rate = round(((present + late) / total) * 100, 2) if total > 0 else 0
-            all_rankings.append({"student_id": sid, "attendance_rate": rate})
-
-        all_rankings.sort(key=lambda x: x['attendance_rate'], reverse=True)
-
-        rank = None
-        student_rate = None
-        for idx, r in enumerate(all_rankings, start=1):
-            if r['student_id'] == int(student_id):
-                rank = idx
-                student_rate = r['attendance_rate']
-                break
-
-        if rank is None:
+            rollups = rollups.filter(class_assigned__in=teacher_classes)
+
+        position = AttendanceRankings(rollups).student_position(target_student.id)
+
+        if position is None:
             return Response({"detail": "No attendance records found for this student",
                              "student_name": target_student.get_full_name()},
                             status=status.HTTP_404_NOT_FOUND)
 
-        total_students = len(all_rankings)
-        percentile = round(((total_students - rank + 1) / total_students) * 100, 2)
-
-        if percentile >= 80:
-            category = "Excellent"
-        elif percentile >= 60:
-            category = "Good"
-        elif percentile >= 40:
-            category = "Average"
-        elif percentile >= 20:
-            category = "Below Average"
-        else:
-            category = "Needs Improvement"
-
         return Response({
             "student_id": target_student.id,
             "student_name": target_student.get_full_name(),
-            "rank": rank,
-            "total_students": total_students,
-            "percentile": percentile,
-            "attendance_rate": student_rate,
-            "category": category,
+            "rank": position["rank"],
+            "total_students": position["total_students"],
+            "percentile": position["percentile"],
+            "attendance_rate": position["attendance_rate"],
+            "category": position["category"],
             "class_filter": class_id
         }, status=status.HTTP_200_OK)
 
@@ -374,6 +354,11 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         """
         Bulk create attendance records.
         Expected format: {"records": [{student: 1, class_assigned: 1, date: "2024-01-01", status: "present"}, ...]
+        
+        ?on_conflict=error|skip|update controls records that already exist for
+        the student, class and date: reject the batch (default), keep the
+        stored record, or overwrite it. Retrying a batch with skip or update
+        is safe.
         """
         # ✅ OVERRIDE THROTTLING FOR THIS SPECIFIC ENDPOINT
         self.throttle_classes = [BulkOperationThrottle]
@@ -381,10 +366,9 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         records = request.data.get("records", [])
 
         # Limit bulk size
-        MAX_BULK_SIZE = 100
-        if len(records) > MAX_BULK_SIZE:
+        if len(records) > MAX_BULK_ATTENDANCE:
             return Response(
-                {"error": f"Cannot create more than {MAX_BULK_SIZE} records at once"},
+                {"error": f"Cannot create more than {MAX_BULK_ATTENDANCE} records at once"},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
@@ -399,26 +383,28 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 {"error": "Records must be a list"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+        on_conflict = get_on_conflict(request)
+        if on_conflict is None:
+            return Response(
+                {"error": f"on_conflict must be one of: {', '.join(ON_CONFLICT_CHOICES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         # Validate all records first
-        serializer = AttendanceSerializer(
-            data=records, 
-            many=True, 
-            context={'request': request}
-        )
+        pipeline = BulkAttendanceCreate(records, recorded_by=request.user, on_conflict=on_conflict)
         
-        if serializer.is_valid():
+        if pipeline.is_valid():
             try:
-                with transaction.atomic():
-                    created_records = serializer.save()
-                    return Response(
-                        {
-                            "success": True,
-                            "message": f"{len(created_records)} attendance records created",
-                            "data": AttendanceSerializer(created_records, many=True).data
-                        },
-                        status=status.HTTP_201_CREATED
-                    )
+                saved_records = pipeline.save()
+                return Response(
+                    {
+                        "success": True,
+                        "message": f"{len(saved_records)} attendance records created",
+                        "data": AttendanceSerializer(saved_records, many=True).data
+                    },
+                    status=status.HTTP_201_CREATED
+                )
             except Exception as e:
                 return Response(
                     {"error": f"Failed to create records: {str(e)}"}, 
@@ -428,11 +414,65 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         return Response(
             {
                 "error": "Validation failed",
-                "details": serializer.errors
+                "details": pipeline.errors
             }, 
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    @action(detail=False, methods=["post"], url_path="roll-call")
+    def roll_call(self, request):
+        """
+        Mark every student in a class for one date in a single upsert.
+        Expected format: {"class_id": 1, "date": "2024-01-01", "status": "present",
+                          "exceptions": [{student: 5, status: "absent", notes: "..."}, ...]}
+        Submitting the same class and date again overwrites the earlier roll call.
+        """
+        user = request.user
+        if not (user.is_superuser or user.role in [User.ADMIN, User.TEACHER]):
+            return Response(
+                {"detail": "Only teachers and admins can take a roll call."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        serializer = RollCallSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"error": "Validation failed", "details": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        data = serializer.validated_data
+
+        class_obj = Class.objects.filter(id=data["class_id"]).first()
+        if class_obj is None:
+            return Response({"detail": "Class not found"}, status=status.HTTP_404_NOT_FOUND)
+        if user.role == User.TEACHER and not user.is_superuser and class_obj.teacher_id != user.id:
+            return Response(
+                {"detail": "You can only take the roll call for your own classes."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        roll_call = RollCall(class_obj, data["date"], data["status"], data["exceptions"], user)
+        student_ids = list(class_obj.students.values_list("id", flat=True))
+        unknown = roll_call.unknown_students(student_ids)
+        if unknown:
+            return Response(
+                {"error": "Validation failed",
+                 "details": {"exceptions": [f"Students not in this class: {unknown}"]}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        counts = roll_call.save(student_ids)
+        return Response(
+            {
+                "success": True,
+                "class_id": class_obj.id,
+                "date": data["date"],
+                "marked": len(student_ids),
+                **counts,
+            },
+            status=status.HTTP_200_OK
+        )
+
     @action(detail=False, methods=["put"], url_path="bulk-update")
     def bulk_update(self, request):
         """
@@ -444,14 +484,6 @@ class AttendanceViewSet(viewsets.ModelViewSet):
 
         records = request.data.get("records", [])
 
-        MAX_BULK_SIZE = 100
-        if len(records) > MAX_BULK_SIZE:
-            return Response(
-                {"error": f"Cannot update more than {MAX_BULK_SIZE} records at once"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        
         if not records:
             return Response(
                 {"error": "No records provided"}, 
@@ -463,43 +495,16 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 {"error": "Records must be a list"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+        if len(records) > MAX_BULK_ATTENDANCE:
+            return Response(
+                {"error": f"Cannot update more than {MAX_BULK_ATTENDANCE} records at once"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        updated = []
-        errors = []
-        
+        pipeline = BulkAttendanceUpdate(records)
         try:
-            with transaction.atomic():
-                for record_data in records:
-                    record_id = record_data.get('id')
-                    
-                    if not record_id:
-                        errors.append({"record": record_data, "error": "Missing 'id' field"})
-                        continue
-                    
-                    try:
-                        instance = Attendance.objects.get(id=record_id)
-                        serializer = AttendanceSerializer(
-                            instance, 
-                            data=record_data, 
-                            partial=True,
-                            context={'request': request}
-                        )
-                        
-                        if serializer.is_valid():
-                            serializer.save()
-                            updated.append(serializer.data)
-                        else:
-                            errors.append({
-                                "record_id": record_id, 
-                                "errors": serializer.errors
-                            })
-                            
-                    except Attendance.DoesNotExist:
-                        errors.append({
-                            "record_id": record_id, 
-                            "error": "Attendance record not found"
-                        })
-        
+            updated = pipeline.run()
         except Exception as e:
             return Response(
                 {"error": f"Bulk update failed: {str(e)}"}, 
@@ -509,12 +514,12 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         response_data = {
             "success": len(updated) > 0,
             "updated": len(updated),
-            "data": updated
+            "data": AttendanceSerializer(updated, many=True).data
         }
         
-        if errors:
-            response_data["errors"] = errors
-            response_data["failed"] = len(errors)
+        if pipeline.errors:
+            response_data["errors"] = pipeline.errors
+            response_data["failed"] = len(pipeline.errors)
         
         status_code = status.HTTP_200_OK if len(updated) > 0 else status.HTTP_400_BAD_REQUEST
         
@@ -576,7 +581,7 @@ class AssessmentViewSet(viewsets.ModelViewSet):
     """ViewSet for managing assessments."""
     queryset = Assessment.objects.select_related(
         'subject', 'class_assigned', 'created_by'
-    ).prefetch_related('grades')
+    )
     serializer_class = AssessmentSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
@@ -588,76 +593,111 @@ class AssessmentViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
         
         if user.is_superuser or user.role == User.ADMIN:
-            return queryset
+            pass
         elif user.role == User.TEACHER:
             # Teachers see assessments for their subjects/classes
-            return queryset.filter(
+            queryset = queryset.filter(
                 Q(subject__teacher=user) | Q(class_assigned__teacher=user)
             )
         elif user.role == User.STUDENT:
             # Students see assessments for their classes
-            return queryset.filter(class_assigned__students=user)
+            queryset = queryset.filter(class_assigned__students=user)
+        else:
+            return queryset.none()
         
-        return queryset.none()
+        if self.action == 'statistics':
+            # Class size comes with the assessment instead of a separate count
+            enrolled = Class.students.through.objects.filter(
+                class_id=OuterRef('class_assigned_id')
+            ).values('class_id').annotate(count=Count('id')).values('count')
+            queryset = queryset.annotate(total_students=Coalesce(Subquery(enrolled), 0))
+        
+        # Grade count and average come from the same query as the page
+        return queryset.with_grade_summary()
     
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
-        """Get detailed statistics for an assessment."""
+        """
+        Get detailed statistics for an assessment.
+        
+        Query params:
+            percentiles: comma separated, e.g. "10,25,75,90" (default "25,75")
+            buckets: number of equal-width histogram buckets over 0-100% of
+                     total marks (1-100, optional)
+        """
+        try:
+            percentiles = parse_percentiles(request.query_params.get('percentiles'))
+            buckets = request.query_params.get('buckets')
+            buckets = int(buckets) if buckets else None
+        except ValueError:
+            return Response(
+                {'error': 'percentiles must be integers between 0 and 100 and buckets an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if buckets is not None and not 1 <= buckets <= MAX_HISTOGRAM_BUCKETS:
+            return Response(
+                {'error': f'buckets must be between 1 and {MAX_HISTOGRAM_BUCKETS}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         assessment = self.get_object()
-        grades = assessment.grades.filter(is_absent=False)
+        stats = assessment_statistics(
+            assessment, assessment.total_students, percentiles=percentiles, buckets=buckets
+        )
         
-        if not grades.exists():
+        if stats is None:
             return Response({
                 'message': 'No grades recorded yet.',
                 'assessment_id': assessment.id,
                 'assessment_name': assessment.name
             })
         
-        # Calculate statistics
-        marks_list = list(grades.values_list('marks_obtained', flat=True))
-        marks_list.sort()
-        
-        stats = {
-            'assessment_id': assessment.id,
-            'assessment_name': assessment.name,
-            'total_marks': float(assessment.total_marks),
-            'passing_marks': float(assessment.passing_marks) if assessment.passing_marks else None,
-            'total_students': assessment.class_assigned.students.count(),
-            'graded_count': grades.count(),
-            'absent_count': assessment.grades.filter(is_absent=True).count(),
-            'pending_count': assessment.class_assigned.students.count() - assessment.grades.count(),
-            'average': round(float(grades.aggregate(avg=Avg('marks_obtained'))['avg']), 2),
-            'highest': float(max(marks_list)),
-            'lowest': float(min(marks_list)),
-            'median': float(marks_list[len(marks_list) // 2]),
-            'passing_count': grades.filter(
-                marks_obtained__gte=assessment.passing_marks
-            ).count() if assessment.passing_marks else None,
-            'grade_distribution': {}
-        }
-        
-        # Grade distribution
-        grade_dist = grades.values('grade_letter').annotate(
-            count=Count('id')
-        ).order_by('-count')
-        
-        for item in grade_dist:
-            stats['grade_distribution'][item['grade_letter']] = item['count']
-        
         return Response(stats)
     
     @action(detail=True, methods=['get'], url_path='student-list')
     def student_list(self, request, pk=None):
-        """Get list of students for grade entry."""
+        """
+        Get list of students for grade entry.
+        
+        The roster and the assessment's grades are loaded with one query
+        each and joined in memory. Pass ?layout=columns for a compact
+        payload of parallel arrays (one entry per student) instead of one
+        object per student.
+        """
         assessment = self.get_object()
-        students = assessment.class_assigned.students.filter(role=User.STUDENT)
+        students = list(assessment.class_assigned.students.filter(role=User.STUDENT))
+        grades = {
+            grade.student_id: grade
+            for grade in assessment.grades.select_related('graded_by')
+        }
+        
+        if request.query_params.get('layout') == 'columns':
+            rows = [(student, grades.get(student.id)) for student in students]
+            return Response({
+                'assessment': AssessmentSerializer(assessment).data,
+                'students': {
+                    'id': [student.id for student, _ in rows],
+                    'username': [student.username for student, _ in rows],
+                    'full_name': [student.get_full_name() for student, _ in rows],
+                    'grade_id': [grade.id if grade else None for _, grade in rows],
+                    'marks_obtained': [
+                        grade.marks_obtained if grade else None for _, grade in rows
+                    ],
+                    'is_absent': [grade.is_absent if grade else None for _, grade in rows],
+                    'grade_letter': [grade.grade_letter if grade else None for _, grade in rows],
+                    'remarks': [grade.remarks if grade else None for _, grade in rows],
+                }
+            })
         
         student_data = []
         for student in students:
-            try:
-                grade = assessment.grades.get(student=student)
+            grade = grades.get(student.id)
+            if grade is not None:
+                # Reuse the loaded objects instead of a query per relation
+                grade.assessment = assessment
+                grade.student = student
                 grade_data = GradeSerializer(grade).data
-            except Grade.DoesNotExist:
+            else:
                 grade_data = None
             
             student_data.append({
@@ -706,7 +746,17 @@ class GradeViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'], url_path='bulk-create')
     def bulk_create(self, request):
-        """Bulk create grades."""
+        """
+        Bulk create grades.
+        
+        Rows are validated against data preloaded once for the whole batch
+        and inserted with a single bulk_create, so a full exam for a year
+        group costs a handful of queries.
+        
+        ?on_conflict=error|skip|update controls grades that already exist
+        for the assessment and student: reject the batch (default), keep
+        the stored grade, or overwrite it.
+        """
         grades_data = request.data.get('grades', [])
         
         if not grades_data:
@@ -715,30 +765,38 @@ class GradeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if len(grades_data) > 100:
+        if not isinstance(grades_data, list):
             return Response(
-                {'error': 'Maximum 100 grades can be processed at once'},
+                {'error': 'Grades must be a list'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        serializer = GradeSerializer(
-            data=grades_data,
-            many=True,
-            context={'request': request}
-        )
+        if len(grades_data) > MAX_BULK_GRADES:
+            return Response(
+                {'error': f'Maximum {MAX_BULK_GRADES} grades can be processed at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        on_conflict = get_on_conflict(request)
+        if on_conflict is None:
+            return Response(
+                {'error': f"on_conflict must be one of: {', '.join(ON_CONFLICT_CHOICES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        if serializer.is_valid():
+        pipeline = BulkGradeCreate(grades_data, graded_by=request.user, on_conflict=on_conflict)
+        
+        if pipeline.is_valid():
             try:
-                with transaction.atomic():
-                    created_grades = serializer.save()
-                    return Response(
-                        {
-                            'success': True,
-                            'message': f'{len(created_grades)} grades created successfully',
-                            'data': GradeSerializer(created_grades, many=True).data
-                        },
-                        status=status.HTTP_201_CREATED
-                    )
+                saved_grades = pipeline.save()
+                return Response(
+                    {
+                        'success': True,
+                        'message': f'{len(saved_grades)} grades created successfully',
+                        'data': GradeSerializer(saved_grades, many=True).data
+                    },
+                    status=status.HTTP_201_CREATED
+                )
             except Exception as e:
                 return Response(
                     {'error': f'Failed to create grades: {str(e)}'},
@@ -748,14 +806,19 @@ class GradeViewSet(viewsets.ModelViewSet):
         return Response(
             {
                 'error': 'Validation failed',
-                'details': serializer.errors
+                'details': pipeline.errors
             },
             status=status.HTTP_400_BAD_REQUEST
         )
     
     @action(detail=False, methods=['put'], url_path='bulk-update')
     def bulk_update(self, request):
-        """Bulk update grades."""
+        """
+        Bulk update grades.
+        
+        All target grades are fetched in one query, validated in memory and
+        written back with chunked bulk_update calls.
+        """
         grades_data = request.data.get('grades', [])
         
         if not grades_data:
@@ -764,36 +827,21 @@ class GradeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        updated = []
-        errors = []
+        if not isinstance(grades_data, list):
+            return Response(
+                {'error': 'Grades must be a list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        try:
-            with transaction.atomic():
-                for grade_data in grades_data:
-                    grade_id = grade_data.get('id')
-                    
-                    if not grade_id:
-                        errors.append({'data': grade_data, 'error': 'Missing id'})
-                        continue
-                    
-                    try:
-                        instance = Grade.objects.get(id=grade_id)
-                        serializer = GradeSerializer(
-                            instance,
-                            data=grade_data,
-                            partial=True,
-                            context={'request': request}
-                        )
-                        
-                        if serializer.is_valid():
-                            serializer.save()
-                            updated.append(serializer.data)
-                        else:
-                            errors.append({'id': grade_id, 'errors': serializer.errors})
-                    
-                    except Grade.DoesNotExist:
-                        errors.append({'id': grade_id, 'error': 'Grade not found'})
+        if len(grades_data) > MAX_BULK_GRADES:
+            return Response(
+                {'error': f'Maximum {MAX_BULK_GRADES} grades can be processed at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
+        pipeline = BulkGradeUpdate(grades_data)
+        try:
+            updated = pipeline.run()
         except Exception as e:
             return Response(
                 {'error': f'Bulk update failed: {str(e)}'},
@@ -803,12 +851,12 @@ class GradeViewSet(viewsets.ModelViewSet):
         response_data = {
             'success': len(updated) > 0,
             'updated': len(updated),
-            'data': updated
+            'data': GradeSerializer(updated, many=True).data
         }
         
-        if errors:
-            response_data['errors'] = errors
-            response_data['failed'] = len(errors)
+        if pipeline.errors:
+            response_data['errors'] = pipeline.errors
+            response_data['failed'] = len(pipeline.errors)
         
         return Response(
             response_data,
@@ -842,47 +890,51 @@ class GradeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Get all grades
-        grades = Grade.objects.filter(student=student).select_related(
-            'assessment', 'assessment__subject'
-        )
+        # Get all grades in one fetch and group them in memory
+        grades = list(Grade.objects.filter(student=student).select_related(
+            'assessment', 'assessment__subject', 'graded_by'
+        ))
         
-        if not grades.exists():
+        if not grades:
             return Response({
                 'student_id': student.id,
                 'student_name': student.get_full_name(),
                 'message': 'No grades found'
             })
         
+        def average(items):
+            # Like SQL AVG: grades without a percentage are ignored
+            percentages = [g.percentage for g in items if g.percentage is not None]
+            return sum(percentages) / len(percentages) if percentages else None
+        
         # Calculate overall statistics
-        graded = grades.filter(is_absent=False)
-        total_percentage = graded.aggregate(avg=Avg('percentage'))['avg']
+        graded = [g for g in grades if not g.is_absent]
+        total_percentage = average(graded)
         
         # Group by subject
-        subjects_data = []
-        subjects = set(g.assessment.subject for g in grades)
+        by_subject = {}
+        for grade in graded:
+            grade.student = student
+            by_subject.setdefault(grade.assessment.subject, []).append(grade)
         
-        for subject in subjects:
-            subject_grades = grades.filter(assessment__subject=subject, is_absent=False)
-            
-            if subject_grades.exists():
-                avg_pct = subject_grades.aggregate(avg=Avg('percentage'))['avg']
-                
-                subjects_data.append({
-                    'subject_id': subject.id,
-                    'subject_name': subject.name,
-                    'average_percentage': round(float(avg_pct), 2) if avg_pct else None,
-                    'grades_count': subject_grades.count(),
-                    'grades': GradeSerializer(subject_grades, many=True).data
-                })
+        subjects_data = []
+        for subject, subject_grades in by_subject.items():
+            avg_pct = average(subject_grades)
+            subjects_data.append({
+                'subject_id': subject.id,
+                'subject_name': subject.name,
+                'average_percentage': round(float(avg_pct), 2) if avg_pct else None,
+                'grades_count': len(subject_grades),
+                'grades': GradeSerializer(subject_grades, many=True).data
+            })
         
         return Response({
             'student_id': student.id,
             'student_name': student.get_full_name(),
             'overall_percentage': round(float(total_percentage), 2) if total_percentage else None,
-            'total_assessments': grades.count(),
-            'graded_count': graded.count(),
-            'absent_count': grades.filter(is_absent=True).count(),
+            'total_assessments': len(grades),
+            'graded_count': len(graded),
+            'absent_count': len(grades) - len(graded),
             'subjects': subjects_data
         })
 # backend/academics/views.py - ADD THIS METHOD TO GradeViewSet
@@ -935,9 +987,59 @@ class GradeViewSet(viewsets.ModelViewSet):
         if end_date:
             queryset = queryset.filter(assessment__date__lte=end_date)
         
-        # Check if we have data
-        if not queryset.exists():
-            return Response({
+        # Served from cache until a grade or assessment in scope changes;
+        # never stale, since teachers check the numbers right after editing.
+        # Requests that lose the recompute lock wait briefly for the winner,
+        # then compute the statistics themselves (duplicate work) if it is slow
+        params = [subject_id, class_id, start_date, end_date]
+        cache_key = result_cache_key(
+            'grade_statistics',
+            'admin' if user.role == User.ADMIN else f'{user.role}:{user.id}',
+            params
+        )
+        data, _ = get_or_compute(
+            cache_key,
+            lambda: self._compute_statistics(queryset),
+            version=self._statistics_versions(user, class_id, subject_id),
+            serve_stale=False,
+        )
+        return Response(data)
+    
+    def _statistics_versions(self, user, class_id, subject_id):
+        """Data version token covering every grade the statistics can include."""
+        if class_id or subject_id:
+            return get_data_versions(
+                class_ids=[class_id] if class_id else [],
+                subject_ids=[subject_id] if subject_id else []
+            )
+        if user.role == User.TEACHER:
+            return get_data_versions(
+                class_ids=Class.objects.filter(teacher=user).values_list('id', flat=True),
+                subject_ids=Subject.objects.filter(teacher=user).values_list('id', flat=True)
+            )
+        if user.role == User.STUDENT:
+            return get_data_versions(
+                class_ids=Grade.objects.filter(student=user).values_list(
+                    'assessment__class_assigned_id', flat=True
+                ).distinct()
+            )
+        return get_data_versions(include_global=True)
+    
+    def _compute_statistics(self, queryset):
+        """Build the statistics dashboard payload from a filtered grade queryset."""
+        # Overview statistics in one aggregate; also tells us if there is data
+        overview = queryset.aggregate(
+            total_assessments=Count('assessment', distinct=True),
+            total_students=Count('student', distinct=True),
+            average_percentage=Avg('percentage'),
+            # Pass rate assumes 40% is passing
+            passing_grades=Count('id', filter=Q(percentage__gte=40)),
+            total_grades=Count('id'),
+        )
+        total_grades = overview['total_grades']
+        
+        if not total_grades:
+            return {
                 'overview': {
                     'totalAssessments': 0,
                     'totalStudents': 0,
@@ -949,17 +1051,10 @@ class GradeViewSet(viewsets.ModelViewSet):
                 'topPerformers': [],
                 'needsAttention': [],
                 'subjectComparison': []
-            })
-        
-        # Calculate overview statistics
-        total_assessments = queryset.values('assessment').distinct().count()
-        total_students = queryset.values('student').distinct().count()
-        average_percentage = queryset.aggregate(avg=Avg('percentage'))['avg'] or 0
+            }
         
-        # Calculate pass rate (assuming 40% is passing)
-        passing_grades = queryset.filter(percentage__gte=40).count()
-        total_grades = queryset.count()
-        pass_rate = (passing_grades / total_grades * 100) if total_grades > 0 else 0
+        average_percentage = overview['average_percentage'] or 0
+        pass_rate = overview['passing_grades'] / total_grades * 100
         
         # Grade distribution
         grade_counts = queryset.values('grade_letter').annotate(
@@ -993,8 +1088,9 @@ class GradeViewSet(viewsets.ModelViewSet):
                 'type': assessment['assessment__assessment_type']
             })
         
-        # Top performers (students with highest average)
-        top_performers = []
+        # Top performers (highest average) and students needing attention
+        # (lowest average); their grade mode and trend are fetched for all
+        # of them at once below.
         student_averages = queryset.values(
             'student__id',
             'student__username',
@@ -1002,16 +1098,19 @@ class GradeViewSet(viewsets.ModelViewSet):
             'student__last_name'
         ).annotate(
             average=Avg('percentage')
-        ).order_by('-average')[:5]
-        
-        for student in student_averages:
-            # Get most common grade letter
-            common_grade = queryset.filter(
-                student_id=student['student__id']
-            ).values('grade_letter').annotate(
-                count=Count('id')
-            ).order_by('-count').first()
-            
+        )
+        high_performers = list(student_averages.order_by('-average', 'student__id')[:5])
+        low_performers = list(student_averages.order_by('average', 'student__id')[:5])
+        
+        student_ids = {student['student__id'] for student in high_performers + low_performers}
+        common_grades = most_common_grades(queryset, student_ids)
+        # Grade trend compares the last 3 vs the previous 3 assessments
+        recent_grades = recent_percentages(
+            queryset, [student['student__id'] for student in low_performers], limit=6
+        )
+        
+        top_performers = []
+        for student in high_performers:
             full_name = f"{student['student__first_name']} {student['student__last_name']}".strip()
             if not full_name:
                 full_name = student['student__username']
@@ -1020,27 +1119,12 @@ class GradeViewSet(viewsets.ModelViewSet):
                 'id': student['student__id'],
                 'name': full_name,
                 'average': round(float(student['average']), 1),
-                'grade': common_grade['grade_letter'] if common_grade else 'N/A'
+                'grade': common_grades.get(student['student__id'], 'N/A')
             })
         
-        # Students needing attention (lowest averages)
         needs_attention = []
-        low_performers = queryset.values(
-            'student__id',
-            'student__username',
-            'student__first_name',
-            'student__last_name'
-        ).annotate(
-            average=Avg('percentage')
-        ).order_by('average')[:5]
-        
         for student in low_performers:
-            # Get grade trend (compare last 3 vs previous 3 assessments)
-            student_grades = queryset.filter(
-                student_id=student['student__id']
-            ).order_by('-assessment__date').values_list('percentage', flat=True)[:6]
-            
-            student_grades_list = list(student_grades)
+            student_grades_list = recent_grades[student['student__id']]
             trend = 'stable'
             if len(student_grades_list) >= 6:
                 recent_avg = sum(student_grades_list[:3]) / 3
@@ -1050,12 +1134,6 @@ class GradeViewSet(viewsets.ModelViewSet):
                 elif recent_avg < previous_avg - 5:
                     trend = 'declining'
             
-            common_grade = queryset.filter(
-                student_id=student['student__id']
-            ).values('grade_letter').annotate(
-                count=Count('id')
-            ).order_by('-count').first()
-            
             full_name = f"{student['student__first_name']} {student['student__last_name']}".strip()
             if not full_name:
                 full_name = student['student__username']
@@ -1064,7 +1142,7 @@ class GradeViewSet(viewsets.ModelViewSet):
                 'id': student['student__id'],
                 'name': full_name,
                 'average': round(float(student['average']), 1),
-                'grade': common_grade['grade_letter'] if common_grade else 'N/A',
+                'grade': common_grades.get(student['student__id'], 'N/A'),
                 'trend': trend
             })
         
@@ -1085,10 +1163,10 @@ class GradeViewSet(viewsets.ModelViewSet):
                 'count': subject['count']
             })
         
-        return Response({
+        return {
             'overview': {
-                'totalAssessments': total_assessments,
-                'totalStudents': total_students,
+                'totalAssessments': overview['total_assessments'],
+                'totalStudents': overview['total_students'],
                 'averageScore': round(float(average_percentage), 1),
                 'passRate': round(pass_rate, 1)
             },
@@ -1097,16 +1175,24 @@ class GradeViewSet(viewsets.ModelViewSet):
             'topPerformers': top_performers,
             'needsAttention': needs_attention,
             'subjectComparison': subject_comparison
-        })
+        }
     
     # Add to GradeViewSet class
-    @action(detail=False, methods=['post'], url_path='generate-report')
+    @action(detail=False, methods=['get', 'post'], url_path='generate-report')
     def generate_report(self, request):
-        """Generate PDF report card for a student"""
-        student_id = request.data.get('student_id')
-        class_id = request.data.get('class_id')
-        term = request.data.get('term')
-        academic_year = request.data.get('academic_year')
+        """
+        Generate PDF report card for a student.
+        
+        Rendered cards are cached on disk, keyed by the data they show, so
+        a changed grade or subject name renders a new card. GET requests
+        (parameters in the query string) honour If-None-Match with the
+        returned ETag.
+        """
+        params = request.query_params if request.method == 'GET' else request.data
+        student_id = params.get('student_id')
+        class_id = params.get('class_id')
+        term = params.get('term')
+        academic_year = params.get('academic_year')
         
         if not student_id:
             return Response(
@@ -1123,30 +1209,37 @@ class GradeViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            generator = ReportCardGenerator()
-            buffer = generator.generate_report(
-                student_id=student_id,
-                class_id=class_id,
-                term=term,
-                academic_year=academic_year
+            student = User.objects.get(id=student_id, role=User.STUDENT)
+        except (User.DoesNotExist, ValueError):
+            return Response(
+                {'error': f"Student with ID {student_id} not found"},
+                status=status.HTTP_404_NOT_FOUND
             )
+        
+        try:
+            class_obj = Class.objects.filter(id=class_id).first() if class_id else None
+            data = ReportData.load(student, class_id, class_obj)
+            report_cache = ReportCardCache()
+            key = report_cache.key(data, term, academic_year)
+            etag = quote_etag(key)
             
-            # Get student name for filename
-            student = User.objects.get(id=student_id)
-            filename = f"report_card_{student.username}_{academic_year or 'current'}.pdf"
+            if request.method == 'GET':
+                if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+                if etag in if_none_match or '*' in if_none_match:
+                    response = HttpResponseNotModified()
+                    response['ETag'] = etag
+                    return response
             
-            return FileResponse(
-                buffer,
+            response = FileResponse(
+                report_cache.fetch(key, data, term, academic_year),
                 as_attachment=True,
-                filename=filename,
+                filename=report_filename(student, academic_year),
                 content_type='application/pdf'
             )
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+            return response
             
-        except ValueError as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_404_NOT_FOUND
-            )
         except Exception as e:
             return Response(
                 {'error': f'Failed to generate report: {str(e)}'},
@@ -1155,7 +1248,7 @@ class GradeViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'], url_path='generate-bulk-reports')
     def generate_bulk_reports(self, request):
-        """Generate PDF report cards for all students in a class"""
+        """Generate PDF report cards for all students in a class, streamed as a ZIP archive"""
         class_id = request.data.get('class_id')
         term = request.data.get('term')
         academic_year = request.data.get('academic_year')
@@ -1174,24 +1267,101 @@ class GradeViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            generator = ReportCardGenerator()
-            reports = generator.generate_bulk_reports(
-                class_id=class_id,
-                term=term,
-                academic_year=academic_year
+            bulk = BulkReportCards(class_id, term=term, academic_year=academic_year)
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_404_NOT_FOUND
             )
-            
-            return Response({
-                'success': True,
-                'message': f'Generated {len(reports)} report cards',
-                'count': len(reports)
-            })
-            
+        
+        try:
+            # Load the data and render the first card before any headers are
+            # sent, so those failures still get a proper error response
+            bulk.load()
+            chunks = bulk.iter_zip()
+            first = next(chunks)
         except Exception as e:
             return Response(
                 {'error': f'Failed to generate bulk reports: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        
+        # The remaining reports are rendered in parallel and sent as they finish
+        response = StreamingHttpResponse(
+            itertools.chain([first], chunks), content_type='application/zip'
+        )
+        filename = f"report_cards_{bulk.class_obj.name}_{academic_year or 'current'}.zip"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class ReportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Queue report cards and analytics PDFs for the run_report_worker command.
+    
+    POST returns the queued job immediately (202); clients poll the job
+    for status and per-student progress, then fetch ``download/``.
+    """
+    serializer_class = ReportJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        user = self.request.user
+        queryset = ReportJob.objects.all()
+        if not (user.is_superuser or user.role == User.ADMIN):
+            queryset = queryset.filter(requested_by=user)
+        return queryset
+    
+    def create(self, request):
+        user = request.user
+        serializer = ReportJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = dict(serializer.validated_data)
+        kind = params.pop('kind')
+        
+        if kind == ReportJob.BULK_REPORT_CARDS:
+            if not (user.is_superuser or user.role in [User.ADMIN, User.TEACHER]):
+                return Response(
+                    {'error': 'Only teachers and admins can generate bulk reports'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            if not Class.objects.filter(id=params['class_id']).exists():
+                return Response(
+                    {'error': f"Class with ID {params['class_id']} not found"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+        else:
+            if user.role == User.STUDENT and params['student_id'] != user.id:
+                return Response(
+                    {'error': 'You can only view your own report'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            if not User.objects.filter(id=params['student_id'], role=User.STUDENT).exists():
+                return Response(
+                    {'error': f"Student with ID {params['student_id']} not found"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+        
+        job = ReportJob.objects.create(kind=kind, params=params, requested_by=user)
+        return Response(
+            ReportJobSerializer(job, context={'request': request}).data,
+            status=status.HTTP_202_ACCEPTED
+        )
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download the rendered file of a finished job."""
+        job = self.get_object()
+        if job.status != ReportJob.SUCCEEDED:
+            return Response(
+                {'error': 'Report is not ready', 'status': job.status},
+                status=status.HTTP_409_CONFLICT
+            )
+        return FileResponse(
+            job.result.open('rb'),
+            as_attachment=True,
+            filename=os.path.basename(job.result.name)
+        )
 
 class ParentViewSet(viewsets.ViewSet):
     """ViewSet for parent portal functionality."""
@@ -1432,8 +1602,17 @@ class ParentViewSet(viewsets.ViewSet):
         end_date = request.query_params.get('end_date')
         att_status = request.query_params.get('status')
         
+        try:
+            rollups = AttendanceRollup.objects.for_range(start_date, end_date).filter(student=student)
+        except ValueError:
+            return Response(
+                {'error': 'Dates must use the YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         if class_id:
             attendance = attendance.filter(class_assigned_id=class_id)
+            rollups = rollups.filter(class_assigned_id=class_id)
         if start_date:
             attendance = attendance.filter(date__gte=start_date)
         if end_date:
@@ -1441,11 +1620,20 @@ class ParentViewSet(viewsets.ViewSet):
         if att_status:
             attendance = attendance.filter(status=att_status)
         
-        # Calculate statistics
-        total_records = attendance.count()
-        present_count = attendance.filter(status='present').count()
-        absent_count = attendance.filter(status='absent').count()
-        late_count = attendance.filter(status='late').count()
+        # Calculate statistics from the rollup buckets
+        totals = rollups.totals()
+        if att_status:
+            # Only the filtered status is counted, as with the raw records
+            totals = {
+                key: (value if key == att_status else 0)
+                for key, value in totals.items()
+            }
+            totals['total'] = totals.get(att_status, 0)
+        
+        total_records = totals['total']
+        present_count = totals['present']
+        absent_count = totals['absent']
+        late_count = totals['late']
         
         attendance_rate = (
             ((present_count + late_count) / total_records * 100)
@@ -1750,6 +1938,71 @@ def student_performance_analytics(request):
         )
 
 
+def _stream_json_array(items):
+    """Encode items as one JSON array, one element per chunk."""
+    yield '['
+    for index, item in enumerate(items):
+        if index:
+            yield ','
+        yield json.dumps(item, cls=DjangoJSONEncoder)
+    yield ']'
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def class_performance_analytics(request):
+    """
+    Comprehensive performance analytics for every student in a class,
+    streamed as a JSON array in student name order.
+
+    Query params:
+    - class_id: Required. Teachers may only request their own classes.
+    """
+    user = request.user
+    if not (user.is_superuser or user.role in [User.ADMIN, User.TEACHER]):
+        return Response(
+            {'error': 'Only teachers and admins can view class analytics'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    class_id = request.query_params.get('class_id')
+    if not class_id:
+        return Response(
+            {'error': 'class_id is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        class_obj = Class.objects.get(id=class_id)
+    except (Class.DoesNotExist, ValueError):
+        return Response(
+            {'error': 'Class not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    if user.role == User.TEACHER and not user.is_superuser and class_obj.teacher_id != user.id:
+        return Response(
+            {'error': 'You can only view analytics for your own classes'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    analytics = ClassPerformanceAnalytics(class_obj)
+    try:
+        # Load the data before any headers are sent, so a failure still
+        # gets a proper error response; only the serialization is streamed
+        analytics.load()
+    except Exception as e:
+        return Response(
+            {'error': f'Failed to load class analytics: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    return StreamingHttpResponse(
+        _stream_json_array(analytics.iter_analytics()),
+        content_type='application/json'
+    )
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def export_analytics_pdf(request):
@@ -1771,71 +2024,7 @@ def export_analytics_pdf(request):
         analytics = StudentPerformanceAnalytics(student_id)
         data = analytics.get_comprehensive_analytics()
         
-        # Create PDF
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Title
-        title = Paragraph(
-            f"<b>Performance Analytics: {data['student_info']['name']}</b>",
-            styles['Title']
-        )
-        elements.append(title)
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Overall Metrics
-        metrics = data['overall_metrics']
-        elements.append(Paragraph("<b>Overall Performance</b>", styles['Heading2']))
-        metrics_data = [
-            ['Total Assessments', str(metrics['total_assessments'])],
-            ['Average Score', f"{metrics['average_score']}%"],
-            ['GPA', str(metrics['gpa'])],
-            ['Rank Percentile', f"{metrics['rank_percentile']}%"]
-        ]
-        metrics_table = Table(metrics_data, colWidths=[3*inch, 2*inch])
-        metrics_table.setStyle(TableStyle([
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ]))
-        elements.append(metrics_table)
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Strengths and Weaknesses
-        sw = data['strengths_weaknesses']
-        elements.append(Paragraph("<b>Strengths & Weaknesses</b>", styles['Heading2']))
-        
-        if sw['strengths']:
-            elements.append(Paragraph("<b>Strengths:</b>", styles['Normal']))
-            for s in sw['strengths']:
-                elements.append(Paragraph(
-                    f"• {s['subject']}: {s['average']}%",
-                    styles['Normal']
-                ))
-        
-        if sw['weaknesses']:
-            elements.append(Paragraph("<b>Weaknesses:</b>", styles['Normal']))
-            for w in sw['weaknesses']:
-                elements.append(Paragraph(
-                    f"• {w['subject']}: {w['average']}%",
-                    styles['Normal']
-                ))
-        
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Recommendations
-        elements.append(Paragraph("<b>Recommendations</b>", styles['Heading2']))
-        for rec in data['recommendations'][:5]:
-            elements.append(Paragraph(
-                f"• [{rec['priority'].upper()}] {rec['message']}",
-                styles['Normal']
-            ))
-        
-        # Build PDF
-        doc.build(elements)
-        buffer.seek(0)
+        buffer = render_analytics_pdf(data)
         
         # Return response
         response = HttpResponse(buffer, content_type='application/pdf')
@@ -188,6 +188,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Processes rendering bulk report cards, shared by all requests in a web
+# or worker process (unset: one per CPU, at most 4)
+REPORT_RENDER_WORKERS = int(os.getenv('REPORT_RENDER_WORKERS', '0')) or min(4, os.cpu_count() or 1)
+
+# Size cap of the rendered report card cache under MEDIA_ROOT/report_cards
+REPORT_CACHE_MAX_BYTES = int(os.getenv('REPORT_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+
 # Email Configuration
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
@@ -204,26 +211,27 @@ FRONTEND_URL = FRONTEND_URL or os.getenv('FRONTEND_URL', 'http://localhost:5173'
 # -------------------------
 # Caching Configuration
 # -------------------------
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",  # In-memory for dev
-        "LOCATION": "unique-snowflake",
+# Several processes (web workers, run_report_worker, management commands)
+# share the academics caches and version tokens, so production needs a
+# shared backend; `manage.py check --deploy` reports a process-local one.
+if os.getenv('REDIS_URL'):
+    # Requires the redis package
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+            "KEY_PREFIX": "apollo_key",
+        }
     }
-}
-
-# Example for production (using Redis):
-"""
-CACHES = {
-    "default": {
-        "BACKEND": "django_redis.cache.RedisCache",
-        "LOCATION": os.getenv("REDIS_URL", "redis://127.0.0.1:6379/1"),
-        "OPTIONS": {
-            "CLIENT_CLASS": "django_redis.client.DefaultClient",
-        },
-        "KEY_PREFIX": "apollo_key"
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",  # In-memory for dev
+            "LOCATION": "unique-snowflake",
+        }
     }
-}
 
+"""
 # Optional: session caching
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"